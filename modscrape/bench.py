@@ -0,0 +1,260 @@
+#
+# Modscrape
+# Bench
+# Benchmarks of the scraping pipeline stages with regression baselines
+#
+
+import argparse
+import json
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass
+from importlib.resources import read_text
+from os import PathLike
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Iterable, Optional, Union
+
+from bs4 import BeautifulSoup
+
+import test_resources
+from modscrape.lexer import lex
+from modscrape.parser import parse
+from modscrape.scrape import extract_lines, scrape_modules
+
+# course content fixtures benchmarked by default
+FIXTURES = ["cs_core_modules.html", "art_hist_minor_modules.html"]
+# fraction a benchmark may slow down (or grow peak memory) by over its baseline
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_BASELINE = "bench_baseline.json"
+
+
+@dataclass
+class BenchResult:
+    """Result of benchmarking one pipeline stage on one corpus."""
+
+    # benchmark name eg. "lex:cs_core_modules.html"
+    name: str
+    # best time taken over all repeats
+    seconds: float
+    # peak memory allocated by the stage in bytes
+    peak_bytes: int
+    tokens: int
+    modules: int
+
+    @property
+    def tokens_per_s(self) -> float:
+        return self.tokens / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def modules_per_s(self) -> float:
+        return self.modules / self.seconds if self.seconds > 0 else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "tokens_per_s": self.tokens_per_s,
+            "modules_per_s": self.modules_per_s,
+        }
+
+
+@dataclass
+class Regression:
+    """Benchmark metric that regressed beyond the threshold over its baseline."""
+
+    name: str
+    # regressed metric: "seconds" or "peak_bytes"
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name} {self.metric}: {self.baseline:.6g} -> {self.current:.6g}"
+            f" ({self.ratio - 1:+.1%})"
+        )
+
+
+def measure(
+    name: str, func: Callable[[], Any], tokens: int, modules: int, repeat: int
+) -> BenchResult:
+    """Benchmark the given function, taking the best time over the given repeats.
+
+    Peak memory is measured in a separate run, as tracing allocations with
+    tracemalloc slows down the traced code.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        begin = perf_counter()
+        func()
+        best = min(best, perf_counter() - begin)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    if not was_tracing:
+        tracemalloc.stop()
+    return BenchResult(name, best, peak - base, tokens, modules)
+
+
+def bench_corpus(name: str, html: str, repeat: int = 5) -> list[BenchResult]:
+    """Benchmark each pipeline stage on the given course content HTML.
+
+    Args:
+        name: Name of the corpus, suffixed to the name of each benchmark.
+        html: Course content HTML to benchmark on.
+        repeat: No. of times each stage is timed, keeping the best time.
+    Returns:
+        Results of the row_extract, lex, parse & scrape benchmarks.
+    """
+    page = BeautifulSoup(html, "lxml")
+    lines = extract_lines(page)
+    tokens = lex(lines)
+    n_tokens = sum([len(line) for line in tokens])
+    n_modules = len(parse(tokens))
+    return [
+        measure(f"{stage}:{name}", func, n_tokens, n_modules, repeat)
+        for stage, func in [
+            ("row_extract", lambda: extract_lines(page)),
+            ("lex", lambda: lex(lines)),
+            ("parse", lambda: parse(tokens)),
+            ("scrape", lambda: scrape_modules(html)),
+        ]
+    ]
+
+
+def load_corpora(
+    paths: Iterable[Union[str, PathLike]] = (), fixtures: bool = True
+) -> dict[str, str]:
+    """Load the test_resources fixtures & the given corpora to benchmark on.
+
+    Args:
+        paths: Course content HTML files or directories of HTML files.
+        fixtures: Whether to include the test_resources FIXTURES.
+    Returns:
+        HTML of each corpus by name.
+    """
+    corpora = (
+        {name: read_text(test_resources, name) for name in FIXTURES} if fixtures else {}
+    )
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.html")) if path.is_dir() else [path]
+        corpora.update({f.name: f.read_text() for f in files})
+    return corpora
+
+
+def run_benchmarks(corpora: dict[str, str], repeat: int = 5) -> list[BenchResult]:
+    """Benchmark each pipeline stage on each of the given corpora."""
+    return [
+        result
+        for name, html in corpora.items()
+        for result in bench_corpus(name, html, repeat)
+    ]
+
+
+def write_baseline(results: list[BenchResult], path: Union[str, PathLike]):
+    """Write the given results as the baseline JSON at the given path."""
+    with open(path, "w") as f:
+        json.dump({r.name: r.to_json() for r in results}, f, indent=2)
+
+
+def read_baseline(path: Union[str, PathLike]) -> dict[str, dict[str, Any]]:
+    """Read the baseline JSON written by write_baseline(), by benchmark name."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    results: list[BenchResult],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[Regression]:
+    """Compare the given results against their baseline.
+
+    Args:
+        results: Results of the current benchmark run.
+        baseline: Baseline results by benchmark name. Benchmarks without
+            a baseline are not compared.
+        threshold: Fraction a benchmark's time or peak memory may grow by
+            over its baseline before it is considered a regression.
+    Returns:
+        Regressions in time or peak memory beyond the threshold.
+    """
+    regressions = []
+    for result in results:
+        if result.name not in baseline:
+            continue
+        for metric in ["seconds", "peak_bytes"]:
+            before, after = baseline[result.name][metric], getattr(result, metric)
+            if after > before * (1 + threshold):
+                regressions.append(Regression(result.name, metric, before, after))
+    return regressions
+
+
+def report(results: list[BenchResult]) -> str:
+    """Render the given results as a table."""
+    lines = [
+        f"{'benchmark':<48} {'seconds':>10} {'tokens/s':>12} {'modules/s':>10}"
+        f" {'peak KiB':>10}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.name:<48} {r.seconds:>10.5f} {r.tokens_per_s:>12.0f}"
+            f" {r.modules_per_s:>10.0f} {r.peak_bytes / 1024:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the scraping pipeline against a baseline."
+    )
+    arg_parser.add_argument(
+        "corpus",
+        nargs="*",
+        help="Extra course content HTML files or directories to benchmark on.",
+    )
+    arg_parser.add_argument(
+        "--no-fixtures",
+        action="store_true",
+        help="Only benchmark the given corpus, skipping the test_resources fixtures.",
+    )
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    arg_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fraction of slow down over the baseline considered a regression.",
+    )
+    arg_parser.add_argument(
+        "--update", action="store_true", help="Overwrite the baseline with results."
+    )
+    args = arg_parser.parse_args(argv)
+    if args.no_fixtures and not args.corpus:
+        arg_parser.error("--no-fixtures requires a corpus to benchmark on.")
+
+    results = run_benchmarks(
+        load_corpora(args.corpus, fixtures=not args.no_fixtures), args.repeat
+    )
+    print(report(results))
+    if args.update or not Path(args.baseline).exists():
+        write_baseline(results, args.baseline)
+        print(f"Wrote baseline to {args.baseline}.")
+        return 0
+    regressions = compare(results, read_baseline(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#
+# Modscrape
+# NTU module scraper, parser & catalog tooling
+#
+# Public names are imported lazily on first access, so importing the
+# package (eg. for lex & parse) does not pay for the network & HTML
+# dependencies of the scraper.
+#
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .lexer import lex
+    from .module import Course, Module, ModuleCode, read_catalog, write_catalog
+    from .parser import ParseException, Parser, parse
+    from .scrape import extract_lines, get_course_content, scrape_course, scrape_modules
+    from .tok import Token, TokenType
+
+# submodule defining each public name
+_EXPORTS = {
+    "lex": "lexer",
+    "Course": "module",
+    "Module": "module",
+    "ModuleCode": "module",
+    "read_catalog": "module",
+    "write_catalog": "module",
+    "ParseException": "parser",
+    "Parser": "parser",
+    "parse": "parser",
+    "extract_lines": "scrape",
+    "get_course_content": "scrape",
+    "scrape_course": "scrape",
+    "scrape_modules": "scrape",
+    "Token": "tok",
+    "TokenType": "tok",
+}
+
+__all__ = [
+    "Course",
+    "Module",
+    "ModuleCode",
+    "ParseException",
+    "Parser",
+    "Token",
+    "TokenType",
+    "extract_lines",
+    "get_course_content",
+    "lex",
+    "parse",
+    "read_catalog",
+    "scrape_course",
+    "scrape_modules",
+    "write_catalog",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    # cache on the package so later accesses skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
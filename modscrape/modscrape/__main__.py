@@ -0,0 +1,8 @@
+#
+# Modscrape
+# Run the scraper with 'python -m modscrape'
+#
+
+from .scrape import main
+
+main()
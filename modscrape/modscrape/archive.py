@@ -0,0 +1,375 @@
+#
+# Modscrape
+# Archive
+# Compressed, content addressed archive of fetched course content HTML
+#
+
+import gzip
+import hashlib
+import lzma
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Union
+
+from .module import Module
+from .pipeline import Failure
+
+INDEX_FILE = "index.db"
+# size after which a segment is closed & later pages go to a new segment
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+GZIP = "gzip"
+LZMA = "lzma"
+COMPRESS: dict[str, Callable[[bytes], bytes]] = {
+    GZIP: gzip.compress,
+    LZMA: lzma.compress,
+}
+DECOMPRESS: dict[str, Callable[[bytes], bytes]] = {
+    GZIP: gzip.decompress,
+    LZMA: lzma.decompress,
+}
+SUFFIXES = {GZIP: "gz", LZMA: "xz"}
+
+SCHEMA = """
+-- each distinct page, stored once as a compressed member of a segment file
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    codec TEXT NOT NULL
+) WITHOUT ROWID;
+-- each fetch of a course listing & the digest of the page fetched
+CREATE TABLE IF NOT EXISTS fetches (
+    semester TEXT NOT NULL,
+    course TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (semester, course, fetched_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS fetches_digest ON fetches (digest);
+"""
+
+INSERT_BLOB = "INSERT INTO blobs VALUES (?, ?, ?, ?, ?)"
+INSERT_FETCH = "INSERT OR REPLACE INTO fetches VALUES (?, ?, ?, ?)"
+SELECT_BLOB = "SELECT segment, offset, length, codec FROM blobs WHERE digest = ?"
+SELECT_LAST_SEGMENT = "SELECT segment FROM blobs ORDER BY segment DESC LIMIT 1"
+SELECT_FETCHES = """
+SELECT f.semester, f.course, f.fetched_at, f.digest, b.segment, b.offset, b.length,
+    b.codec
+FROM fetches f JOIN blobs b ON f.digest = b.digest
+WHERE (:semester IS NULL OR f.semester = :semester)
+    AND (:course IS NULL OR f.course = :course)
+    AND (NOT :latest OR f.fetched_at = (
+        SELECT MAX(fetched_at) FROM fetches
+        WHERE semester = f.semester AND course = f.course
+    ))
+"""
+
+
+@dataclass(frozen=True)
+class Fetch:
+    """Fetch of a course listing recorded in the archive."""
+
+    semester: str
+    course: str
+    # unix time the page was fetched
+    fetched_at: float
+    # sha256 hex digest of the page's HTML
+    digest: str
+
+
+class HtmlArchive:
+    """Archive of fetched course content HTML, addressed by content hash.
+
+    Each distinct page is compressed (gzip or lzma) & appended once to large
+    segment files, while a SQLite index maps each (semester, course, fetch time)
+    to the page's digest & the digest to its offset within a segment.
+    Pages are compressed individually, so any page can be read with a single
+    seek & every page of the archive can be streamed sequentially.
+    Pages are fsync-ed to their segment before being indexed, so a crash can
+    only leave unindexed bytes at the end of a segment.
+    Use as a context manager to close the archive when done.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, PathLike],
+        codec: str = GZIP,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+    ):
+        """Open the archive in the given directory.
+
+        Args:
+            directory: Directory holding the archive, created if it does not exist.
+            codec: Compression of pages added to the archive: GZIP or LZMA.
+                Pages already archived keep the codec they were added with.
+            segment_size: Size in bytes after which a new segment is started.
+        """
+        if codec not in COMPRESS:
+            raise ValueError(
+                f"Unknown codec {codec}, expected one of {list(COMPRESS)}."
+            )
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.codec = codec
+        self.segment_size = segment_size
+        # pages are archived from fetch worker threads
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.directory / INDEX_FILE, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+        # continue appending to the last segment written
+        row = self.db.execute(SELECT_LAST_SEGMENT).fetchone()
+        self.segment = self._segment_name(0) if row is None else row[0]
+
+    def __enter__(self) -> "HtmlArchive":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _segment_name(self, number: int) -> str:
+        return f"segment_{number:06d}.{SUFFIXES[self.codec]}"
+
+    def _next_segment(self) -> str:
+        path = self.directory / self.segment
+        if path.suffix[1:] == SUFFIXES[self.codec] and (
+            not path.exists() or path.stat().st_size < self.segment_size
+        ):
+            return self.segment
+        number = int(self.segment.split("_")[1].split(".")[0]) + 1
+        while (self.directory / self._segment_name(number)).exists():
+            number += 1
+        return self._segment_name(number)
+
+    def put(
+        self, semester: str, course: str, html: str, fetched_at: Optional[float] = None
+    ) -> str:
+        """Archive the page fetched for the given semester & course.
+
+        Args:
+            semester: Academic semester the page was fetched for eg. "2023_1".
+            course: Course the page was fetched for eg. "CSC;;1;F".
+            html: Course content HTML fetched.
+            fetched_at: Unix time the page was fetched, defaults to now.
+        Returns:
+            Digest the page is archived under.
+        """
+        data = html.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.lock:
+            archived = self.db.execute(SELECT_BLOB, (digest,)).fetchone() is not None
+        # compress outside the lock, so concurrent fetches compress in parallel
+        compressed = None if archived else COMPRESS[self.codec](data)
+        with self.lock:
+            # page may have been archived by another fetch while compressing
+            if (
+                compressed is not None
+                and self.db.execute(SELECT_BLOB, (digest,)).fetchone() is None
+            ):
+                self.segment = self._next_segment()
+                with open(self.directory / self.segment, "ab") as f:
+                    offset = f.tell()
+                    f.write(compressed)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self.db:
+                    self.db.execute(
+                        INSERT_BLOB,
+                        (digest, self.segment, offset, len(compressed), self.codec),
+                    )
+            with self.db:
+                self.db.execute(INSERT_FETCH, (semester, course, fetched_at, digest))
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Get the archived page with the given digest.
+
+        Raises:
+            KeyError: If no page with the given digest is archived.
+        """
+        with self.lock:
+            row = self.db.execute(SELECT_BLOB, (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        segment, offset, length, codec = row
+        with open(self.directory / segment, "rb") as f:
+            f.seek(offset)
+            return DECOMPRESS[codec](f.read(length)).decode()
+
+    def fetches(
+        self,
+        semester: Optional[str] = None,
+        course: Optional[str] = None,
+        latest: bool = False,
+    ) -> list[Fetch]:
+        """List archived fetches in fetch order.
+
+        Args:
+            semester: Only list fetches of the given semester.
+            course: Only list fetches of the given course.
+            latest: Only list the latest fetch of each course listing.
+        """
+        rows = self._select(semester, course, latest)
+        return sorted((fetch for fetch, *_ in rows), key=lambda f: f.fetched_at)
+
+    def pages(
+        self,
+        semester: Optional[str] = None,
+        course: Optional[str] = None,
+        latest: bool = False,
+    ) -> Iterator[tuple[Fetch, str]]:
+        """Stream archived fetches & their pages, in the order stored on disk.
+
+        Each segment is read sequentially & each distinct page is decompressed
+        once, however many times it was fetched. Filtered like fetches().
+
+        Yields:
+            Each matching fetch together with the HTML of its page.
+        """
+        rows = sorted(self._select(semester, course, latest), key=lambda row: row[1:3])
+        html, digest = "", None
+        f = None
+        try:
+            for fetch, segment, offset, length, codec in rows:
+                if fetch.digest != digest:
+                    if f is None or f.name != str(self.directory / segment):
+                        if f is not None:
+                            f.close()
+                        f = open(self.directory / segment, "rb")
+                    f.seek(offset)
+                    html = DECOMPRESS[codec](f.read(length)).decode()
+                    digest = fetch.digest
+                yield fetch, html
+        finally:
+            if f is not None:
+                f.close()
+
+    def _select(
+        self, semester: Optional[str], course: Optional[str], latest: bool
+    ) -> list[tuple[Fetch, str, int, int, str]]:
+        with self.lock:
+            rows = self.db.execute(
+                SELECT_FETCHES,
+                {"semester": semester, "course": course, "latest": latest},
+            ).fetchall()
+        return [
+            (Fetch(s, c, fetched_at, digest), segment, offset, length, codec)
+            for s, c, fetched_at, digest, segment, offset, length, codec in rows
+        ]
+
+    def archiver(self, fetch: Callable[[str, str], str]) -> Callable[[str, str], str]:
+        """Wrap the given fetch to archive every page it fetches."""
+
+        def archived_fetch(semester: str, course: str) -> str:
+            html = fetch(semester, course)
+            self.put(semester, course, html)
+            return html
+
+        return archived_fetch
+
+
+def reprocess(
+    archive: HtmlArchive,
+    sink: Callable[[Fetch, list[Module]], None],
+    semester: Optional[str] = None,
+    course: Optional[str] = None,
+    latest: bool = False,
+) -> list[Failure[Fetch]]:
+    """Scrape modules from archived pages without touching the network.
+
+    Pages are streamed from disk & each distinct page is scraped once, its
+    modules passed to the sink for every fetch of the page.
+
+    Args:
+        archive: Archive to reprocess pages from.
+        sink: Called with each fetch & the modules scraped from its page.
+        semester: Only reprocess fetches of the given semester.
+        course: Only reprocess fetches of the given course.
+        latest: Only reprocess the latest fetch of each course listing.
+    Returns:
+        Failures of fetches whose pages could not be scraped.
+    """
+    from .scrape import scrape_modules
+
+    failures: list[Failure[Fetch]] = []
+    digest: Optional[str] = None
+    modules: list[Module] = []
+    error: Optional[Exception] = None
+    for fetch, html in archive.pages(semester, course, latest):
+        if fetch.digest != digest:
+            digest, modules, error = fetch.digest, [], None
+            try:
+                modules = scrape_modules(html)
+            except Exception as e:
+                error = e
+        if error is not None:
+            failures.append(Failure(fetch, "scrape", error))
+            continue
+        sink(fetch, modules)
+    return failures
+
+
+def main(argv: Optional[list[str]] = None):
+    """Reprocess archived pages, writing scraped modules to a CatalogStore."""
+    import argparse
+
+    from .store import CatalogStore
+
+    arg_parser = argparse.ArgumentParser(
+        description="Scrape modules from archived course content pages offline."
+    )
+    arg_parser.add_argument("archive", help="Directory of the archive to reprocess.")
+    arg_parser.add_argument(
+        "--db", help="Path to the SQLite database to write modules to."
+    )
+    arg_parser.add_argument("--semester", help="Only reprocess the given semester.")
+    arg_parser.add_argument("--course", help="Only reprocess the given course.")
+    arg_parser.add_argument(
+        "--latest",
+        action="store_true",
+        help="Only reprocess the latest fetch of each listing, not its history.",
+    )
+    args = arg_parser.parse_args(argv)
+    if not (Path(args.archive) / INDEX_FILE).exists():
+        arg_parser.error(f"{args.archive} holds no archive.")
+
+    n_fetches, n_modules = 0, 0
+    with HtmlArchive(args.archive) as archive, CatalogStore(
+        args.db or ":memory:"
+    ) as store:
+        latest = {
+            (f.semester, f.course): f.fetched_at
+            for f in archive.fetches(args.semester, args.course, latest=True)
+        }
+
+        def sink(fetch: Fetch, modules: list[Module]):
+            nonlocal n_fetches, n_modules
+            n_fetches += 1
+            n_modules += len(modules)
+            # the store holds the modules of the latest fetch of each listing
+            if latest[(fetch.semester, fetch.course)] == fetch.fetched_at:
+                store.upsert(fetch.semester, fetch.course, modules, fetch.fetched_at)
+
+        failures = reprocess(archive, sink, args.semester, args.course, args.latest)
+    for failure in failures:
+        fetch = failure.key
+        print(
+            f"Failed {fetch.semester} {fetch.course} fetched at {fetch.fetched_at}:"
+            f" {failure.error!r}"
+        )
+    print(f"Reprocessed {n_modules} modules from {n_fetches} fetches.")
+
+
+if __name__ == "__main__":
+    main()
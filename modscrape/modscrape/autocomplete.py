@@ -0,0 +1,116 @@
+#
+# Modscrape
+# Autocomplete
+# Sorted array prefix index over module codes & title words
+#
+
+from os import PathLike
+from typing import Callable, Union
+
+import numpy as np
+
+from .fulltext import tokenize
+from .module import Module
+
+
+def by_code(module: Module) -> float:
+    """Default autocomplete score: rank all modules equally, ordering ties by code."""
+    return 0.0
+
+
+class PrefixIndex:
+    """Prefix index for autocompleting module codes & title words.
+
+    Module codes & title words are lowercased into keys and kept in a single
+    sorted array, so all keys starting with a prefix form a contiguous range
+    found by two binary searches.
+    """
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        doc_ids: np.ndarray,
+        codes: np.ndarray,
+        titles: np.ndarray,
+        scores: np.ndarray,
+    ):
+        # sorted keys & the id of the module (document) each key belongs to
+        self.keys = keys
+        self.doc_ids = doc_ids
+        # module code, title & score of each document
+        self.codes = codes
+        self.titles = titles
+        self.scores = scores
+
+    @classmethod
+    def build(
+        cls, modules: list[Module], score: Callable[[Module], float] = by_code
+    ) -> "PrefixIndex":
+        """Build the prefix index over the given modules eg. the output of parse().
+
+        Args:
+            modules: Modules to autocomplete.
+            score: Scores each module, with higher scoring modules
+                ranked first in autocomplete results.
+        Returns:
+            Prefix index over the given modules.
+        """
+        entries = sorted(
+            {
+                (key, doc_id)
+                for doc_id, module in enumerate(modules)
+                for key in [module.code.code.lower()] + tokenize(module.title)
+            }
+        )
+        return cls(
+            keys=np.array([key for key, _ in entries], dtype=str),
+            doc_ids=np.array([doc_id for _, doc_id in entries], dtype=np.uint32),
+            codes=np.array([m.code.code for m in modules], dtype=str),
+            titles=np.array([m.title for m in modules], dtype=str),
+            scores=np.array([score(m) for m in modules], dtype=np.float64),
+        )
+
+    def _matches(self, prefix: str) -> np.ndarray:
+        """Find ids of modules with a key starting with the given lowercase prefix."""
+        begin, end = np.searchsorted(self.keys, [prefix, prefix + "\uffff"])
+        return np.unique(self.doc_ids[begin:end])
+
+    def complete(self, query: str, k: int = 10) -> list[tuple[str, str]]:
+        """Autocomplete modules matching the given query.
+
+        Each word in the query has to prefix the module's code or a word in
+        its title eg. "sc20" or "algo des" matches "SC2001 Algorithm Design".
+
+        Args:
+            query: Partially typed query to autocomplete.
+            k: Maximum no. of results to return.
+        Returns:
+            Up to k (module code, title) of matching modules, ranked by
+            descending score & ascending module code.
+        """
+        prefixes = tokenize(query)
+        if len(prefixes) == 0:
+            return []
+        matches = self._matches(prefixes[0])
+        for prefix in prefixes[1:]:
+            matches = np.intersect1d(matches, self._matches(prefix), assume_unique=True)
+        matches = matches[np.lexsort((self.codes[matches], -self.scores[matches]))]
+        matches = matches[:k]
+        return [(str(self.codes[i]), str(self.titles[i])) for i in matches]
+
+    def save(self, path: Union[str, PathLike]):
+        """Save the prefix index to the given .npz path."""
+        np.savez(
+            path,
+            keys=self.keys,
+            doc_ids=self.doc_ids,
+            codes=self.codes,
+            titles=self.titles,
+            scores=self.scores,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, PathLike]) -> "PrefixIndex":
+        """Load a prefix index saved with save() from the given .npz path."""
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
@@ -0,0 +1,179 @@
+#
+# Modscrape
+# Clashes
+# Sparse pairwise clash matrix of module indexes from occupancy bitmaps
+#
+
+import json
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from .occupancy import WORD, OccupancyTable
+
+CLASHES_JSON = "clashes.json"
+CLASHES_BIN = "clashes.bin"
+# row indices & offsets are stored as little endian 32 bit integers
+INDEX = np.dtype("<i4")
+# bytes of bitmap words ANDed at once when computing clashes
+MEMORY_BUDGET = 64 * 1024 * 1024
+
+
+@dataclass
+class ClashMatrix:
+    """Symmetric sparse (indexes, indexes) matrix of clashing module indexes.
+
+    Stored in compressed sparse row form over the rows of an OccupancyTable:
+    row i clashes with rows indices[indptr[i]:indptr[i + 1]], sorted ascending.
+    Indexes of the same module never clash, as they are alternatives that
+    are never taken together.
+    """
+
+    # (rows + 1,) offsets into indices of each row's clashing rows
+    indptr: np.ndarray
+    # (clashes,) clashing rows of each row, concatenated
+    indices: np.ndarray
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def clashing(self, row: int) -> np.ndarray:
+        """Rows clashing with the given row."""
+        return self.indices[self.indptr[row] : self.indptr[row + 1]]
+
+    def clashes(self, row: int, other: int) -> bool:
+        """Whether the given rows clash."""
+        clashing = self.clashing(row)
+        at = np.searchsorted(clashing, other)
+        return bool(at < len(clashing) and clashing[at] == other)
+
+    def dense(self) -> np.ndarray:
+        """(rows, rows) boolean matrix for O(1) clash lookups.
+
+        Allocates rows * rows bytes eg. 400MB for 20k indexes.
+        """
+        dense = np.zeros((self.n_rows, self.n_rows), dtype=bool)
+        rows = np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+        dense[rows, self.indices] = True
+        return dense
+
+
+def clash_matrix(
+    table: OccupancyTable,
+    chunk_size: Optional[int] = None,
+    memory_budget: int = MEMORY_BUDGET,
+) -> ClashMatrix:
+    """Compute which pairs of indexes in the given table clash.
+
+    Bitmaps of a chunk of rows are ANDed against the bitmaps of every row at
+    once, so each pair costs a few vectorized word operations rather than an
+    interval overlap test per pair of classes.
+
+    Args:
+        table: Occupancy table of the indexes to compute clashes between.
+        chunk_size: No. of rows to compare at once, taking
+            chunk_size * rows * grid.words words of memory. Defaults to the
+            most rows fitting in the memory budget.
+        memory_budget: Bytes of words to compare at once if no chunk size
+            is given.
+    Returns:
+        Sparse clash matrix over the rows of the table.
+    """
+    if chunk_size is None:
+        row_bytes = len(table.bitmaps) * table.grid.words * WORD.itemsize
+        chunk_size = max(1, memory_budget // max(row_bytes, 1))
+    if chunk_size <= 0:
+        raise ValueError("Expected chunk size to be positive.")
+    bitmaps = table.bitmaps
+    _, module_ids = np.unique(np.array(table.modules), return_inverse=True)
+    counts, indices = [], []
+    for begin in range(0, len(bitmaps), chunk_size):
+        chunk = slice(begin, begin + chunk_size)
+        clashes = (bitmaps[chunk, np.newaxis, :] & bitmaps[np.newaxis, :, :]).any(
+            axis=2
+        )
+        clashes &= module_ids[chunk, np.newaxis] != module_ids[np.newaxis, :]
+        counts.append(clashes.sum(axis=1))
+        # nonzero() scans row major, so clashing rows come out sorted per row
+        indices.append(np.nonzero(clashes)[1])
+    indptr = np.zeros(len(bitmaps) + 1, dtype=INDEX)
+    if counts:
+        np.cumsum(np.concatenate(counts), out=indptr[1:])
+    return ClashMatrix(
+        indptr, np.concatenate(indices).astype(INDEX) if indices else indptr[:0]
+    )
+
+
+def write_clashes(matrix: ClashMatrix, directory: Union[str, PathLike]):
+    """Write the given clash matrix as CLASHES_JSON metadata & CLASHES_BIN arrays.
+
+    CLASHES_BIN holds indptr followed by indices as raw INDEX integers, so it
+    can be loaded without parsing (eg. as an Int32Array). Rows are the rows
+    of the occupancy table written alongside (see occupancy.write_table()).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / CLASHES_JSON, "w") as f:
+        json.dump({"rows": matrix.n_rows, "clashes": len(matrix.indices)}, f)
+    np.concatenate([matrix.indptr, matrix.indices]).astype(INDEX).tofile(
+        directory / CLASHES_BIN
+    )
+
+
+def read_clashes(directory: Union[str, PathLike]) -> ClashMatrix:
+    """Read a clash matrix written by write_clashes() from the given directory."""
+    directory = Path(directory)
+    with open(directory / CLASHES_JSON) as f:
+        meta = json.load(f)
+    arrays = np.fromfile(directory / CLASHES_BIN, dtype=INDEX)
+    return ClashMatrix(arrays[: meta["rows"] + 1], arrays[meta["rows"] + 1 :])
+
+
+def main(argv: Optional[list[str]] = None):
+    """Precompute the clash matrix of modschedule's class schedules."""
+    import argparse
+
+    from .occupancy import Grid, ingest, read_schedules, write_table
+
+    arg_parser = argparse.ArgumentParser(
+        description="Precompute which module indexes have clashing classes."
+    )
+    arg_parser.add_argument(
+        "resources", help="Directory of modschedule's module class schedule JSON."
+    )
+    arg_parser.add_argument(
+        "--out",
+        help="Directory to write the occupancy table & clash matrix to. "
+        "Defaults to resources.",
+    )
+    arg_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="No. of rows to compare at once. Defaults to fit --memory-mb.",
+    )
+    arg_parser.add_argument(
+        "--memory-mb",
+        type=int,
+        default=MEMORY_BUDGET // (1024 * 1024),
+        help="Megabytes of bitmaps to compare at once.",
+    )
+    args = arg_parser.parse_args(argv)
+
+    table = ingest(read_schedules(args.resources), Grid())
+    matrix = clash_matrix(table, args.chunk_size, args.memory_mb * 1024 * 1024)
+    out = Path(args.out or args.resources)
+    write_table(table, out)
+    write_clashes(matrix, out)
+    # symmetric: each clashing pair is stored in the rows of both indexes
+    print(
+        f"Wrote {len(matrix.indices) // 2} clashing pairs of {matrix.n_rows}"
+        f" indexes to {out}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+#
+# Modscrape
+# Corpus
+# Synthetic NTU course content pages for scale testing the scraper
+#
+
+import argparse
+import random
+from html import escape
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union
+
+from .module import Course, Module, ModuleCode
+
+CORE = "core"
+MINOR = "minor"
+
+COURSES = [
+    "ACC",
+    "ADM",
+    "BCE",
+    "BIE",
+    "BUS",
+    "CBE",
+    "CE",
+    "CHEM",
+    "CSC",
+    "DSAI",
+    "ECON",
+    "EEE",
+    "ENE",
+    "ENG",
+    "HIST",
+    "IEM",
+    "MAT",
+    "MATH",
+    "ME",
+    "PHY",
+    "PSY",
+    "SOC",
+]
+TITLE_WORDS = [
+    "ADVANCED",
+    "ALGORITHMS",
+    "ANALYSIS",
+    "APPLIED",
+    "ART",
+    "CULTURE",
+    "DATA",
+    "DESIGN",
+    "DIGITAL",
+    "ENGINEERING",
+    "FOUNDATIONS",
+    "HISTORY",
+    "INTRODUCTION",
+    "MATHEMATICS",
+    "METHODS",
+    "MODERN",
+    "PRINCIPLES",
+    "SOCIETY",
+    "STUDIES",
+    "SYSTEMS",
+    "THEORY",
+]
+DESCRIPTION_WORDS = [
+    "you",
+    "will",
+    "learn",
+    "the",
+    "course",
+    "aims",
+    "to",
+    "develop",
+    "an",
+    "understanding",
+    "of",
+    "concepts",
+    "methods",
+    "and",
+    "practical",
+    "applications",
+    "in",
+    "topics",
+    "covered",
+    "include",
+    "critical",
+    "analysis",
+    "design",
+    "through",
+    "case",
+    "studies",
+    "projects",
+    "with",
+    "emphasis",
+    "on",
+    "modern",
+    "research",
+]
+AUS = [1.0, 2.0, 3.0, 3.0, 3.0, 4.0]
+PAGE_FOOTER = "</CENTER>\n</BODY>\n</HTML>\n"
+
+
+def make_course(rng: random.Random) -> Course:
+    """Generate a course a module may not be available to eg. EEE(2018-onwards)."""
+    course = Course(rng.choice(COURSES), None, None, None, None)
+    if rng.random() < 0.2:
+        course.alt_course = rng.choice(COURSES)
+    if rng.random() < 0.25:
+        course.from_year = rng.randint(2011, 2023)
+        course.to_year = rng.choice([None, 9999, course.from_year + rng.randint(1, 8)])
+    if rng.random() < 0.1:
+        course.is_direct_entry = rng.random() < 0.5
+    return course
+
+
+def make_admyr(rng: random.Random) -> Course:
+    """Generate an admission year range eg. (Admyr 2011-2019)."""
+    from_year = rng.randint(2011, 2023)
+    to_year = rng.choice([9999, from_year + rng.randint(1, 8)])
+    return Course("Admyr", None, from_year, to_year, None)
+
+
+def make_description(rng: random.Random) -> str:
+    sentences = [
+        " ".join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(10, 25))).capitalize()
+        for _ in range(rng.randint(3, 8))
+    ]
+    return ". ".join(sentences) + "."
+
+
+def generate_modules(n: int, seed: int = 0) -> list[Module]:
+    """Generate n modules with realistic requirements & restrictions.
+
+    Modules are given prerequisite OR/AND chains of lower level modules,
+    mutually exclusive lists, programme & admission year restrictions and
+    long descriptions at rates similar to real course content pages.
+
+    Args:
+        n: No. of modules to generate, up to 676 * 9000.
+        seed: Seed of the random generator, the same seed generates the same modules.
+    Returns:
+        Generated modules, sorted by module code.
+    """
+    rng = random.Random(seed)
+    # module codes are 2 letter prefixes followed by a 4 digit number 1000-9999
+    codes = sorted(
+        f"{chr(65 + i // 9000 // 26)}{chr(65 + i // 9000 % 26)}{1000 + i % 9000}"
+        for i in rng.sample(range(26 * 26 * 9000), n)
+    )
+
+    modules = []
+    for index, code in enumerate(codes):
+        module = Module(
+            code=ModuleCode(code),
+            title=" ".join(rng.choices(TITLE_WORDS, k=rng.randint(2, 6))),
+            au=rng.choice(AUS),
+            mutually_exclusives=[],
+            needs_year=None,
+            needs_modules=[],
+            needs_exclusives="",
+            rejects_modules=[],
+            rejects_courses=[],
+            rejects_courses_with=[],
+            unavailable_as_pe=[],
+            allowed_courses=[],
+            not_offered_as_bde=rng.random() < 0.05,
+            not_offered_as_ue=rng.random() < 0.05,
+            is_pass_fail=rng.random() < 0.05,
+            description=make_description(rng),
+        )
+        if rng.random() < 0.05:
+            module.title += " & " + rng.choice(TITLE_WORDS)
+        # prerequisites are drawn from modules earlier in code order
+        if index > 0 and rng.random() < 0.4:
+            module.needs_modules = [
+                [
+                    ModuleCode(codes[rng.randrange(index)], rng.random() < 0.1)
+                    for _ in range(rng.choice([1, 1, 1, 2, 3]))
+                ]
+                for _ in range(rng.choice([1, 1, 2, 3, 4]))
+            ]
+        elif rng.random() < 0.05:
+            module.needs_year = rng.randint(2, 4)
+        if rng.random() < 0.6:
+            # sample one extra code in case the module's own code is drawn
+            k = rng.randint(1, 8)
+            module.mutually_exclusives = [
+                ModuleCode(c) for c in rng.sample(codes, min(n, k + 1)) if c != code
+            ][:k]
+        if rng.random() < 0.5:
+            module.rejects_courses = [
+                make_course(rng) for _ in range(rng.randint(1, 30))
+            ]
+        if rng.random() < 0.4:
+            module.rejects_courses_with = [
+                make_admyr(rng) for _ in range(rng.randint(1, 2))
+            ]
+        if rng.random() < 0.05:
+            module.unavailable_as_pe = [
+                make_course(rng) for _ in range(rng.randint(1, 5))
+            ]
+        modules.append(module)
+    return modules
+
+
+def course_text(course: Course) -> str:
+    """Render the given course as it appears on course content pages."""
+    text = course.course
+    if course.alt_course is not None:
+        text += f"({course.alt_course})"
+    if course.from_year is not None:
+        if course.to_year is None:
+            text += f"({course.from_year})"
+        else:
+            to_year = "onwards" if course.to_year == 9999 else course.to_year
+            text += f"({course.from_year}-{to_year})"
+    if course.is_direct_entry is not None:
+        text += "(Direct Entry)" if course.is_direct_entry else "(Non Direct Entry)"
+    return text
+
+
+def admyr_text(course: Course) -> str:
+    to_year = "onwards" if course.to_year == 9999 else course.to_year
+    return f"(Admyr {course.from_year}-{to_year})"
+
+
+def code_text(code: ModuleCode) -> str:
+    return code.code + ("(Corequisite)" if code.is_corequisite else "")
+
+
+def requirement_rows(module: Module) -> list[tuple[str, str, str]]:
+    """Render the requirement & restriction rows of the given module.
+
+    Rows are ordered as the parser expects them.
+
+    Returns:
+        Rows as (color, label, value) tuples.
+    """
+    rows = []
+    if module.is_pass_fail:
+        rows.append(("RED", "Grade Type: ", "Pass/Fail"))
+    if module.needs_year is not None:
+        rows.append(("#FF00FF", "Prerequisite:", f"Year {module.needs_year} standing"))
+    # each OR alternative is listed on its own row
+    for i, group in enumerate(module.needs_modules):
+        value = " & ".join([code_text(c) for c in group])
+        if i < len(module.needs_modules) - 1:
+            value += " OR"
+        rows.append(("#FF00FF", "Prerequisite:" if i == 0 else "", value))
+    if module.mutually_exclusives:
+        rows.append(
+            (
+                "BROWN",
+                "Mutually exclusive with: ",
+                ", ".join([code_text(c) for c in module.mutually_exclusives]),
+            )
+        )
+    for label, courses in [
+        ("Not available to Programme: ", module.rejects_courses),
+        ("Not available as PE to Programme: ", module.unavailable_as_pe),
+    ]:
+        if courses:
+            rows.append(("GREEN", label, ", ".join(map(course_text, courses))))
+        if courses is module.rejects_courses and module.rejects_courses_with:
+            rows.append(
+                (
+                    "GREEN",
+                    "Not available to all Programme with: ",
+                    ", ".join(map(admyr_text, module.rejects_courses_with)),
+                )
+            )
+    if module.not_offered_as_bde:
+        rows.append(("GREEN", "Not offered as Broadening and Deepening Elective", ""))
+    if module.not_offered_as_ue:
+        rows.append(("GREEN", "Not offered as Unrestricted Elective", ""))
+    return rows
+
+
+def render_rows(module: Module, columns: int) -> list[str]:
+    """Render the rows of the given module, without its heading row."""
+    html = []
+    for color, label, value in requirement_rows(module):
+        html += [
+            "<TR>",
+            f"<TD><B><FONT SIZE=2 COLOR={color}>{escape(label)}</FONT></B></TD>",
+            f'<TD COLSPAN="2"><B><FONT SIZE=2 COLOR={color}>{escape(value)}'
+            "</FONT></B></TD>",
+            "</TR>",
+        ]
+    html += [
+        "<TR>",
+        f'<TD WIDTH="650" colspan="{columns}"><FONT SIZE=2>',
+        escape(module.description),
+        "</FONT></TD>",
+        "</TR>",
+    ]
+    return html
+
+
+def render_core_page(modules: list[Module], heading: str = "") -> str:
+    """Render a page listing each module in its own table, like core module pages.
+
+    Raises:
+        ValueError: If less than 2 modules are given, as a page with a single
+            table is scraped as a single table page.
+    """
+    if len(modules) < 2:
+        raise ValueError("Expected at least 2 modules to render as a core page.")
+    html = [page_header(heading)]
+    for module in modules:
+        html += [
+            "&nbsp;",
+            "<TABLE >",
+            "<TR>",
+            f'<TD WIDTH="100"><B><FONT SIZE=2 COLOR=#0000FF>{module.code.code}'
+            "</FONT></B></TD>",
+            f'<TD WIDTH="500"><B><FONT SIZE=2 COLOR=#0000FF>{escape(module.title)}'
+            "</FONT></B></TD>",
+            f'<TD WIDTH="50"><B><FONT  SIZE=2 COLOR=#0000FF>   {module.au:.1f} AU'
+            "</FONT></B></TD>",
+            "</TR>",
+        ]
+        html += render_rows(module, columns=3)
+        html.append("</TABLE>")
+    html.append(PAGE_FOOTER)
+    return "\n".join(html)
+
+
+def render_minor_page(modules: list[Module], heading: str = "") -> str:
+    """Render a page listing all modules in a single table, like minor & BDE pages."""
+    html = [
+        page_header(heading),
+        "<TABLE >",
+        "<TR>",
+        '<TD WIDTH="100"><FONT SIZE=2><B>COURSE CODE</B></FONT></TD>',
+        '<TD WIDTH="400"><FONT SIZE=2><B>TITLE</B></FONT></TD>',
+        '<TD WIDTH="100"><FONT SIZE=2><B>AU</B></FONT></TD>',
+        '<TD WIDTH="100"><FONT SIZE=2><B>PROGRAMME/(DEPT MAINTAIN*)</B></FONT></TD>',
+        "</TR>",
+    ]
+    for module in modules:
+        html += [
+            "<TR>",
+            f'<TD WIDTH="100"><B><FONT SIZE=2 COLOR=#0000FF>{module.code.code}'
+            "</FONT></B></TD>",
+            f'<TD WIDTH="400"><B><FONT SIZE=2 COLOR=#0000FF>{escape(module.title)}'
+            "</FONT></B></TD>",
+            f'<TD WIDTH="100"><B><FONT SIZE=2 COLOR=#0000FF> {module.au:.1f}'
+            "</FONT></B></TD>",
+            '<TD WIDTH="100"><B><FONT SIZE=2 COLOR=#0000FF>SYN</FONT></B></TD>',
+            "</TR>",
+        ]
+        html += render_rows(module, columns=4)
+        # rows with a non-breaking space delimit modules
+        html += ["<TR>", "<TD>&nbsp;</TD>", "</TR>"]
+    html += ["</TABLE>", PAGE_FOOTER]
+    return "\n".join(html)
+
+
+def page_header(heading: str) -> str:
+    return (
+        '<HTML>\n<HEAD>\n<TITLE></TITLE>\n</HEAD>\n<BODY BGCOLOR="lightyellow">\n'
+        f"<CENTER><B><FONT SIZE=2 COLOR=black>{escape(heading)}</FONT></B>"
+    )
+
+
+def write_corpus(
+    out_dir: Union[str, PathLike],
+    n_modules: int,
+    n_pages: int = 1,
+    layout: Optional[str] = None,
+    seed: int = 0,
+) -> list[Path]:
+    """Write a synthetic corpus of course content pages to the given directory.
+
+    Args:
+        out_dir: Directory to write pages to, created if it does not exist.
+        n_modules: Total no. of modules to generate across all pages.
+        n_pages: No. of pages to split the modules across.
+        layout: Page layout, either CORE or MINOR, or None to alternate layouts.
+        seed: Seed of the random generator used to generate modules.
+    Returns:
+        Paths of the written pages.
+    Raises:
+        ValueError: If the layout is not supported, or the modules are split
+            across too many pages to give each core page at least 2 modules.
+    """
+    if layout not in [CORE, MINOR, None]:
+        raise ValueError(f"Expected page layout {CORE} or {MINOR}.")
+    if n_pages < 1:
+        raise ValueError("Expected at least 1 page.")
+    layouts = [layout or [CORE, MINOR][page % 2] for page in range(n_pages)]
+    for page, page_layout in enumerate(layouts):
+        # pages are dealt modules round robin
+        if page_layout == CORE and len(range(page, n_modules, n_pages)) < 2:
+            raise ValueError(
+                f"Expected at least 2 modules per core page, got {n_modules}"
+                f" modules across {n_pages} pages."
+            )
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    modules = generate_modules(n_modules, seed)
+    paths = []
+    for page, page_layout in enumerate(layouts):
+        render = render_core_page if page_layout == CORE else render_minor_page
+        html = render(
+            modules[page::n_pages], f"Synthetic {page_layout} page {page + 1}"
+        )
+        path = out_dir / f"synthetic_{page_layout}_{page:04d}.html"
+        path.write_text(html)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Write synthetic course content pages for scale testing."
+    )
+    arg_parser.add_argument("out_dir", help="Directory to write pages to.")
+    arg_parser.add_argument("--modules", type=int, default=10000)
+    arg_parser.add_argument("--pages", type=int, default=1)
+    arg_parser.add_argument("--layout", choices=[CORE, MINOR])
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    for path in write_corpus(
+        args.out_dir, args.modules, args.pages, args.layout, args.seed
+    ):
+        print(path)
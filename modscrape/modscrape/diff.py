@@ -0,0 +1,147 @@
+#
+# Modscrape
+# Diff
+# Semester to semester catalog diff & change feed
+#
+
+import json
+from dataclasses import asdict, dataclass, fields
+from enum import Enum
+from hashlib import blake2b
+from typing import IO, Iterable, Iterator, Optional
+
+from .module import Module
+
+# fields of Module compared when diffing, in declaration order
+MODULE_FIELDS = [f.name for f in fields(Module)]
+
+
+def digest(value: object) -> bytes:
+    """Compute a short, process independent digest of the given value's repr."""
+    return blake2b(repr(value).encode(), digest_size=8).digest()
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Digests of a module's fields, used to detect changes without full comparisons."""
+
+    # digest of the whole module: equal digests mean the module is unchanged
+    module: bytes
+    # digest of each field of the module in MODULE_FIELDS order
+    fields: tuple[bytes, ...]
+
+    @classmethod
+    def of(cls, module: Module) -> "Fingerprint":
+        field_digests = tuple(digest(getattr(module, f)) for f in MODULE_FIELDS)
+        return cls(
+            blake2b(b"".join(field_digests), digest_size=8).digest(), field_digests
+        )
+
+
+def fingerprint(modules: Iterable[Module]) -> dict[str, Fingerprint]:
+    """Fingerprint the given catalog of modules by module code.
+
+    Fingerprints of a previous semester's catalog can be kept & reused
+    for diffing against later catalogs.
+
+    Args:
+        modules: Catalog of modules to fingerprint.
+    Returns:
+        Mapping of module code to the fingerprint of its module.
+    """
+    return {m.code.code: Fingerprint.of(m) for m in modules}
+
+
+class ChangeType(Enum):
+    ADDED = "added"
+    REMOVED = "removed"
+    CHANGED = "changed"
+
+
+@dataclass
+class ModuleChange:
+    """Change to a single module between two catalogs."""
+
+    change: ChangeType
+    code: str
+    # names of the Module fields that changed, empty if added or removed
+    fields: list[str]
+    before: Optional[Module]
+    after: Optional[Module]
+
+    def to_json(self) -> str:
+        """Serialise the change as a single line of JSON."""
+        return json.dumps(
+            {
+                "change": self.change.value,
+                "code": self.code,
+                "fields": self.fields,
+                "before": None if self.before is None else asdict(self.before),
+                "after": None if self.after is None else asdict(self.after),
+            }
+        )
+
+
+def diff_catalogs(
+    before: Iterable[Module],
+    after: Iterable[Module],
+    before_prints: Optional[dict[str, Fingerprint]] = None,
+) -> Iterator[ModuleChange]:
+    """Diff the catalogs of two semesters by module code.
+
+    Modules whose fingerprints match are skipped without comparing fields.
+    Changes are yielded lazily, so they can be streamed to consumers as
+    they are found.
+
+    Args:
+        before: Catalog of the earlier semester.
+        after: Catalog of the later semester.
+        before_prints: Fingerprints of the earlier catalog computed with
+            fingerprint(), if already available.
+    Yields:
+        Changes in the later catalog, ordered by module code.
+    """
+    before_modules = {m.code.code: m for m in before}
+    after_modules = {m.code.code: m for m in after}
+    if before_prints is None:
+        before_prints = fingerprint(before_modules.values())
+    after_prints = fingerprint(after_modules.values())
+
+    for code in sorted(before_modules.keys() | after_modules.keys()):
+        if code not in after_modules:
+            yield ModuleChange(ChangeType.REMOVED, code, [], before_modules[code], None)
+        elif code not in before_modules:
+            yield ModuleChange(ChangeType.ADDED, code, [], None, after_modules[code])
+        elif before_prints[code].module != after_prints[code].module:
+            yield ModuleChange(
+                ChangeType.CHANGED,
+                code,
+                [
+                    name
+                    for name, b, a in zip(
+                        MODULE_FIELDS,
+                        before_prints[code].fields,
+                        after_prints[code].fields,
+                    )
+                    if b != a
+                ],
+                before_modules[code],
+                after_modules[code],
+            )
+
+
+def write_changes(changes: Iterable[ModuleChange], out: IO[str]) -> int:
+    """Stream the given changes to the given output as JSON lines.
+
+    Args:
+        changes: Changes to write eg. from diff_catalogs().
+        out: Text stream to write the changes to, flushed after every change.
+    Returns:
+        No. of changes written.
+    """
+    n_changes = 0
+    for change in changes:
+        out.write(change.to_json() + "\n")
+        out.flush()
+        n_changes += 1
+    return n_changes
@@ -0,0 +1,241 @@
+#
+# Modscrape
+# Discovery
+# Persisted manifest of semester & course options with change detection
+#
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from .pipeline import Job
+from .scrape import COURSE_CONTENT_URL, parse_options
+
+
+@dataclass
+class MainPage:
+    """Response to a (conditional) request for the course content main page."""
+
+    # HTML of the page, None if the server reported the page as not modified
+    html: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class Manifest:
+    """Semester & course options discovered on the course content main page."""
+
+    # option value to option text, semesters listed latest first
+    semesters: dict[str, str]
+    courses: dict[str, str]
+    # sha256 digests of the main page & of each select's options
+    page_digest: str
+    semesters_digest: str
+    courses_digest: str
+    # unix time the options were last checked for changes
+    checked_at: float
+    # HTTP validators of the main page for conditional requests
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @classmethod
+    def from_page(cls, page: MainPage, checked_at: float) -> "Manifest":
+        """Create a manifest by parsing the options of the given main page."""
+        if page.html is None:
+            raise ValueError("Expected main page HTML to create a manifest from.")
+        semesters, courses = parse_options(page.html)
+        return cls(
+            semesters,
+            courses,
+            digest(page.html),
+            digest(json.dumps(semesters)),
+            digest(json.dumps(courses)),
+            checked_at,
+            page.etag,
+            page.last_modified,
+        )
+
+
+@dataclass
+class Changes:
+    """Options added or removed between two manifests."""
+
+    new_semesters: list[str] = field(default_factory=list)
+    removed_semesters: list[str] = field(default_factory=list)
+    new_courses: list[str] = field(default_factory=list)
+    removed_courses: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return any(asdict(self).values())
+
+    def jobs(self, manifest: Manifest) -> list[Job]:
+        """Crawl jobs of the options added, given the manifest after the changes.
+
+        New semesters are crawled for every course, while new courses are
+        crawled for the latest semester.
+        """
+        jobs = [(s, c) for s in self.new_semesters for c in manifest.courses]
+        if manifest.semesters:
+            latest = next(iter(manifest.semesters))
+            jobs += [(latest, c) for c in self.new_courses]
+        return list(dict.fromkeys(jobs))
+
+
+def digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def diff(before: Optional[Manifest], after: Manifest) -> Changes:
+    """Find the options added or removed from the before to the after manifest.
+
+    Options of a select whose digest is unchanged are not compared.
+    All options are new if there is no manifest before.
+    """
+    if before is None:
+        return Changes(list(after.semesters), [], list(after.courses), [])
+    changes = Changes()
+    if before.semesters_digest != after.semesters_digest:
+        changes.new_semesters = [
+            s for s in after.semesters if s not in before.semesters
+        ]
+        changes.removed_semesters = [
+            s for s in before.semesters if s not in after.semesters
+        ]
+    if before.courses_digest != after.courses_digest:
+        changes.new_courses = [c for c in after.courses if c not in before.courses]
+        changes.removed_courses = [c for c in before.courses if c not in after.courses]
+    return changes
+
+
+def crawled_manifest(manifest: Manifest, changes: Changes, jobs: list[Job]) -> Manifest:
+    """Manifest to save once the given jobs were crawled after a refresh.
+
+    New options whose crawl jobs (see Changes.jobs()) were not all crawled
+    are left out, so they are reported as changed again by the next refresh.
+
+    Args:
+        manifest: Manifest refreshed before the crawl.
+        changes: Options changed by the refresh.
+        jobs: Jobs crawled.
+    Returns:
+        The given manifest if every changed job was crawled, otherwise a
+        manifest of the options crawled, without the main page's digest &
+        validators so the next refresh compares options again.
+    """
+    crawled = set(jobs)
+    left = [job for job in changes.jobs(manifest) if job not in crawled]
+    if not left:
+        return manifest
+    semesters = {
+        s: text
+        for s, text in manifest.semesters.items()
+        if not (s in changes.new_semesters and any(s == j[0] for j in left))
+    }
+    courses = {
+        c: text
+        for c, text in manifest.courses.items()
+        if not (c in changes.new_courses and any(c == j[1] for j in left))
+    }
+    return Manifest(
+        semesters,
+        courses,
+        "",
+        digest(json.dumps(semesters)),
+        digest(json.dumps(courses)),
+        manifest.checked_at,
+    )
+
+
+def fetch_main_page(
+    etag: Optional[str] = None, last_modified: Optional[str] = None
+) -> MainPage:
+    """Get the course content main page, conditional on the given validators.
+
+    Args:
+        etag: ETag of the last page fetched, sent as If-None-Match.
+        last_modified: Last-Modified of the last page fetched, sent as
+            If-Modified-Since.
+    Returns:
+        Main page fetched, without HTML if the server reports it unmodified.
+    """
+    import requests
+
+    headers = {}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    if last_modified is not None:
+        headers["If-Modified-Since"] = last_modified
+    with requests.get(f"{COURSE_CONTENT_URL}.main", headers=headers) as response:
+        html = None if response.status_code == 304 else response.content.decode()
+        return MainPage(
+            html,
+            response.headers.get("ETag", etag),
+            response.headers.get("Last-Modified", last_modified),
+        )
+
+
+def read_manifest(path: Union[str, PathLike]) -> Optional[Manifest]:
+    """Read the manifest at the given path, None if there is none."""
+    if not Path(path).exists():
+        return None
+    with open(path) as f:
+        return Manifest(**json.load(f))
+
+
+def write_manifest(path: Union[str, PathLike], manifest: Manifest):
+    """Write the given manifest to the given path, replacing it atomically."""
+    partial = Path(path).with_suffix(".partial")
+    with open(partial, "w") as f:
+        json.dump(asdict(manifest), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+def refresh(
+    path: Union[str, PathLike],
+    fetch: Callable[[Optional[str], Optional[str]], MainPage] = fetch_main_page,
+    save: bool = True,
+) -> tuple[Manifest, Changes]:
+    """Refresh the manifest at the given path with the options now listed.
+
+    The main page is requested conditionally on the validators of the last
+    fetch & only parsed if its content changed, so routine refreshes skip
+    parsing the main page with BeautifulSoup.
+
+    Args:
+        path: Path of the manifest, created if it does not exist.
+        fetch: Fetches the main page given the ETag & Last-Modified validators.
+        save: Whether to write the refreshed manifest to the path. Callers
+            acting on the changes should save it with write_manifest() only
+            once they succeed, so failed runs see the same changes again.
+    Returns:
+        Tuple of the refreshed manifest & the options changed since the last
+        refresh.
+    """
+    before = read_manifest(path)
+    if before is None:
+        page = fetch(None, None)
+    else:
+        page = fetch(before.etag, before.last_modified)
+    now = time.time()
+
+    if before is not None and (
+        page.html is None or digest(page.html) == before.page_digest
+    ):
+        # unchanged: only record when options were last checked
+        after, changes = before, Changes()
+        after.checked_at = now
+        after.etag, after.last_modified = page.etag, page.last_modified
+    else:
+        after = Manifest.from_page(page, now)
+        changes = diff(before, after)
+    if save:
+        write_manifest(path, after)
+    return after, changes
@@ -0,0 +1,292 @@
+#
+# Modscrape
+# Eligibility
+# Vectorized module eligibility checks over a cohort of students
+#
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from .module import Module
+
+# sentinel for an unset alternate course / direct entry flag in compiled restrictions
+NO_ALT_COURSE = ""
+ANY_ENTRY = -1
+
+
+@dataclass
+class Cohort:
+    """Cohort of students to check module eligibility for.
+
+    Each array holds one entry per student, in the same order as the rows
+    of the 'completed' matrix.
+    """
+
+    # module codes labelling the columns of the 'completed' matrix
+    codes: list[str]
+    # (students, codes) boolean matrix: True if the student completed the module
+    completed: np.ndarray
+    # year of study the student is in eg. 2 for a Year 2 student
+    study_years: np.ndarray
+    # course code of the student's programme eg. "ME" for "ME(IMS)"
+    courses: np.ndarray
+    # alternate course of the student's programme eg. "IMS" for "ME(IMS)"
+    # or NO_ALT_COURSE if the programme has none
+    alt_courses: np.ndarray
+    # year the student was admitted into the programme
+    admit_years: np.ndarray
+    # whether the student was admitted via direct entry
+    is_direct_entry: np.ndarray
+
+    def __post_init__(self):
+        n_students = self.completed.shape[0]
+        if self.completed.shape != (n_students, len(self.codes)):
+            raise ValueError(
+                "Expected completed matrix to have one column per module code."
+            )
+        for name in [
+            "study_years",
+            "courses",
+            "alt_courses",
+            "admit_years",
+            "is_direct_entry",
+        ]:
+            if len(getattr(self, name)) != n_students:
+                raise ValueError(f"Expected one {name} entry per student.")
+
+
+@dataclass
+class Prerequisites:
+    """Prerequisite groups of modules compiled against a Cohort's module codes.
+
+    Each group is a set of modules that have to be completed together to
+    satisfy a module's prerequisites (see Module.needs_modules). Groups are
+    stored as rows of column indices into the completion matrix extended
+    with an 'always completed' & 'never completed' column.
+    """
+
+    # (groups, width) column indices of the modules required by each group,
+    # padded with the 'always completed' column.
+    groups: np.ndarray
+    # (modules + 1,) offsets into groups: module i owns groups[offsets[i]:offsets[i+1]]
+    offsets: np.ndarray
+
+
+def _columns(codes: list[str]) -> tuple[dict[str, int], int, int]:
+    """Map module codes to columns of the extended completion matrix.
+
+    Returns:
+        Tuple of mapping of module code to column index, index of the
+        'always completed' column & index of the 'never completed' column.
+    """
+    return {code: i for i, code in enumerate(codes)}, len(codes), len(codes) + 1
+
+
+def _extend(completed: np.ndarray) -> np.ndarray:
+    """Extend the completion matrix with 'always' & 'never' completed columns."""
+    n_students = completed.shape[0]
+    return np.hstack(
+        [
+            completed.astype(bool, copy=False),
+            np.ones((n_students, 1), dtype=bool),
+            np.zeros((n_students, 1), dtype=bool),
+        ]
+    )
+
+
+def _pad(rows: list[list[int]], pad: int) -> np.ndarray:
+    """Pack ragged rows of column indices into a matrix padded with 'pad'."""
+    width = max([len(row) for row in rows], default=0) or 1
+    padded = np.full((len(rows), width), pad, dtype=np.intp)
+    for i, row in enumerate(rows):
+        padded[i, : len(row)] = row
+    return padded
+
+
+def compile_prerequisites(modules: list[Module], codes: list[str]) -> Prerequisites:
+    """Compile module prerequisites into groups of completion matrix columns.
+
+    Corequisites are skipped as they may be read together with the module.
+    Prerequisite modules missing from the given codes can never be completed,
+    making groups requiring them unsatisfiable.
+
+    Args:
+        modules: Modules to compile prerequisite groups for.
+        codes: Module codes labelling the columns of the completion matrix.
+    Returns:
+        Compiled prerequisite groups.
+    """
+    column, always, never = _columns(codes)
+    groups: list[list[int]] = []
+    offsets = [0]
+    for module in modules:
+        for group in module.needs_modules:
+            groups.append(
+                [column.get(c.code, never) for c in group if not c.is_corequisite]
+            )
+        offsets.append(len(groups))
+    return Prerequisites(_pad(groups, always), np.array(offsets, dtype=np.intp))
+
+
+def satisfies_prerequisites(
+    prerequisites: Prerequisites, completed: np.ndarray
+) -> np.ndarray:
+    """Check which students satisfy the prerequisites of each module.
+
+    Args:
+        prerequisites: Prerequisite groups compiled with compile_prerequisites().
+        completed: (students, modules + 2) completion matrix, extended with
+            the 'always' & 'never' completed columns.
+    Returns:
+        (students, modules) boolean matrix: True if the student satisfies
+        the module's prerequisites.
+    """
+    offsets = prerequisites.offsets
+    n_modules = len(offsets) - 1
+    satisfied = np.ones((completed.shape[0], n_modules), dtype=bool)
+    has_groups = np.flatnonzero(offsets[1:] > offsets[:-1])
+    if len(has_groups) == 0:
+        return satisfied
+    # a group is satisfied if all of its modules are completed
+    groups = completed[:, prerequisites.groups].all(axis=2)
+    # groups of each module are contiguous: module prerequisites are satisfied
+    # if any one of its groups are satisfied
+    satisfied[:, has_groups] = np.logical_or.reduceat(
+        groups, offsets[has_groups], axis=1
+    )
+    return satisfied
+
+
+def _excluded(modules: list[Module], codes: list[str]) -> np.ndarray:
+    """Compile modules that exclude taking each module once completed.
+
+    A module is excluded by itself, its mutually exclusive modules & the
+    modules it rejects.
+
+    Returns:
+        (modules, width) column indices, padded with the 'never completed' column.
+    """
+    column, _, never = _columns(codes)
+    return _pad(
+        [
+            [
+                column[c.code]
+                for c in [m.code] + m.mutually_exclusives + m.rejects_modules
+                if c.code in column
+            ]
+            for m in modules
+        ],
+        never,
+    )
+
+
+def _rejected(modules: list[Module], cohort: Cohort) -> np.ndarray:
+    """Check which students are rejected from each module by their course.
+
+    Students sharing the same course, alternate course, admission year &
+    direct entry flag are rejected from the same modules, so rejections are
+    only computed once per such distinct student profile.
+
+    Returns:
+        (students, modules) boolean matrix: True if the module is not
+        available to the student's programme.
+    """
+    # compile course restrictions into parallel arrays keyed by course code:
+    # (module index, alternate course, direct entry, from year, to year)
+    by_course: dict[str, list[tuple[int, str, int, int, int]]] = {}
+    # admission year restrictions as (module index, from year, to year)
+    admyrs: list[tuple[int, int, int]] = []
+    for i, module in enumerate(modules):
+        for course in module.rejects_courses:
+            by_course.setdefault(course.course, []).append(
+                (
+                    i,
+                    NO_ALT_COURSE if course.alt_course is None else course.alt_course,
+                    ANY_ENTRY
+                    if course.is_direct_entry is None
+                    else int(course.is_direct_entry),
+                    *course.year_range(),
+                )
+            )
+        for course in module.rejects_courses_with:
+            admyrs.append((i, *course.year_range()))
+    restrictions = {
+        course: [np.array(column) for column in zip(*rows)]
+        for course, rows in by_course.items()
+    }
+    admyr_module, admyr_from, admyr_to = (
+        [np.array(column) for column in zip(*admyrs)]
+        if len(admyrs) > 0
+        else [np.array([], dtype=np.intp)] * 3
+    )
+
+    profiles: dict[tuple[str, str, int, bool], int] = {}
+    profile_ids = np.array(
+        [
+            profiles.setdefault(profile, len(profiles))
+            for profile in zip(
+                cohort.courses.tolist(),
+                cohort.alt_courses.tolist(),
+                cohort.admit_years.tolist(),
+                cohort.is_direct_entry.tolist(),
+            )
+        ],
+        dtype=np.intp,
+    )
+    rejected = np.zeros((len(profiles), len(modules)), dtype=bool)
+    for (course_code, alt_course, year, direct_entry), p in profiles.items():
+        rejected[p, admyr_module[(admyr_from <= year) & (year <= admyr_to)]] = True
+        if course_code not in restrictions:
+            continue
+        index, alt, entry, from_year, to_year = restrictions[course_code]
+        matches = (
+            ((alt == NO_ALT_COURSE) | (alt == alt_course))
+            & ((entry == ANY_ENTRY) | (entry == int(direct_entry)))
+            & (from_year <= year)
+            & (year <= to_year)
+        )
+        rejected[p, index[matches]] = True
+    return rejected[profile_ids]
+
+
+def eligibility_matrix(
+    modules: list[Module], cohort: Cohort, chunk_size: int = 4096
+) -> np.ndarray:
+    """Determine which modules each student in the cohort is eligible to take.
+
+    A student is eligible to take a module if the student:
+    - has not completed the module, its mutually exclusive or rejected modules.
+    - satisfies the module's prerequisite modules & year standing.
+    - is not in a programme or admission year the module is not available to.
+
+    Args:
+        modules: Modules to check eligibility for.
+        cohort: Students to check eligibility for.
+        chunk_size: No. of students to check at once, bounding memory usage.
+    Returns:
+        (students, modules) boolean matrix: True if the student is eligible
+        to take the module.
+    """
+    prerequisites = compile_prerequisites(modules, cohort.codes)
+    excluded = _excluded(modules, cohort.codes)
+    needs_years = np.array(
+        [0 if m.needs_year is None else m.needs_year for m in modules], dtype=int
+    )
+
+    eligible = ~_rejected(modules, cohort)
+    eligible &= cohort.study_years[:, np.newaxis] >= needs_years[np.newaxis, :]
+    for begin in _chunks(cohort.completed.shape[0], chunk_size):
+        chunk = slice(begin, begin + chunk_size)
+        completed = _extend(cohort.completed[chunk])
+        eligible[chunk] &= satisfies_prerequisites(prerequisites, completed)
+        eligible[chunk] &= ~completed[:, excluded].any(axis=2)
+    return eligible
+
+
+def _chunks(length: int, chunk_size: int) -> Iterable[int]:
+    """Yield the starting index of each chunk splitting the given length."""
+    if chunk_size <= 0:
+        raise ValueError("Expected chunk size to be positive.")
+    return range(0, length, chunk_size)
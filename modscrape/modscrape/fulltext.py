@@ -0,0 +1,164 @@
+#
+# Modscrape
+# Full Text
+# Inverted index with BM25 ranking over module titles & descriptions
+#
+
+import re
+from collections import Counter
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from .module import Module
+
+TERM_REGEX = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split the given text into lowercase alphanumeric terms.
+
+    Args:
+        text: Text to split into terms.
+    Returns:
+        List of terms in the order they appear in the text.
+    """
+    return TERM_REGEX.findall(text.lower())
+
+
+class FullTextIndex:
+    """Inverted index over module titles & descriptions ranked with BM25.
+
+    Posting lists of all terms are stored back to back in flat integer arrays,
+    with the postings of the i-th term of the sorted vocabulary spanning
+    [offsets[i], offsets[i+1]) of 'doc_ids' & 'term_freqs'.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        vocabulary: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+    ):
+        # module code of each document
+        self.codes = codes
+        # sorted vocabulary of terms
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) > 0 else 0
+
+    @classmethod
+    def build(cls, modules: list[Module], title_boost: int = 2) -> "FullTextIndex":
+        """Build the full text index over the given modules.
+
+        Args:
+            modules: Modules to index titles & descriptions of.
+            title_boost: No. of times each title term is counted, ranking
+                matches in titles above matches in descriptions.
+        Returns:
+            Full text index over the given modules.
+        """
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_lengths = []
+        for doc_id, module in enumerate(modules):
+            terms = Counter(tokenize(module.title) * title_boost)
+            terms.update(tokenize(module.description))
+            for term, freq in terms.items():
+                postings.setdefault(term, []).append((doc_id, freq))
+            doc_lengths.append(sum(terms.values()))
+
+        vocabulary = sorted(postings.keys())
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.uint32)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in vocabulary])
+        flat = [posting for term in vocabulary for posting in postings[term]]
+        return cls(
+            codes=np.array([m.code.code for m in modules], dtype=str),
+            vocabulary=np.array(vocabulary, dtype=str),
+            offsets=offsets,
+            doc_ids=np.array([doc_id for doc_id, _ in flat], dtype=np.uint32),
+            term_freqs=np.array([freq for _, freq in flat], dtype=np.uint32),
+            doc_lengths=np.array(doc_lengths, dtype=np.uint32),
+        )
+
+    def term_id(self, term: str) -> Optional[int]:
+        """Find the position of the given term in the vocabulary, None if absent.
+
+        Terms are binary searched in the sorted vocabulary, so loading an index
+        does not need to build a lookup table over the whole vocabulary.
+        """
+        i = int(np.searchsorted(self.vocabulary, term))
+        if i < len(self.vocabulary) and self.vocabulary[i] == term:
+            return i
+        return None
+
+    def search(
+        self, query: str, k: int = 10, k1: float = 1.2, b: float = 0.75
+    ) -> list[tuple[str, float]]:
+        """Rank modules matching the given query with BM25.
+
+        Args:
+            query: Free text query to search modules with.
+            k: Maximum no. of results to return.
+            k1: BM25 term frequency saturation parameter.
+            b: BM25 document length normalisation parameter.
+        Returns:
+            Up to k (module code, score) pairs matching the query, by descending score.
+        """
+        n_docs = len(self.codes)
+        scores = np.zeros(n_docs, dtype=np.float64)
+        for term in set(tokenize(query)):
+            i = self.term_id(term)
+            if i is None:
+                continue
+            span = slice(self.offsets[i], self.offsets[i + 1])
+            doc_ids, freqs = self.doc_ids[span], self.term_freqs[span]
+            idf = np.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            norm = k1 * (1 - b + b * self.doc_lengths[doc_ids] / self.avg_doc_length)
+            # each document appears at most once in a term's posting list
+            scores[doc_ids] += idf * freqs * (k1 + 1) / (freqs + norm)
+
+        matches = np.flatnonzero(scores)
+        # sort by descending score, breaking ties (also at the k-th result)
+        # by document order as matches are in document order
+        matches = matches[np.argsort(-scores[matches], kind="stable")[:k]]
+        return [(str(self.codes[i]), float(scores[i])) for i in matches]
+
+    def save(self, path: Union[str, PathLike]):
+        """Save the full text index to the given .npz path."""
+        np.savez(
+            path,
+            codes=self.codes,
+            vocabulary=self.vocabulary,
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, PathLike]) -> "FullTextIndex":
+        """Load a full text index saved with save() from the given .npz path."""
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+
+def index_catalog(modules: list[Module], catalog_path: Union[str, PathLike]) -> Path:
+    """Build & save the full text index of a catalog alongside its JSON.
+
+    Args:
+        modules: Modules of the catalog to index.
+        catalog_path: Path of the catalog JSON written by write_catalog().
+    Returns:
+        Path of the saved index: the catalog path with a .npz suffix.
+    """
+    path = Path(catalog_path).with_suffix(".npz")
+    FullTextIndex.build(modules).save(path)
+    return path
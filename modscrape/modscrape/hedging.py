@@ -0,0 +1,145 @@
+#
+# Modscrape
+# Hedging
+# Hedged fetches cutting tail latency by duplicating slow requests
+#
+
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from time import perf_counter
+from typing import Callable, Optional
+
+from .metrics import metrics
+
+
+class LatencyWindow:
+    """Thread safe rolling window of the latest fetch latencies."""
+
+    def __init__(self, size: int = 200):
+        self.latencies: deque[float] = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.latencies)
+
+    def observe(self, seconds: float):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """Latency at the given percentile (0-100) of the window (nearest rank)."""
+        with self.lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            raise ValueError("Expected at least one latency in the window.")
+        return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+class Hedger:
+    """Hedges fetches that run slower than most recent fetches.
+
+    A hedged fetch sends its request & waits up to the given percentile of
+    recent latencies. If no response has arrived by then, it sends a duplicate
+    request & returns whichever response arrives first. The loser is cancelled
+    if it has not started, otherwise its response is discarded as requests
+    cannot abort a request in flight from another thread.
+    Hedges are capped at max_extra of all fetches to bound extra server load.
+    Use as a context manager to shut down its threads when done.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_extra: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 16,
+    ):
+        """Create a hedger.
+
+        Args:
+            percentile: Percentile (0-100) of recent latencies a fetch may take
+                before it is hedged.
+            max_extra: Max no. of hedge requests as a fraction of all fetches.
+            window: No. of the latest latencies the percentile is taken over.
+            min_samples: No. of latencies observed before fetches are hedged.
+            max_workers: No. of threads sending requests, which should be at
+                least twice the no. of concurrent fetches.
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError(f"Expected percentile in (0, 100], got {percentile}.")
+        self.percentile = percentile
+        self.max_extra = max_extra
+        self.min_samples = min_samples
+        self.latencies = LatencyWindow(window)
+        self.executor = ThreadPoolExecutor(max_workers, "modscrape-hedge")
+        self.lock = threading.Lock()
+        self.fetches = 0
+        self.hedges = 0
+        # no. of hedge requests that responded before the original request
+        self.wins = 0
+
+    def __enter__(self) -> "Hedger":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def threshold(self) -> Optional[float]:
+        """Seconds a fetch may take before it is hedged, None until warmed up."""
+        if len(self.latencies) < max(self.min_samples, 1):
+            return None
+        return self.latencies.percentile(self.percentile)
+
+    def _take_hedge(self) -> bool:
+        with self.lock:
+            if self.hedges + 1 > self.max_extra * self.fetches:
+                return False
+            self.hedges += 1
+        metrics.count("hedges")
+        return True
+
+    def hedged(self, fetch: Callable[[str, str], str]) -> Callable[[str, str], str]:
+        """Wrap the given fetch to hedge fetches slower than the threshold."""
+
+        def hedged_fetch(semester: str, course: str) -> str:
+            with self.lock:
+                self.fetches += 1
+            begin = perf_counter()
+            threshold = self.threshold()
+            primary = self.executor.submit(fetch, semester, course)
+            if threshold is None:
+                html = primary.result()
+            else:
+                done, _ = wait([primary], timeout=threshold)
+                if done or not self._take_hedge():
+                    html = primary.result()
+                else:
+                    html = self._race(
+                        primary, self.executor.submit(fetch, semester, course)
+                    )
+            # observed latency: the latency hedged fetches are meant to cut
+            self.latencies.observe(perf_counter() - begin)
+            return html
+
+        return hedged_fetch
+
+    def _race(self, primary: Future, hedge: Future) -> str:
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is hedge:
+                        with self.lock:
+                            self.wins += 1
+                        metrics.count("hedge_wins")
+                    return future.result()
+        # both requests failed: surface the error of the original request
+        return primary.result()
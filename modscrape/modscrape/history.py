@@ -0,0 +1,180 @@
+#
+# Modscrape
+# History
+# Versioned, delta encoded history of module catalogs across semesters
+#
+
+import json
+import sqlite3
+import zlib
+from dataclasses import asdict
+from os import PathLike
+from typing import Iterable, Optional, Union
+
+from .diff import Fingerprint
+from .module import Module, module_from_dict
+
+SCHEMA = """
+-- semesters in the order they were appended
+CREATE TABLE IF NOT EXISTS semesters (
+    seq INTEGER PRIMARY KEY,
+    semester TEXT NOT NULL UNIQUE
+);
+-- versions of each module: the base snapshot is the first semester's
+-- catalog, later semesters only store modules that changed (deltas).
+-- removed modules are stored as versions with a NULL record (tombstones).
+CREATE TABLE IF NOT EXISTS versions (
+    code TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    record BLOB,
+    PRIMARY KEY (code, seq)
+) WITHOUT ROWID;
+"""
+TOMBSTONE_DIGEST = b""
+
+SELECT_LAST_SEQ = "SELECT seq, semester FROM semesters ORDER BY seq DESC LIMIT 1"
+SELECT_SEQ_AS_OF = """
+SELECT MAX(seq) FROM semesters WHERE semester <= ?
+"""
+SELECT_SEMESTERS = "SELECT semester FROM semesters ORDER BY seq"
+INSERT_SEMESTER = "INSERT INTO semesters VALUES (?, ?)"
+INSERT_VERSION = "INSERT INTO versions VALUES (?, ?, ?, ?)"
+# SQLite returns the other columns from the row holding MAX(seq)
+SELECT_LATEST_DIGESTS = """
+SELECT code, digest, MAX(seq) FROM versions WHERE seq <= ? GROUP BY code
+"""
+SELECT_LATEST_RECORDS = """
+SELECT code, record, MAX(seq) FROM versions WHERE seq <= ? GROUP BY code
+"""
+SELECT_LATEST_RECORD = """
+SELECT record FROM versions WHERE code = ? AND seq <= ? ORDER BY seq DESC LIMIT 1
+"""
+
+
+def encode(module: Module) -> bytes:
+    """Encode the given module as compressed JSON."""
+    return zlib.compress(json.dumps(asdict(module)).encode())
+
+
+def decode(record: bytes) -> Module:
+    """Decode a module encoded with encode()."""
+    return module_from_dict(json.loads(zlib.decompress(record)))
+
+
+class HistoryStore:
+    """SQLite store of module catalogs across semesters, delta encoded.
+
+    The first appended semester's catalog is stored in full as the base
+    snapshot. Each later semester only stores versions of modules that were
+    added, changed or removed since the previous semester, so storage grows
+    with the amount of change rather than the no. of semesters. Reads as of a
+    semester decode only the latest version of each requested module.
+    Use as a context manager to close the database connection when done.
+    """
+
+    def __init__(self, path: Union[str, PathLike] = ":memory:"):
+        """Open the history store at the given SQLite database path.
+
+        Args:
+            path: Path to the SQLite database, created if it does not exist.
+        """
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def semesters(self) -> list[str]:
+        """List the semesters in the history, oldest first."""
+        return [s for s, in self.db.execute(SELECT_SEMESTERS)]
+
+    def append(self, semester: str, modules: Iterable[Module]) -> int:
+        """Append the catalog of the given semester to the history.
+
+        Args:
+            semester: Academic semester of the catalog eg. "2023_1".
+            modules: Catalog of modules offered in the semester.
+        Returns:
+            No. of module versions stored for the semester.
+        Raises:
+            ValueError: If the semester is not later than the last appended semester.
+        """
+        last = self.db.execute(SELECT_LAST_SEQ).fetchone()
+        seq = 0 if last is None else last[0] + 1
+        if last is not None and semester <= last[1]:
+            raise ValueError(
+                f"Expected semester to be later than {last[1]}, got {semester}."
+            )
+
+        # digests of the latest version of each module in the history
+        latest = {
+            code: digest
+            for code, digest, _ in self.db.execute(SELECT_LATEST_DIGESTS, (seq,))
+            if digest != TOMBSTONE_DIGEST
+        }
+        current = {m.code.code: m for m in modules}
+        versions: list[tuple[str, int, bytes, Optional[bytes]]] = []
+        for code, module in current.items():
+            digest = Fingerprint.of(module).module
+            if latest.get(code) != digest:
+                versions.append((code, seq, digest, encode(module)))
+        versions.extend(
+            (code, seq, TOMBSTONE_DIGEST, None)
+            for code in latest.keys() - current.keys()
+        )
+
+        with self.db:
+            self.db.execute(INSERT_SEMESTER, (seq, semester))
+            self.db.executemany(INSERT_VERSION, versions)
+        return len(versions)
+
+    def _seq_as_of(self, semester: str) -> Optional[int]:
+        return self.db.execute(SELECT_SEQ_AS_OF, (semester,)).fetchone()[0]
+
+    def module(self, code: str, as_of: str) -> Optional[Module]:
+        """Get the module with the given code as it was in the given semester.
+
+        Args:
+            code: Module code of the module to get.
+            as_of: Semester to read the module as of. If the semester is not
+                in the history, the latest earlier semester is read instead.
+        Returns:
+            Module as of the semester, or None if it was not offered then.
+        """
+        seq = self._seq_as_of(as_of)
+        if seq is None:
+            return None
+        row = self.db.execute(SELECT_LATEST_RECORD, (code, seq)).fetchone()
+        return None if row is None or row[0] is None else decode(row[0])
+
+    def catalog(
+        self, as_of: str, codes: Optional[Iterable[str]] = None
+    ) -> list[Module]:
+        """Get the catalog of modules as it was in the given semester.
+
+        Args:
+            as_of: Semester to read the catalog as of. If the semester is not
+                in the history, the latest earlier semester is read instead.
+            codes: Module codes to read, or None to read the whole catalog.
+        Returns:
+            Modules offered in the semester, sorted by module code.
+        """
+        if codes is not None:
+            modules = [self.module(code, as_of) for code in sorted(set(codes))]
+            return [m for m in modules if m is not None]
+        seq = self._seq_as_of(as_of)
+        if seq is None:
+            return []
+        return [
+            decode(record)
+            for _, record, _ in sorted(self.db.execute(SELECT_LATEST_RECORDS, (seq,)))
+            if record is not None
+        ]
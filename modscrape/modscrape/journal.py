@@ -0,0 +1,174 @@
+#
+# Modscrape
+# Journal
+# Crash safe, append only journal of crawl progress for resuming crawls
+#
+
+import json
+import os
+import threading
+from enum import Enum
+from hashlib import blake2b
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+from .module import Module
+from .pipeline import Failure, Job
+
+JOURNAL_FILE = "journal.jsonl"
+# previous journal, kept when a finished journal is rotated out
+ROTATED_FILE = "journal.jsonl.1"
+PAGES_DIR = "pages"
+
+
+class JobState(Enum):
+    """State of a (semester, course) crawl job."""
+
+    # planned but not yet fetched
+    PENDING = "pending"
+    # course content fetched & saved in the journal's pages
+    FETCHED = "fetched"
+    # modules parsed & written to the sink
+    PARSED = "parsed"
+    FAILED = "failed"
+
+
+class CrawlJournal:
+    """Append only journal of the state of each job in a crawl.
+
+    Every state change is appended as a JSON line & fsync-ed before the
+    crawl moves on, so the journal survives crashes. Fetched course content
+    is saved alongside the journal, so a crawl resumed after a parser crash
+    parses saved pages rather than fetching them again.
+    Use as a context manager to close the journal when done.
+    """
+
+    def __init__(self, directory: Union[str, PathLike]):
+        """Open the journal in the given directory, replaying its recorded states.
+
+        Args:
+            directory: Directory holding the journal, created if it does not exist.
+        """
+        self.directory = Path(directory)
+        self.pages = self.directory / PAGES_DIR
+        self.pages.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / JOURNAL_FILE
+        # latest state of each job, in the order jobs were first recorded
+        self.states: dict[Job, JobState] = {}
+        self._replay()
+        self.file = open(self.path, "a")
+        self.lock = threading.Lock()
+
+    def _replay(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as f:
+            raw = f.read()
+            # drop a partially written last record, torn by a crash mid-write
+            end = raw.rfind(b"\n") + 1
+            if end < len(raw):
+                f.truncate(end)
+        for line in raw[:end].splitlines():
+            record = json.loads(line)
+            self.states[(record["acadsem"], record["course"])] = JobState(
+                record["state"]
+            )
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def _append(self, records: list[dict]):
+        with self.lock:
+            self.file.write("".join(json.dumps(r) + "\n" for r in records))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def record(self, job: Job, state: JobState, error: Optional[str] = None):
+        """Durably record the given state of the given job."""
+        record = {"acadsem": job[0], "course": job[1], "state": state.value}
+        if error is not None:
+            record["error"] = error
+        self._append([record])
+        self.states[job] = state
+
+    def plan(self, jobs: Iterable[Job]):
+        """Record the given jobs as pending, skipping jobs already in the journal."""
+        planned = [job for job in dict.fromkeys(jobs) if job not in self.states]
+        self._append(
+            [
+                {"acadsem": s, "course": c, "state": JobState.PENDING.value}
+                for s, c in planned
+            ]
+        )
+        self.states.update({job: JobState.PENDING for job in planned})
+
+    def unfinished(self) -> list[Job]:
+        """List jobs that have not been parsed, in the order they were planned."""
+        return [job for job, state in self.states.items() if state != JobState.PARSED]
+
+    def page_path(self, job: Job) -> Path:
+        """Path the fetched course content of the given job is saved at."""
+        name = blake2b(f"{job[0]}\0{job[1]}".encode(), digest_size=16).hexdigest()
+        return self.pages / f"{name}.html"
+
+    def fetcher(self, fetch: Callable[[str, str], str]) -> Callable[[str, str], str]:
+        """Wrap the given fetch to save fetched pages & reuse pages already saved."""
+
+        def journaled_fetch(semester: str, course: str) -> str:
+            job, path = (semester, course), self.page_path((semester, course))
+            # pages are only saved once fully fetched & removed once parsed
+            if path.exists():
+                return path.read_text()
+            html = fetch(semester, course)
+            # write then rename, so a crash never leaves a partial page behind
+            partial = path.with_suffix(".partial")
+            with open(partial, "w") as f:
+                f.write(html)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(partial, path)
+            self.record(job, JobState.FETCHED)
+            return html
+
+        return journaled_fetch
+
+    def sink(
+        self, sink: Callable[[Job, list[Module]], None]
+    ) -> Callable[[Job, list[Module]], None]:
+        """Wrap the given sink to record jobs as parsed once written to the sink.
+
+        The sink should write modules idempotently (eg. CatalogStore.upsert()),
+        as a crash after writing but before recording rewrites the job on resume.
+        """
+
+        def journaled_sink(job: Job, modules: list[Module]):
+            sink(job, modules)
+            self.record(job, JobState.PARSED)
+            self.page_path(job).unlink(missing_ok=True)
+
+        return journaled_sink
+
+    def record_failures(self, failures: Iterable[Failure[Job]]):
+        """Record the given crawl failures, to be retried on resume."""
+        for failure in failures:
+            self.record(
+                failure.key, JobState.FAILED, f"{failure.stage}: {failure.error!r}"
+            )
+
+
+def rotate(directory: Union[str, PathLike]):
+    """Move the journal in the given directory aside, so a new crawl can start.
+
+    The journal is kept as ROTATED_FILE, replacing any journal rotated before.
+    Pages of parsed jobs are removed as they are parsed, so a finished
+    journal leaves no pages behind.
+    """
+    directory = Path(directory)
+    os.replace(directory / JOURNAL_FILE, directory / ROTATED_FILE)
@@ -5,7 +5,7 @@
 
 from typing import Iterable
 
-from tok import Token, TokenType
+from .tok import Token, TokenType
 
 token_types: dict[str, TokenType] = {
     "AU": TokenType.AU,
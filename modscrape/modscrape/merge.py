@@ -0,0 +1,155 @@
+#
+# Modscrape
+# Merge
+# Deduplicate modules scraped across course listings into a global catalog
+#
+
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from .diff import Fingerprint
+from .module import Module
+
+# (course, semester) listing a module was scraped from eg. ("CSC;;1;F", "2023_1")
+Listing = tuple[str, str]
+
+
+@dataclass
+class CatalogEntry:
+    """Module of a semester merged across all course listings it appeared in.
+
+    Listings usually agree on the module, sharing a single version. Listings
+    of the same semester that disagree on the module add versions, flagging
+    a conflict.
+    """
+
+    semester: str
+    code: str
+    # distinct versions of the module by fingerprint digest, in order first seen
+    versions: dict[bytes, Module] = field(default_factory=dict)
+    # listings the module appeared in & the digest of the version listed
+    listings: dict[Listing, bytes] = field(default_factory=dict)
+
+    @property
+    def module(self) -> Module:
+        """First seen version of the module."""
+        return next(iter(self.versions.values()))
+
+    @property
+    def has_conflicts(self) -> bool:
+        """Whether listings disagree on the module."""
+        return len(self.versions) > 1
+
+    def listed(self, listing: Listing) -> Module:
+        """Get the version of the module in the given listing."""
+        return self.versions[self.listings[listing]]
+
+
+class CatalogMerger:
+    """Merges modules scraped from many course listings into a global catalog.
+
+    Identical modules are hash-consed: all listings of a module share one
+    Module object, so memory scales with the no. of distinct modules rather
+    than the no. of (module, listing) pairs.
+    """
+
+    def __init__(self) -> None:
+        # entries by (semester, module code): modules may change across semesters
+        self.entries: dict[tuple[str, str], CatalogEntry] = {}
+        # every distinct module version by fingerprint digest
+        self.interned: dict[bytes, Module] = {}
+
+    def add(self, course: str, semester: str, modules: Iterable[Module]):
+        """Merge the modules scraped from the given course listing.
+
+        Args:
+            course: Course listing the modules were scraped from eg. "CSC;;1;F".
+            semester: Academic semester the modules were scraped for eg. "2023_1".
+            modules: Modules scraped from the course listing.
+        """
+        for module in modules:
+            digest = Fingerprint.of(module).module
+            module = self.interned.setdefault(digest, module)
+            code = module.code.code
+            entry = self.entries.setdefault(
+                (semester, code), CatalogEntry(semester, code)
+            )
+            entry.versions.setdefault(digest, module)
+            entry.listings[(course, semester)] = digest
+
+    def catalog(self) -> list[CatalogEntry]:
+        """Get the merged catalog entries, sorted by semester & module code."""
+        return [self.entries[key] for key in sorted(self.entries)]
+
+    def conflicts(self) -> Iterator[CatalogEntry]:
+        """Yield catalog entries listings disagree on, sorted by semester & code."""
+        return (entry for entry in self.catalog() if entry.has_conflicts)
+
+    def merged(self, semester: Optional[str] = None) -> list[Module]:
+        """Get the deduplicated catalog of modules, one per semester & code.
+
+        Args:
+            semester: Only include modules of the given semester.
+        Returns:
+            First seen version of each module, sorted by semester & module code.
+        """
+        return [
+            entry.module
+            for entry in self.catalog()
+            if semester is None or entry.semester == semester
+        ]
+
+
+def main(argv: Optional[list[str]] = None):
+    """Merge the archived course listings of a semester into a catalog JSON."""
+    import argparse
+
+    from .archive import HtmlArchive, reprocess
+    from .module import write_catalog
+
+    arg_parser = argparse.ArgumentParser(
+        description="Merge modules across archived course listings into a catalog."
+    )
+    arg_parser.add_argument("archive", help="Directory of the archive to merge.")
+    arg_parser.add_argument("out", help="Path of the catalog JSON to write.")
+    arg_parser.add_argument(
+        "--semester", help="Semester to merge. Defaults to the latest archived."
+    )
+    arg_parser.add_argument(
+        "--fulltext",
+        action="store_true",
+        help="Also write a full text index of the catalog alongside it.",
+    )
+    args = arg_parser.parse_args(argv)
+
+    merger = CatalogMerger()
+    with HtmlArchive(args.archive) as archive:
+        semester = args.semester or max(
+            (f.semester for f in archive.fetches(latest=True)), default=None
+        )
+        if semester is None:
+            arg_parser.error(f"{args.archive} holds no fetches to merge.")
+        # merge the latest fetch of each listing
+        failures = reprocess(
+            archive,
+            lambda fetch, modules: merger.add(fetch.course, fetch.semester, modules),
+            semester,
+            latest=True,
+        )
+    for failure in failures:
+        print(f"Failed {failure.key.course}: {failure.error!r}")
+    for entry in merger.conflicts():
+        listings = ", ".join(course for course, _ in entry.listings)
+        print(f"{entry.code}: {len(entry.versions)} versions across {listings}.")
+
+    modules = merger.merged(semester)
+    write_catalog(modules, args.out)
+    print(f"Wrote {len(modules)} modules of {semester} to {args.out}.")
+    if args.fulltext:
+        from .fulltext import index_catalog
+
+        print(f"Wrote full text index to {index_catalog(modules, args.out)}.")
+
+
+if __name__ == "__main__":
+    main()
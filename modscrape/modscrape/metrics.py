@@ -0,0 +1,223 @@
+#
+# Modscrape
+# Metrics
+# Per stage timers, counters & histograms of the scraping pipeline
+#
+
+import json
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from os import PathLike
+from time import perf_counter
+from typing import ContextManager, Iterator, Optional, Union
+
+# upper bounds of the default histogram buckets, in seconds for timers
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    30.0,
+)
+# prefix of metric names in the Prometheus text format
+PROMETHEUS_PREFIX = "modscrape"
+# suffix of paths metrics are written to in the Prometheus text format
+PROMETHEUS_SUFFIX = ".prom"
+
+
+class Histogram:
+    """Histogram counting observations into buckets by upper bound.
+
+    Observations may be recorded concurrently from pipeline worker threads.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # counts[i] observations fall in (buckets[i - 1], buckets[i]],
+        # with the last count for observations above all buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        bucket = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[bucket] += 1
+            self.sum += value
+            self.count += 1
+
+    def to_json(self) -> dict:
+        with self.lock:
+            return {
+                "buckets": list(self.buckets),
+                "counts": list(self.counts),
+                "sum": self.sum,
+                "count": self.count,
+            }
+
+
+class _NullTimer:
+    """Timer that does nothing, returned when metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Times the enclosed block into the histogram of a stage."""
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.begin = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.observe(f"{self.stage}_seconds", perf_counter() - self.begin)
+
+
+class Metrics:
+    """Registry of counters & histograms recorded by the scraping pipeline.
+
+    Metrics are disabled by default, in which case recording is a single
+    attribute check and timing a stage returns a shared no-op context manager.
+    Recording & exporting are thread safe.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        """Enable (or disable) recording of metrics."""
+        self.enabled = enabled
+
+    def reset(self):
+        """Discard all recorded metrics."""
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def count(self, name: str, value: float = 1):
+        """Increment the counter with the given name by the given value."""
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(
+        self, name: str, value: float, buckets: Optional[tuple[float, ...]] = None
+    ):
+        """Record the given value in the histogram with the given name.
+
+        Args:
+            name: Name of the histogram to record the value in.
+            value: Value to record.
+            buckets: Bucket upper bounds used if the histogram does not exist yet.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(
+                    buckets or DEFAULT_BUCKETS
+                )
+        histogram.observe(value)
+
+    def time(self, stage: str) -> ContextManager:
+        """Time the enclosed block into the '<stage>_seconds' histogram.
+
+        Usage:
+            with metrics.time("lex"):
+                tokens = lex(lines)
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, stage)
+
+    def snapshot(self) -> dict:
+        """Consistent copy of the recorded counters & histograms, as JSON."""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        return {
+            "counters": counters,
+            "histograms": {
+                name: histogram.to_json() for name, histogram in histograms.items()
+            },
+        }
+
+    def to_json(self) -> str:
+        """Export recorded metrics as JSON."""
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self) -> str:
+        """Export recorded metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, histogram in sorted(snapshot["histograms"].items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines += [
+                f'{metric}_bucket{{le="+Inf"}} {histogram["count"]}',
+                f"{metric}_sum {histogram['sum']}",
+                f"{metric}_count {histogram['count']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Union[str, PathLike]):
+        """Write recorded metrics to the given path.
+
+        Metrics are written in the Prometheus text format to paths ending in
+        PROMETHEUS_SUFFIX, otherwise as JSON.
+        """
+        prometheus = str(path).endswith(PROMETHEUS_SUFFIX)
+        with open(path, "w") as f:
+            f.write(self.to_prometheus() if prometheus else self.to_json())
+
+    @contextmanager
+    def recording(self, path: Optional[Union[str, PathLike]]) -> Iterator[None]:
+        """Record metrics in the enclosed block, writing them to the given path.
+
+        Metrics are written even if the block raises. Does nothing if the path
+        is None.
+        """
+        if path is None:
+            yield
+            return
+        self.enable()
+        try:
+            yield
+        finally:
+            self.enable(False)
+            self.write(path)
+
+
+# metrics recorded by the scraping pipeline, disabled by default
+metrics = Metrics()
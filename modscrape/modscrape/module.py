@@ -0,0 +1,127 @@
+import json
+from dataclasses import asdict, dataclass
+from os import PathLike
+from typing import Iterable, Optional, Union
+
+
+@dataclass
+class ModuleCode:
+    code: str
+    is_corequisite: bool = False
+    # Some module pre-requisite have strings that are standardized
+    # and are not ideal to parse / keep
+    # e.g. CC0001 (Not Applicable to IEM)
+    # but I don't think we should throw the data away, even if
+    # we dont form a data model for them so anything that is not
+    # matched will be kept in misc to be shown/displayed
+    misc: str = ""
+
+
+@dataclass
+class Course:
+    # There is a special case of course str: "Admyr" - admission year
+    course: str
+    # these are noted by "(Direct Entry)" or "(Non Direct Entry)"
+    # when we refer to the course, this tells us
+    # if a direct_entry or non direct entry to the course matters
+    is_direct_entry: Optional[bool]
+    # these states from what year
+    # e.g. "EEEC(2018-onwards)"
+    from_year: Optional[int]
+    # Sometimes we need to state until which year
+    # e.g. "(Admyr 2004-2013)"
+    # 2004-onwards is treated as 2004-9999
+    to_year: Optional[int]
+    # Possible to have alternate representations
+    # e.g. "ENG(ENE)"
+    alt_course: Optional[str]
+
+    def year_range(self) -> tuple[int, int]:
+        """Admission years covered by this course as an inclusive range.
+
+        A course without years covers all admission years, while a course
+        with only a starting year (e.g. "ACBS(GB)(2023)") covers that year only.
+
+        Returns:
+            Tuple of (from year, to year), with 9999 meaning "onwards".
+        """
+        if self.from_year is None:
+            return 0, 9999
+        return (
+            self.from_year,
+            self.to_year if self.to_year is not None else self.from_year,
+        )
+
+
+@dataclass
+class Module:
+    code: ModuleCode
+    title: str
+    au: float
+    mutually_exclusives: list[ModuleCode]
+    needs_year: Optional[int]
+    needs_modules: list[list[ModuleCode]]
+    needs_exclusives: str
+    rejects_modules: list[ModuleCode]
+    rejects_courses: list[Course]
+    rejects_courses_with: list[Course]
+    unavailable_as_pe: list[Course]
+    allowed_courses: list[Course]
+    not_offered_as_bde: bool
+    not_offered_as_ue: bool
+    is_pass_fail: bool
+    description: str
+
+
+def module_from_dict(data: dict) -> Module:
+    """Reconstruct a Module from its dictionary form eg. from dataclasses.asdict().
+
+    Args:
+        data: Dictionary form of the Module, as decoded from JSON.
+    Returns:
+        Module reconstructed from the given dictionary.
+    """
+
+    def courses(key: str) -> list[Course]:
+        return [Course(**c) for c in data[key]]
+
+    return Module(
+        **{
+            **data,
+            "code": ModuleCode(**data["code"]),
+            "mutually_exclusives": [
+                ModuleCode(**c) for c in data["mutually_exclusives"]
+            ],
+            "needs_modules": [
+                [ModuleCode(**c) for c in group] for group in data["needs_modules"]
+            ],
+            "rejects_modules": [ModuleCode(**c) for c in data["rejects_modules"]],
+            "rejects_courses": courses("rejects_courses"),
+            "rejects_courses_with": courses("rejects_courses_with"),
+            "unavailable_as_pe": courses("unavailable_as_pe"),
+            "allowed_courses": courses("allowed_courses"),
+        }
+    )
+
+
+def write_catalog(modules: Iterable[Module], path: Union[str, PathLike]):
+    """Write the given catalog of modules to the given path as a JSON array.
+
+    Args:
+        modules: Catalog of modules to write.
+        path: Path to write the catalog JSON to.
+    """
+    with open(path, "w") as f:
+        json.dump([asdict(m) for m in modules], f)
+
+
+def read_catalog(path: Union[str, PathLike]) -> list[Module]:
+    """Read a catalog of modules written with write_catalog().
+
+    Args:
+        path: Path to read the catalog JSON from.
+    Returns:
+        Catalog of modules read from the given path.
+    """
+    with open(path) as f:
+        return [module_from_dict(data) for data in json.load(f)]
@@ -0,0 +1,257 @@
+#
+# Modscrape
+# Occupancy
+# Bit packed weekly occupancy bitmaps of module index class schedules
+#
+
+import json
+from dataclasses import asdict, dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+# schedule occupancy is tracked in slots of 30 minutes, which NTU classes begin on
+SLOT_SECS = 30 * 60
+TEACHING_WEEKS = 14
+# days of the week, indexed with Sunday as 0 (weekday % 7 for ISO weekdays)
+DAYS = 7
+# window of the day classes are held in, as seconds since 12am
+DAY_BEGIN_SECS = 8 * 60 * 60
+DAY_END_SECS = 22 * 60 * 60
+# bitmaps are packed into little endian 64 bit words
+WORD = np.dtype("<u8")
+WORD_BITS = 64
+
+TABLE_JSON = "occupancy.json"
+TABLE_BIN = "occupancy.bin"
+
+
+@dataclass(frozen=True)
+class Grid:
+    """Grid of (teaching week, weekday, time slot) cells a bitmap has a bit for."""
+
+    slot_secs: int = SLOT_SECS
+    weeks: int = TEACHING_WEEKS
+    day_begin_secs: int = DAY_BEGIN_SECS
+    day_end_secs: int = DAY_END_SECS
+
+    def __post_init__(self):
+        window = self.day_end_secs - self.day_begin_secs
+        if (
+            window <= 0
+            or window % self.slot_secs
+            or self.day_begin_secs % self.slot_secs
+        ):
+            raise ValueError("Expected a day window of whole slots.")
+
+    @property
+    def slots(self) -> int:
+        """No. of time slots in a day."""
+        return (self.day_end_secs - self.day_begin_secs) // self.slot_secs
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """Shape of an unpacked occupancy: (weeks, days, slots)."""
+        return (self.weeks, DAYS, self.slots)
+
+    @property
+    def words(self) -> int:
+        """No. of 64 bit words a packed occupancy bitmap takes."""
+        return -(-self.weeks * DAYS * self.slots // WORD_BITS)
+
+
+def class_occupancy(cls: dict, grid: Grid = Grid()) -> np.ndarray:
+    """Compute the occupancy of the given class.
+
+    A class occupies every slot its [begin, end) interval overlaps. As classes
+    begin on slot boundaries, two classes clash exactly when their occupied
+    slots intersect.
+
+    Args:
+        cls: Class as in modschedule's resources (see modschedule/models.ts).
+        grid: Grid of cells to compute occupancy over.
+    Returns:
+        Boolean (weeks, days, slots) occupancy of the class.
+    Raises:
+        ValueError: If the class does not begin on a slot boundary or falls
+            outside the grid's teaching weeks or day window.
+    """
+    begin, end = cls["beginSecs"], cls["beginSecs"] + cls["durationSecs"]
+    if begin % grid.slot_secs:
+        raise ValueError(f"Expected class to begin on a slot boundary: {begin}s.")
+    if begin < grid.day_begin_secs or end > grid.day_end_secs:
+        raise ValueError(f"Class at {begin}s-{end}s falls outside the day window.")
+    weeks = np.array(cls["repeats"]["teachingWeeks"], dtype=np.intp) - 1
+    if weeks.size and (weeks.min() < 0 or weeks.max() >= grid.weeks):
+        raise ValueError(f"Expected teaching weeks in 1-{grid.weeks}: {weeks + 1}.")
+    days = np.array(cls["repeats"]["weekdays"], dtype=np.intp) % DAYS
+    slots = np.arange(
+        (begin - grid.day_begin_secs) // grid.slot_secs,
+        -(-(end - grid.day_begin_secs) // grid.slot_secs),
+    )
+    occupancy = np.zeros(grid.shape, dtype=bool)
+    occupancy[np.ix_(weeks, days, slots)] = True
+    return occupancy
+
+
+def index_occupancy(classes: Iterable[dict], grid: Grid = Grid()) -> np.ndarray:
+    """Compute the occupancy of a module index as the union of its classes."""
+    occupancy = np.zeros(grid.shape, dtype=bool)
+    for cls in classes:
+        occupancy |= class_occupancy(cls, grid)
+    return occupancy
+
+
+def pack(occupancy: np.ndarray) -> np.ndarray:
+    """Bit pack (..., weeks, days, slots) occupancies into (..., words) bitmaps."""
+    flat = occupancy.reshape(*occupancy.shape[:-3], -1)
+    n_words = -(-flat.shape[-1] // WORD_BITS)
+    padding = [(0, 0)] * (flat.ndim - 1) + [(0, n_words * WORD_BITS - flat.shape[-1])]
+    packed = np.packbits(np.pad(flat, padding), axis=-1, bitorder="little")
+    return np.ascontiguousarray(packed).view(WORD)
+
+
+def unpack(bitmaps: np.ndarray, grid: Grid = Grid()) -> np.ndarray:
+    """Unpack (..., words) bitmaps into (..., weeks, days, slots) occupancies."""
+    bits = np.unpackbits(
+        np.ascontiguousarray(bitmaps, dtype=WORD).view(np.uint8),
+        axis=-1,
+        bitorder="little",
+    )
+    n_cells = grid.weeks * DAYS * grid.slots
+    return bits[..., :n_cells].reshape(*bitmaps.shape[:-1], *grid.shape).astype(bool)
+
+
+@dataclass
+class OccupancyTable:
+    """Packed occupancy bitmaps of every index of a semester's modules.
+
+    Row i holds the bitmap of index indexes[i] of module modules[i]. Indexes
+    clash exactly when their bitmaps share a set bit.
+    """
+
+    grid: Grid
+    # module code & index code of each row
+    modules: list[str]
+    indexes: list[str]
+    # (rows, grid.words) bitmaps of WORD
+    bitmaps: np.ndarray
+
+    def __post_init__(self):
+        if self.bitmaps.shape != (len(self.indexes), self.grid.words):
+            raise ValueError("Expected one bitmap of grid.words words per index.")
+        if len(self.modules) != len(self.indexes):
+            raise ValueError("Expected a module code per index.")
+
+    def rows(self, module: str) -> np.ndarray:
+        """Rows of the indexes of the given module."""
+        return np.flatnonzero(np.array(self.modules) == module)
+
+    def row(self, module: str, index: str) -> int:
+        """Row of the given index of the given module."""
+        for row in self.rows(module):
+            if self.indexes[row] == index:
+                return int(row)
+        raise KeyError((module, index))
+
+    def clashes(self, row: int, other: int) -> bool:
+        """Whether the indexes in the given rows have clashing classes."""
+        return bool(np.any(self.bitmaps[row] & self.bitmaps[other]))
+
+
+def ingest(modules: Iterable[dict], grid: Grid = Grid()) -> OccupancyTable:
+    """Compute the occupancy table of the indexes of the given modules.
+
+    Args:
+        modules: Modules as in modschedule's resources (see modschedule/models.ts).
+        grid: Grid of cells to compute occupancy over.
+    Returns:
+        Occupancy table with a row per index, in the order given.
+    """
+    codes, indexes, occupancies = [], [], []
+    for module in modules:
+        for index in module["indexes"]:
+            codes.append(module["code"])
+            indexes.append(index["index"])
+            occupancies.append(index_occupancy(index["classes"], grid))
+    occupancy = np.array(occupancies, dtype=bool).reshape(-1, *grid.shape)
+    return OccupancyTable(grid, codes, indexes, pack(occupancy))
+
+
+def read_schedules(directory: Union[str, PathLike]) -> list[dict]:
+    """Read the module class schedules in modschedule's resource directory."""
+    schedules = []
+    for path in sorted(Path(directory).glob("*.json")):
+        with open(path) as f:
+            schedule = json.load(f)
+        # skip tables written alongside the schedules (eg. TABLE_JSON)
+        if isinstance(schedule, dict) and "code" in schedule:
+            schedules.append(schedule)
+    return schedules
+
+
+def write_table(table: OccupancyTable, directory: Union[str, PathLike]):
+    """Write the given table as TABLE_JSON metadata & TABLE_BIN bitmaps.
+
+    TABLE_BIN holds the raw little endian words of the bitmaps, row after
+    row, so it can be loaded without parsing (eg. as a BigUint64Array).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / TABLE_JSON, "w") as f:
+        json.dump(
+            {
+                "grid": asdict(table.grid),
+                "words": table.grid.words,
+                "modules": table.modules,
+                "indexes": table.indexes,
+            },
+            f,
+        )
+    table.bitmaps.astype(WORD).tofile(directory / TABLE_BIN)
+
+
+def read_table(directory: Union[str, PathLike]) -> OccupancyTable:
+    """Read a table written by write_table() from the given directory."""
+    directory = Path(directory)
+    with open(directory / TABLE_JSON) as f:
+        meta = json.load(f)
+    grid = Grid(**meta["grid"])
+    bitmaps = np.fromfile(directory / TABLE_BIN, dtype=WORD)
+    return OccupancyTable(
+        grid, meta["modules"], meta["indexes"], bitmaps.reshape(-1, grid.words)
+    )
+
+
+def main(argv: Optional[list[str]] = None):
+    """Ingest modschedule's class schedules into an occupancy table."""
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Precompute occupancy bitmaps of module index class schedules."
+    )
+    arg_parser.add_argument(
+        "resources", help="Directory of modschedule's module class schedule JSON."
+    )
+    arg_parser.add_argument(
+        "--out",
+        help="Directory to write the occupancy table to. Defaults to resources.",
+    )
+    arg_parser.add_argument(
+        "--slot-minutes", type=int, default=SLOT_SECS // 60, help="Minutes per slot."
+    )
+    args = arg_parser.parse_args(argv)
+
+    table = ingest(read_schedules(args.resources), Grid(args.slot_minutes * 60))
+    out = Path(args.out or args.resources)
+    write_table(table, out)
+    print(
+        f"Wrote {len(table.indexes)} index bitmaps of {table.grid.words * 8} bytes"
+        f" to {out / TABLE_BIN}."
+    )
+
+
+if __name__ == "__main__":
+    main()
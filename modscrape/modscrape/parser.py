@@ -9,8 +9,8 @@
 from itertools import repeat
 from typing import Callable, Iterable, Optional, TypeVar, cast
 
-from module import Course, Module, ModuleCode
-from tok import KeyWords, Token, TokenType, flatten_tokens
+from .module import Course, Module, ModuleCode
+from .tok import KeyWords, Token, TokenType, flatten_tokens
 
 # I note that this may be bad practice but I dont see any other way to
 # unwrap an optional
@@ -0,0 +1,486 @@
+#
+# Modscrape
+# Pipeline
+# Staged crawl pipeline overlapping network fetches with parsing
+#
+
+import queue
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generic,
+    Hashable,
+    Iterable,
+    Optional,
+    TypeVar,
+)
+
+from .metrics import metrics
+from .module import Module
+from .profiling import profiler
+from .scrape import extract_lines, get_course_content, lex_lines, parse_tokens
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    import argparse
+
+K = TypeVar("K", bound=Hashable)
+# (semester, course) crawl job eg. ("2023_1", "CSC;;1;F")
+Job = tuple[str, str]
+
+# marks the end of the items a stage receives
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """Stage of a pipeline applying a function to each item with its own workers."""
+
+    name: str
+    func: Callable[[Any], Any]
+    # no. of threads applying func concurrently
+    workers: int = 1
+    # max no. of items waiting for the stage, beyond which upstream stages block
+    queue_size: int = 16
+
+
+@dataclass
+class Failure(Generic[K]):
+    """Item dropped from the pipeline as a stage raised while processing it."""
+
+    key: K
+    stage: str
+    error: Exception
+
+
+@dataclass
+class _Running:
+    stage: Stage
+    inbox: queue.Queue
+    # no. of workers still running, the last to finish signals the next stage
+    running: int
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class Pipeline(Generic[K]):
+    """Runs items through stages connected by bounded queues.
+
+    Each stage runs its own worker threads, so slow network fetches overlap
+    with parsing & throughput approaches that of the slowest stage. Queues
+    between stages are bounded: a stage that falls behind blocks the stages
+    upstream of it, keeping the no. of items in flight (and memory) bounded.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        tags: Optional[Callable[[K], dict[str, Any]]] = None,
+    ):
+        """Create a pipeline of the given stages.
+
+        Args:
+            stages: Stages each item passes through in order.
+            tags: Derives the tracing tags of the spans of an item from its key.
+        """
+        if not stages:
+            raise ValueError("Expected at least one stage in the pipeline.")
+        self.stages = stages
+        self.tags = tags or (lambda key: {"key": str(key)})
+
+    def run(
+        self, items: Iterable[tuple[K, Any]], sink: Callable[[K, Any], None]
+    ) -> list[Failure[K]]:
+        """Run the given items through the pipeline.
+
+        Args:
+            items: Items to process as (key, value) pairs. The value is passed
+                to the first stage while the key identifies the item.
+            sink: Called on the calling thread with the key & output of the
+                last stage for each item, so it need not be thread safe.
+        Returns:
+            Failures of items that raised in a stage or the sink.
+        """
+        running = [
+            _Running(stage, queue.Queue(stage.queue_size), stage.workers)
+            for stage in self.stages
+        ]
+        outbox: queue.Queue = queue.Queue(self.stages[-1].queue_size)
+        failures: list[Failure[K]] = []
+        threads = [
+            threading.Thread(
+                target=self._work,
+                args=(running, i, outbox, failures),
+                name=f"modscrape-{r.stage.name}-{n}",
+                daemon=True,
+            )
+            for i, r in enumerate(running)
+            for n in range(r.stage.workers)
+        ]
+        # errors raised while iterating items, re-raised once the pipeline drains
+        feed_errors: list[Exception] = []
+        threads.append(
+            threading.Thread(
+                target=self._feed,
+                args=(items, running[0], feed_errors),
+                name="modscrape-feed",
+                daemon=True,
+            )
+        )
+        for thread in threads:
+            thread.start()
+
+        while (item := outbox.get()) is not _DONE:
+            key, value = item
+            try:
+                sink(key, value)
+            except Exception as e:
+                failures.append(Failure(key, "sink", e))
+        for thread in threads:
+            thread.join()
+        if feed_errors:
+            raise feed_errors[0]
+        return failures
+
+    @staticmethod
+    def _feed(
+        items: Iterable[tuple[Any, Any]], first: _Running, errors: list[Exception]
+    ):
+        try:
+            for item in items:
+                first.inbox.put(item)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for _ in range(first.stage.workers):
+                first.inbox.put(_DONE)
+
+    def _work(
+        self,
+        running: list[_Running],
+        index: int,
+        outbox: queue.Queue,
+        failures: list[Failure[K]],
+    ):
+        current = running[index]
+        stage = current.stage
+        while (item := current.inbox.get()) is not _DONE:
+            key, value = item
+            try:
+                # profiled per worker thread, as cProfile only profiles its thread
+                with tracer.tags(**self.tags(key)), metrics.time(
+                    f"pipeline_{stage.name}"
+                ), tracer.span(stage.name), profiler.profile():
+                    output = stage.func(value)
+            except Exception as e:
+                metrics.count("pipeline_failures")
+                # list.append() is atomic, so failures can be recorded from any thread
+                failures.append(Failure(key, stage.name, e))
+                continue
+            nxt = running[index + 1].inbox if index + 1 < len(running) else outbox
+            nxt.put((key, output))
+
+        with current.lock:
+            current.running -= 1
+            if current.running > 0:
+                return
+        # last worker of the stage to finish: signal the next stage
+        if index + 1 < len(running):
+            for _ in range(running[index + 1].stage.workers):
+                running[index + 1].inbox.put(_DONE)
+        else:
+            outbox.put(_DONE)
+
+
+def extract(content_html: str) -> list[str]:
+    """Extract lines of text to lex from the given Course Content HTML."""
+    from bs4 import BeautifulSoup
+
+    return extract_lines(BeautifulSoup(content_html, "lxml"))
+
+
+def crawl_pipeline(
+    fetch: Callable[[str, str], str] = get_course_content,
+    fetch_workers: int = 8,
+    parse_workers: int = 1,
+    queue_size: int = 16,
+) -> Pipeline[Job]:
+    """Create a pipeline fetching & scraping modules from (semester, course) jobs.
+
+    Stages: fetch -> extract (HTML rows) -> lex -> parse. Lexing & parsing
+    hold the GIL, so extra parse workers only help when fetches are fast.
+
+    Args:
+        fetch: Fetches course content HTML for a semester & course.
+        fetch_workers: No. of concurrent fetches.
+        parse_workers: No. of workers for each of the extract, lex & parse stages.
+        queue_size: Max no. of items waiting for each stage.
+    Returns:
+        Pipeline taking jobs with the job as value & outputting scraped modules.
+    """
+    return Pipeline(
+        [
+            Stage("fetch", lambda job: fetch(*job), fetch_workers, queue_size),
+            Stage("extract", extract, parse_workers, queue_size),
+            Stage("lex", lex_lines, parse_workers, queue_size),
+            Stage("parse", parse_tokens, parse_workers, queue_size),
+        ],
+        tags=lambda job: {"acadsem": job[0], "course": job[1]},
+    )
+
+
+def crawl(
+    jobs: Iterable[Job],
+    sink: Callable[[Job, list[Module]], None],
+    pipeline: Optional[Pipeline[Job]] = None,
+) -> list[Failure[Job]]:
+    """Crawl modules of the given (semester, course) jobs.
+
+    Args:
+        jobs: (semester, course) listings to crawl.
+        sink: Called with each job & its scraped modules on the calling thread.
+        pipeline: Pipeline to crawl with, defaults to crawl_pipeline().
+    Returns:
+        Failures of jobs that could not be crawled.
+    """
+    pipeline = pipeline or crawl_pipeline()
+    return pipeline.run(((job, job) for job in jobs), sink)
+
+
+def main(argv: Optional[list[str]] = None):
+    """Crawl modules of many semesters & courses into a CatalogStore."""
+    import argparse
+
+    from .journal import JOURNAL_FILE, CrawlJournal, rotate
+    from .profiling import add_profile_arguments
+    from .scheduler import parse_priority
+
+    arg_parser = argparse.ArgumentParser(
+        description="Crawl modules of NTU course listings into a SQLite database."
+    )
+    arg_parser.add_argument("db", help="Path to the SQLite database to write.")
+    arg_parser.add_argument(
+        "--semester",
+        action="append",
+        help="Semester to crawl, repeatable. Defaults to the latest semester.",
+    )
+    arg_parser.add_argument(
+        "--course",
+        action="append",
+        help="Course to crawl, repeatable. Defaults to all courses.",
+    )
+    arg_parser.add_argument("--fetch-workers", type=int, default=8)
+    arg_parser.add_argument("--parse-workers", type=int, default=1)
+    arg_parser.add_argument("--queue-size", type=int, default=16)
+    arg_parser.add_argument(
+        "--journal",
+        metavar="DIR",
+        help="Journal crawl progress to DIR, so the crawl can be resumed.",
+    )
+    arg_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the unfinished jobs of the crawl journaled in --journal.",
+    )
+    arg_parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="SECONDS",
+        help="Stop starting new fetches SECONDS after the crawl starts.",
+    )
+    arg_parser.add_argument(
+        "--priority",
+        action="append",
+        type=parse_priority,
+        metavar="PATTERN=WEIGHT",
+        help="Weight courses matching the glob PATTERN, repeatable. "
+        "Defaults to weighting core programmes 4 ie. '*;F=4'.",
+    )
+    arg_parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=24 * 60 * 60,
+        metavar="SECONDS",
+        help="Seconds since the last crawl after which a listing is fully stale.",
+    )
+    arg_parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Hedge fetches slower than --hedge-percentile of recent fetches.",
+    )
+    arg_parser.add_argument("--hedge-percentile", type=float, default=95.0)
+    arg_parser.add_argument(
+        "--hedge-max-extra",
+        type=float,
+        default=0.05,
+        help="Max no. of hedge requests as a fraction of all fetches.",
+    )
+    arg_parser.add_argument(
+        "--archive",
+        metavar="DIR",
+        help="Archive every fetched page to DIR, to be reprocessed offline.",
+    )
+    arg_parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="Discover options with the manifest at PATH, parsing the main page "
+        "only when it has changed.",
+    )
+    arg_parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="Only crawl options added since the last refresh of --manifest.",
+    )
+    add_profile_arguments(arg_parser)
+    arg_parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Trace the crawl, writing Chrome Trace Event JSON to PATH on exit.",
+    )
+    arg_parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Record metrics of the crawl, writing them to PATH on exit: in the "
+        "Prometheus text format if PATH ends in .prom, otherwise as JSON.",
+    )
+    args = arg_parser.parse_args(argv)
+    if args.changed_only and args.manifest is None:
+        arg_parser.error("--changed-only requires --manifest.")
+    if args.resume and args.journal is None:
+        arg_parser.error("--resume requires --journal.")
+    if (
+        args.journal is not None
+        and not args.resume
+        and (Path(args.journal) / JOURNAL_FILE).exists()
+    ):
+        with CrawlJournal(args.journal) as previous:
+            unfinished = previous.unfinished()
+        if unfinished:
+            arg_parser.error(
+                f"{args.journal} holds a journal of {len(unfinished)} unfinished"
+                " jobs: pass --resume to resume it."
+            )
+        # the journaled crawl finished: start a new journal
+        rotate(args.journal)
+    # outputs are written even if the crawl fails
+    with metrics.recording(args.metrics), tracer.recording(
+        args.trace
+    ), profiler.running(args.profile, args.profile_mode, args.profile_interval):
+        _crawl(args)
+
+
+def _crawl(args: "argparse.Namespace"):
+    """Crawl the listings selected by the given main() arguments."""
+    import time
+
+    from .archive import HtmlArchive
+    from .discovery import crawled_manifest, refresh, write_manifest
+    from .hedging import Hedger
+    from .journal import CrawlJournal
+    from .scheduler import (
+        DEFAULT_PRIORITIES,
+        Scheduler,
+        deadline_fetcher,
+        split_skipped,
+    )
+    from .scrape import get_options
+    from .singleflight import coalesced
+    from .store import CatalogStore
+
+    # the budget covers the whole crawl, including listing the options
+    begin = time.monotonic()
+
+    journal = None if args.journal is None else CrawlJournal(args.journal)
+    fetch: Callable[[str, str], str] = get_course_content
+    hedger = None
+    if args.hedge:
+        hedger = Hedger(
+            args.hedge_percentile,
+            args.hedge_max_extra,
+            max_workers=2 * args.fetch_workers,
+        )
+        fetch = hedger.hedged(fetch)
+    # outside hedging, so hedge requests are not coalesced with the original
+    fetch = coalesced(fetch)
+    archive = None
+    if args.archive is not None:
+        archive = HtmlArchive(args.archive)
+        fetch = archive.archiver(fetch)
+    if journal is not None:
+        fetch = journal.fetcher(fetch)
+    if args.budget is not None:
+        # outermost, so skipped jobs are neither fetched nor journaled as fetched
+        fetch = deadline_fetcher(fetch, begin + args.budget)
+    manifest = None
+    if journal is not None and args.resume:
+        jobs = journal.unfinished()
+    else:
+        if args.manifest is None:
+            semesters, courses = get_options()
+        else:
+            # saved once the crawl succeeds, so failed crawls see the changes again
+            manifest, changes = refresh(args.manifest, save=False)
+            semesters, courses = manifest.semesters, manifest.courses
+            for option in changes.removed_semesters + changes.removed_courses:
+                print(f"Option {option} is no longer listed.")
+            changed = changes.jobs(manifest)
+        if args.changed_only:
+            jobs = [
+                (semester, course)
+                for semester, course in changed
+                if (not args.semester or semester in args.semester)
+                and (not args.course or course in args.course)
+            ]
+        else:
+            # semesters are listed latest first
+            jobs = [
+                (semester, course)
+                for semester in args.semester or list(semesters)[:1]
+                for course in args.course or list(courses)
+            ]
+        if journal is not None:
+            journal.plan(jobs)
+
+    pipeline = crawl_pipeline(
+        fetch, args.fetch_workers, args.parse_workers, args.queue_size
+    )
+    scheduler = Scheduler(
+        args.priority or list(DEFAULT_PRIORITIES),
+        refresh_interval=args.refresh_interval,
+    )
+    with CatalogStore(args.db) as store:
+        jobs = scheduler.order(jobs, store.crawled_at())
+
+        def sink(job: Job, modules: list[Module]):
+            store.upsert(job[0], job[1], modules)
+
+        if journal is None:
+            failures, skipped = split_skipped(crawl(jobs, sink, pipeline))
+        else:
+            with journal:
+                failures, skipped = split_skipped(
+                    crawl(jobs, journal.sink(sink), pipeline)
+                )
+                # skipped jobs stay pending, to be crawled on resume
+                journal.record_failures(failures)
+    if manifest is not None and not failures and not skipped:
+        # new options filtered out of the crawl stay new until crawled
+        write_manifest(args.manifest, crawled_manifest(manifest, changes, jobs))
+    if archive is not None:
+        archive.close()
+    if hedger is not None:
+        hedger.close()
+        print(f"Hedged {hedger.hedges}/{hedger.fetches} fetches, won {hedger.wins}.")
+    for failure in failures:
+        print(f"Failed {failure.key} at {failure.stage}: {failure.error!r}")
+    if skipped:
+        print(f"Skipped {len(skipped)} course listings past the time budget.")
+    crawled = len(jobs) - len(failures) - len(skipped)
+    print(f"Crawled {crawled}/{len(jobs)} course listings.")
+
+
+if __name__ == "__main__":
+    main()
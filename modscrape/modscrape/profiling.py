@@ -0,0 +1,279 @@
+#
+# Modscrape
+# Profiling
+# Opt-in CPU & memory profiling of scraper runs with collapsed stack output
+#
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from os import PathLike
+from pathlib import Path
+from types import FrameType
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TypeVar, Union
+
+# max no. of frames tracemalloc records per allocation
+MAX_ALLOC_FRAMES = 32
+# environment variable holding an output directory to profile CLI runs into
+PROFILE_ENV = "MODSCRAPE_PROFILE"
+# environment variable selecting the profiling mode of CLI runs
+PROFILE_MODE_ENV = "MODSCRAPE_PROFILE_MODE"
+
+CPROFILE = "cprofile"
+SAMPLE = "sample"
+
+if TYPE_CHECKING:
+    import argparse
+
+T = TypeVar("T")
+
+
+def frame_name(filename: str, name: str, lineno: int) -> str:
+    """Name a stack frame in collapsed stack output."""
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def collapse(stacks: Counter) -> str:
+    """Render stacks counts in the collapsed (folded) stack format for flamegraphs.
+
+    Args:
+        stacks: Counts (eg. samples or bytes) of each stack, with each stack
+            a tuple of frame names from the outermost to innermost frame.
+    Returns:
+        One line of ';' separated frame names & the count per stack.
+    """
+    return "".join(
+        f"{';'.join(stack)} {count}\n" for stack, count in sorted(stacks.items())
+    )
+
+
+class Sampler(threading.Thread):
+    """Periodically samples the stacks of all other threads.
+
+    Unlike deterministic profiling, sampling has a fixed overhead that does
+    not grow with the no. of function calls, suiting long crawls.
+    """
+
+    def __init__(self, interval: float):
+        """Create a sampler taking samples every interval seconds."""
+        super().__init__(name="modscrape-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != self.ident:
+                    self.stacks[self._stack(frame)] += 1
+
+    @staticmethod
+    def _stack(frame: Optional[FrameType]) -> tuple[str, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(
+                frame_name(code.co_filename, code.co_name, code.co_firstlineno)
+            )
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Profiler:
+    """Opt-in CPU & memory profiler for scraper runs.
+
+    Memory allocations are always traced with tracemalloc. CPU is profiled
+    either deterministically with cProfile, which only profiles code running
+    in profiled() functions or profile() blocks, or by periodically sampling
+    the stacks of all threads. cProfile only profiles the thread enabling it,
+    so each thread entering a profile() block gets its own profile, merged
+    when profiling stops.
+
+    Outputs written to the output directory when profiling stops:
+    - cpu.pstats & cpu_top.txt: cProfile stats & top functions (cprofile mode).
+    - cpu.collapsed: collapsed stack samples for flamegraphs (sample mode).
+    - alloc.collapsed: collapsed stacks of live allocations, in bytes.
+    - alloc_top.txt: top allocation sites by size.
+    """
+
+    def __init__(self) -> None:
+        self.output_dir: Optional[Path] = None
+        self.top = 20
+        # cProfile profile of each thread by thread id, None unless in cprofile mode
+        self.cprofiles: Optional[dict[int, cProfile.Profile]] = None
+        self.cprofiles_lock = threading.Lock()
+        self.sampler: Optional[Sampler] = None
+        # no. of profile() blocks on the stack of each thread
+        self.depths = threading.local()
+
+    @property
+    def active(self) -> bool:
+        return self.output_dir is not None
+
+    def start(
+        self,
+        output_dir: Union[str, PathLike],
+        mode: str = CPROFILE,
+        interval: float = 0.005,
+        top: int = 20,
+        frames: int = MAX_ALLOC_FRAMES,
+    ):
+        """Start profiling, writing outputs to the given directory on stop().
+
+        Args:
+            output_dir: Directory to write profiling outputs to.
+            mode: CPU profiling mode, either CPROFILE or SAMPLE.
+            interval: Seconds between stack samples in SAMPLE mode.
+            top: No. of top functions & allocation sites to report.
+            frames: Max no. of frames tracemalloc records per allocation.
+                Recording fewer frames makes memory tracing cheaper.
+        Raises:
+            ValueError: If the given mode is not supported.
+            RuntimeError: If profiling has already started.
+        """
+        if mode not in [CPROFILE, SAMPLE]:
+            raise ValueError(f"Expected profiling mode {CPROFILE} or {SAMPLE}.")
+        if self.active:
+            raise RuntimeError("Profiling has already started.")
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.top = top
+        tracemalloc.start(frames)
+        if mode == CPROFILE:
+            self.cprofiles = {}
+        else:
+            self.sampler = Sampler(interval)
+            self.sampler.start()
+
+    def stop(self):
+        """Stop profiling & write profiling outputs. Does nothing if not profiling."""
+        if self.output_dir is None:
+            return
+        output_dir = self.output_dir
+        if self.cprofiles is not None:
+            with self.cprofiles_lock:
+                cprofiles = list(self.cprofiles.values())
+            report = io.StringIO()
+            stats = pstats.Stats(*cprofiles, stream=report)
+            stats.dump_stats(output_dir / "cpu.pstats")
+            stats.sort_stats("cumulative").print_stats(self.top)
+            (output_dir / "cpu_top.txt").write_text(report.getvalue())
+        if self.sampler is not None:
+            self.sampler.stop()
+            (output_dir / "cpu.collapsed").write_text(collapse(self.sampler.stacks))
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocs: Counter = Counter()
+        for stat in snapshot.statistics("traceback"):
+            # tracemalloc orders frames from the oldest to the most recent
+            stack = tuple(
+                f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback
+            )
+            allocs[stack] += stat.size
+        (output_dir / "alloc.collapsed").write_text(collapse(allocs))
+        (output_dir / "alloc_top.txt").write_text(
+            "".join(f"{s}\n" for s in snapshot.statistics("lineno")[: self.top])
+        )
+
+        self.output_dir, self.cprofiles, self.sampler = None, None, None
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        """Profile the enclosed block with cProfile, if profiling in cprofile mode."""
+        cprofiles = self.cprofiles
+        depth = getattr(self.depths, "depth", 0)
+        # cProfile cannot be enabled while already enabled
+        if cprofiles is None or depth > 0:
+            yield
+            return
+        cprofile: Optional[cProfile.Profile]
+        with self.cprofiles_lock:
+            cprofile = cprofiles.setdefault(threading.get_ident(), cProfile.Profile())
+        try:
+            cprofile.enable()
+        except ValueError:
+            # Python 3.12+ allows a single enabled profile across all threads:
+            # blocks entered while another thread profiles are left out
+            cprofile = None
+        if cprofile is None:
+            yield
+            return
+        self.depths.depth = 1
+        try:
+            yield
+        finally:
+            cprofile.disable()
+            self.depths.depth = 0
+
+    @contextmanager
+    def running(
+        self, output_dir: Optional[Union[str, PathLike]], mode: str, interval: float
+    ) -> Iterator[None]:
+        """Profile the enclosed block if given an output directory, see start().
+
+        Outputs are written even if the block raises.
+        """
+        if output_dir is None:
+            yield
+            return
+        self.start(output_dir, mode, interval)
+        try:
+            with self.profile():
+                yield
+        finally:
+            self.stop()
+
+
+# profiler used by the scraper, only active once started
+profiler = Profiler()
+
+
+def profiled(func: Callable[..., T]) -> Callable[..., T]:
+    """Decorate the given function to be profiled by cProfile when profiling."""
+
+    @wraps(func)
+    def profiled_func(*args, **kwargs) -> T:
+        if profiler.cprofiles is None:
+            return func(*args, **kwargs)
+        with profiler.profile():
+            return func(*args, **kwargs)
+
+    return profiled_func
+
+
+def add_profile_arguments(arg_parser: "argparse.ArgumentParser"):
+    """Add the options of profiling a run to the given CLI's argument parser.
+
+    Profiling defaults to the PROFILE_ENV & PROFILE_MODE_ENV environment
+    variables, so existing scripts can be profiled without editing them.
+    """
+    arg_parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        default=os.environ.get(PROFILE_ENV),
+        help=f"Profile the run, writing outputs to DIR. Defaults to ${PROFILE_ENV}.",
+    )
+    arg_parser.add_argument(
+        "--profile-mode",
+        choices=[CPROFILE, SAMPLE],
+        default=os.environ.get(PROFILE_MODE_ENV, CPROFILE),
+        help="Profile CPU deterministically with cProfile or by sampling stacks.",
+    )
+    arg_parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=0.005,
+        help="Seconds between stack samples in sample mode.",
+    )
@@ -0,0 +1,199 @@
+#
+# Modscrape
+# Restriction
+# Interval index over course & admission year restrictions of modules
+#
+
+from bisect import bisect_right
+from itertools import product
+from typing import Iterable, Optional
+
+from .module import Course, Module
+
+# Key restrictions are indexed under: (course, alternate course, direct entry)
+RestrictionKey = tuple[str, Optional[str], Optional[bool]]
+# admission year restrictions ("Admyr") apply to students of all courses
+ADMYR_KEY: RestrictionKey = ("Admyr", None, None)
+
+
+class YearSegments:
+    """Static interval index over admission year ranges labelled with module codes.
+
+    The admission years are split into elementary segments at every interval
+    boundary, each storing the set of module codes whose intervals cover it.
+    Stabbing queries (which intervals contain year Y) then take a single
+    binary search over the segment boundaries.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[int, int, str]]):
+        """Build the index from the given intervals.
+
+        Args:
+            intervals: Inclusive (from year, to year, module code) intervals.
+        """
+        intervals = list(intervals)
+        # segment i spans years [bounds[i], bounds[i + 1])
+        self.bounds = sorted(
+            {lo for lo, _, _ in intervals} | {hi + 1 for _, hi, _ in intervals}
+        )
+        segments: list[set[str]] = [set() for _ in self.bounds]
+        for lo, hi, code in intervals:
+            for i in range(
+                bisect_right(self.bounds, lo) - 1, bisect_right(self.bounds, hi)
+            ):
+                segments[i].add(code)
+        self.segments = [frozenset(s) for s in segments]
+
+    def stab(self, year: int) -> frozenset[str]:
+        """Find the module codes whose intervals contain the given year.
+
+        Args:
+            year: Admission year to look up.
+        Returns:
+            Module codes with an interval containing the year.
+        """
+        i = bisect_right(self.bounds, year) - 1
+        return self.segments[i] if i >= 0 else frozenset()
+
+
+def _index(
+    restrictions: Iterable[tuple[RestrictionKey, int, int, str]]
+) -> dict[RestrictionKey, YearSegments]:
+    """Group (key, from year, to year, module code) restrictions into YearSegments by key."""
+    by_key: dict[RestrictionKey, list[tuple[int, int, str]]] = {}
+    for key, lo, hi, code in restrictions:
+        by_key.setdefault(key, []).append((lo, hi, code))
+    return {key: YearSegments(intervals) for key, intervals in by_key.items()}
+
+
+def _key(course: Course) -> RestrictionKey:
+    return (course.course, course.alt_course, course.is_direct_entry)
+
+
+class RestrictionIndex:
+    """Index of the courses & admission years modules are not available to.
+
+    Restrictions are indexed by (course, alternate course, direct entry) as
+    listed on the module eg. "ENE(2019-onwards)(Direct Entry)" is indexed
+    under ("ENE", None, True). A student's programme is matched against
+    restrictions that either leave the alternate course / direct entry
+    unspecified or specify the same value as the student.
+    """
+
+    def __init__(self, modules: Iterable[Module]):
+        """Build the restriction index over the given modules.
+
+        Args:
+            modules: Modules to index course & admission year restrictions for.
+        """
+        modules = list(modules)
+        self.codes = frozenset(m.code.code for m in modules)
+        self.rejects = _index(
+            [
+                (_key(c), *c.year_range(), m.code.code)
+                for m in modules
+                for c in m.rejects_courses
+            ]
+            + [
+                (ADMYR_KEY, *c.year_range(), m.code.code)
+                for m in modules
+                for c in m.rejects_courses_with
+            ]
+        )
+        self.rejects_pe = _index(
+            [
+                (_key(c), *c.year_range(), m.code.code)
+                for m in modules
+                for c in m.unavailable_as_pe
+            ]
+        )
+
+    @staticmethod
+    def _lookup(
+        index: dict[RestrictionKey, YearSegments],
+        keys: Iterable[RestrictionKey],
+        year: int,
+    ) -> frozenset[str]:
+        closed: frozenset[str] = frozenset()
+        for key in keys:
+            if key in index:
+                closed |= index[key].stab(year)
+        return closed
+
+    @staticmethod
+    def _keys(
+        course: str, alt_course: Optional[str], is_direct_entry: Optional[bool]
+    ) -> list[RestrictionKey]:
+        return [
+            (course, alt, entry)
+            for alt, entry in product({None, alt_course}, {None, is_direct_entry})
+        ]
+
+    def closed_modules(
+        self,
+        course: str,
+        admit_year: int,
+        alt_course: Optional[str] = None,
+        is_direct_entry: Optional[bool] = None,
+    ) -> frozenset[str]:
+        """Find all modules not available to students of the given programme.
+
+        Args:
+            course: Course code of the student's programme eg. "EEE".
+            admit_year: Year the student was admitted into the programme.
+            alt_course: Alternate course of the programme eg. "IMS" for "ME(IMS)".
+            is_direct_entry: Whether the student was admitted via direct entry.
+        Returns:
+            Codes of modules closed to the student's programme.
+        """
+        keys = self._keys(course, alt_course, is_direct_entry) + [ADMYR_KEY]
+        return self._lookup(self.rejects, keys, admit_year)
+
+    def closed_as_pe(
+        self,
+        course: str,
+        admit_year: int,
+        alt_course: Optional[str] = None,
+        is_direct_entry: Optional[bool] = None,
+    ) -> frozenset[str]:
+        """Find all modules not available as PE to students of the given programme.
+
+        Args:
+            course: Course code of the student's programme eg. "REP".
+            admit_year: Year the student was admitted into the programme.
+            alt_course: Alternate course of the programme eg. "ASEN" for "REP(ASEN)".
+            is_direct_entry: Whether the student was admitted via direct entry.
+        Returns:
+            Codes of modules that cannot be taken as PE by the student's programme.
+        """
+        keys = self._keys(course, alt_course, is_direct_entry)
+        return self._lookup(self.rejects_pe, keys, admit_year)
+
+    def is_available(
+        self,
+        code: str,
+        course: str,
+        admit_year: int,
+        alt_course: Optional[str] = None,
+        is_direct_entry: Optional[bool] = None,
+    ) -> bool:
+        """Check if the given module is available to students of the given programme.
+
+        Args:
+            code: Module code of the module to check.
+            course: Course code of the student's programme eg. "EEE".
+            admit_year: Year the student was admitted into the programme.
+            alt_course: Alternate course of the programme eg. "IMS" for "ME(IMS)".
+            is_direct_entry: Whether the student was admitted via direct entry.
+        Returns:
+            True if the module is available, False otherwise.
+        Raises:
+            KeyError: If the module code is not in the index.
+        """
+        if code not in self.codes:
+            raise KeyError(f"Module {code} not in restriction index.")
+        # test each stabbed set rather than building their union
+        for key in self._keys(course, alt_course, is_direct_entry) + [ADMYR_KEY]:
+            if key in self.rejects and code in self.rejects[key].stab(admit_year):
+                return False
+        return True
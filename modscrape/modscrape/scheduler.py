@@ -0,0 +1,141 @@
+#
+# Modscrape
+# Scheduler
+# Orders crawl jobs by priority & staleness, crawling within a time budget
+#
+
+import time
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Callable, Iterable, Mapping, Optional
+
+from .pipeline import Failure, Job
+
+
+@dataclass
+class Priority:
+    """Weight of the course listings with courses matching a glob pattern."""
+
+    # fnmatch style pattern matched against course options eg. "CSC;;*"
+    pattern: str
+    weight: float
+
+
+# core programmes (eg. "CSC;;1;F") before minors, BDEs & other listings
+DEFAULT_PRIORITIES = [Priority("*;F", 4.0)]
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of fetching a job once the crawl's deadline has passed."""
+
+
+@dataclass
+class Scheduler:
+    """Orders (semester, course) crawl jobs, most important & stale first.
+
+    Each job is scored by the product of its priority & its staleness:
+    - priority: weight of the highest weighted Priority matching the course
+        (1 if none match), decayed for each semester older than the latest.
+    - staleness: time since the listing was last crawled as a fraction of
+        refresh_interval, capped at 1. Listings never crawled are fully stale.
+    So a freshly crawled core listing waits behind stale minors, while among
+    stale listings the current semester's core programmes go first.
+    """
+
+    priorities: list[Priority] = field(default_factory=lambda: list(DEFAULT_PRIORITIES))
+    # factor the priority of a job is scaled by for each semester it is behind
+    semester_decay: float = 0.5
+    # seconds since the last crawl after which a listing is fully stale
+    refresh_interval: float = 24 * 60 * 60
+
+    def priority(self, job: Job, semesters: list[str]) -> float:
+        """Priority of the given job, given the semesters crawled latest first."""
+        weight = max(
+            [p.weight for p in self.priorities if fnmatchcase(job[1], p.pattern)],
+            default=1.0,
+        )
+        return weight * self.semester_decay ** semesters.index(job[0])
+
+    def staleness(
+        self, job: Job, last_crawled: Mapping[Job, float], now: float
+    ) -> float:
+        """Staleness of the given job from 0 (just crawled) to 1 (fully stale)."""
+        if job not in last_crawled:
+            return 1.0
+        return min(max(now - last_crawled[job], 0) / self.refresh_interval, 1.0)
+
+    def order(
+        self,
+        jobs: Iterable[Job],
+        last_crawled: Optional[Mapping[Job, float]] = None,
+        now: Optional[float] = None,
+    ) -> list[Job]:
+        """Order the given jobs by descending score.
+
+        Args:
+            jobs: (semester, course) jobs to order. Duplicates are dropped.
+            last_crawled: Unix time each job was last crawled
+                (eg. CatalogStore.crawled_at()). Jobs not given were never crawled.
+            now: Unix time to measure staleness at, defaults to the current time.
+        Returns:
+            Jobs ordered by descending score, ties broken by the longest time
+            since the last crawl, then by the order given.
+        """
+        jobs = list(dict.fromkeys(jobs))
+        last_crawled = last_crawled or {}
+        now = time.time() if now is None else now
+        # semester options (eg. "2023_1") sort chronologically
+        semesters = sorted({semester for semester, _ in jobs}, reverse=True)
+
+        def key(job: Job) -> tuple[float, float]:
+            score = self.priority(job, semesters) * self.staleness(
+                job, last_crawled, now
+            )
+            return (-score, last_crawled.get(job, float("-inf")))
+
+        return sorted(jobs, key=key)
+
+
+def deadline_fetcher(
+    fetch: Callable[[str, str], str], deadline: float
+) -> Callable[[str, str], str]:
+    """Wrap the given fetch to skip jobs once the given deadline has passed.
+
+    Fetches already started run to completion & their listings are still
+    parsed & written, so a crawl cut short by the deadline writes whole
+    listings only: jobs are either crawled in full or skipped.
+
+    Args:
+        fetch: Fetches course content HTML for a semester & course.
+        deadline: time.monotonic() time after which no new fetches are started.
+    Returns:
+        Fetch raising DeadlineExceeded instead of fetching past the deadline.
+    """
+
+    def fetch_within(semester: str, course: str) -> str:
+        if time.monotonic() >= deadline:
+            raise DeadlineExceeded(f"Skipped {semester} {course}: deadline passed.")
+        return fetch(semester, course)
+
+    return fetch_within
+
+
+def split_skipped(
+    failures: Iterable[Failure[Job]],
+) -> tuple[list[Failure[Job]], list[Job]]:
+    """Split crawl failures into genuine failures & jobs skipped by the deadline."""
+    failed, skipped = [], []
+    for failure in failures:
+        if isinstance(failure.error, DeadlineExceeded):
+            skipped.append(failure.key)
+        else:
+            failed.append(failure)
+    return failed, skipped
+
+
+def parse_priority(text: str) -> Priority:
+    """Parse a Priority from PATTERN=WEIGHT text eg. "*;F=4"."""
+    pattern, sep, weight = text.rpartition("=")
+    if not sep or not pattern:
+        raise ValueError(f"Expected PATTERN=WEIGHT, got {text!r}.")
+    return Priority(pattern, float(weight))
@@ -0,0 +1,281 @@
+#
+# Modmap
+# Modscrape Module Scraper
+#
+
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, Optional, cast
+
+from .lexer import lex
+from .metrics import metrics
+from .module import Module
+from .parser import ParseException, parse
+from .profiling import add_profile_arguments, profiled, profiler
+from .singleflight import SingleFlight
+from .tok import Token
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+
+COURSE_CONTENT_URL = "https://wis.ntu.edu.sg/webexe/owa/aus_subj_cont"
+
+# in-flight scrapes of (semester, course) listings, shared by concurrent callers
+_scrapes: SingleFlight[tuple[str, str], list[Module]] = SingleFlight()
+
+
+def extract_options(page: "BeautifulSoup", name: str) -> Dict[str, str]:
+    """Extract options from the select element with the given name attribute.
+
+    Args:
+        page: Page to extract select options from.
+        name: 'name' attribute assigned to the select to extract options from.
+    Returns:
+        Mapping of  option 'value' attribute as key to option text as value.
+    """
+    select = cast("Tag", page.find("select", attrs={"name": name}))
+    return {o.attrs["value"]: o.string.rstrip() for o in select.find_all("option")}
+
+
+def get_options() -> tuple[Dict[str, str], Dict[str, str]]:
+    """Get the semesters & courses listed on the NTU course content main page.
+
+    Returns:
+        Tuple of semester options & course options, each a mapping of option
+        value (eg. "2023_1", "CSC;;1;F") to option text.
+    """
+    import requests
+
+    with requests.get(f"{COURSE_CONTENT_URL}.main") as response:
+        return parse_options(response.content.decode())
+
+
+def parse_options(main_html: str) -> tuple[Dict[str, str], Dict[str, str]]:
+    """Parse the semesters & courses listed in the given main page HTML.
+
+    Returns:
+        Tuple of semester options & course options, as in get_options().
+    """
+    from bs4 import BeautifulSoup
+
+    # lxml parser is used to handle malformed html (eg. unclosed tags)
+    mainpage = BeautifulSoup(main_html, "lxml")
+    return (
+        extract_options(mainpage, "acadsem"),
+        extract_options(mainpage, "r_course_yr"),
+    )
+
+
+def get_course_content(semester: str, course: str) -> str:
+    """Get course content HTML for the given semester & course.
+
+    See NTU course Content Site for options
+
+    Args:
+        semester: Academic semester to retrieve course content for.
+        course: Course to retrieve course content for.
+    Returns:
+        Course content HTML retrieved from NTU course content site.
+    """
+    # deferred so that importing the package does not pay for requests
+    import requests
+
+    year, term = semester.split("_")
+    with metrics.time("fetch"), tracer.span(
+        "fetch", acadsem=semester, course=course
+    ), requests.post(
+        f"{COURSE_CONTENT_URL}.main_display1",
+        {
+            # for some reason, the client side post request sends 'acadsem'
+            # we emulate that behavior here.
+            "acadsem": [
+                semester,
+                semester,
+            ],
+            "r_course_yr": course,
+            "r_subj_code": "Enter+Keywords+or+Course+Code",
+            "boption": "CLoad",
+            "acad": year,
+            "semester": term,
+        },
+    ) as response:
+        metrics.count("pages")
+        metrics.count("bytes_fetched", len(response.content))
+        return response.content.decode()
+
+
+@profiled
+def scrape_modules(content_html: str) -> list[Module]:
+    """Scrape modules from the given Course Content HTML.
+
+    Args:
+        content_html: HTML from NTU course countent website to scrape modules from.
+    Returns:
+        List of scraped modules.
+    Raises:
+        ValueError: If the given HTML contains no <table> element to scrape course content from.
+    """
+    # deferred so that parse only consumers do not pay for bs4 & lxml
+    from bs4 import BeautifulSoup
+
+    with metrics.time("html_parse"), tracer.span("html_parse"):
+        mod_listing = BeautifulSoup(content_html, "lxml")
+    with metrics.time("row_extract"), tracer.span("row_extract"):
+        lines = extract_lines(mod_listing)
+    with metrics.time("lex"), tracer.span("lex"):
+        tokens = lex_lines(lines)
+    with metrics.time("parse"), tracer.span("parse"):
+        return parse_tokens(tokens)
+
+
+def lex_lines(lines: list[str]) -> list[list[Token]]:
+    """Lex the given extracted lines, counting the tokens lexed."""
+    tokens = lex(lines)
+    if metrics.enabled:
+        metrics.count("tokens", sum([len(line) for line in tokens]))
+    return tokens
+
+
+def parse_tokens(tokens: list[list[Token]]) -> list[Module]:
+    """Parse modules from the given tokens, counting modules & parse failures."""
+    try:
+        modules = parse(tokens)
+    except ParseException as e:
+        metrics.count("parse_failures")
+        raise e
+    metrics.count("modules", len(modules))
+    return modules
+
+
+def scrape_course(semester: str, course: str) -> list[Module]:
+    """Fetch & scrape modules of the given semester & course.
+
+    Concurrent calls for the same semester & course share a single fetch &
+    parse, returning the same list of modules, which callers should not modify.
+
+    Args:
+        semester: Academic semester to scrape modules for eg. "2023_1".
+        course: Course to scrape modules for eg. "CSC;;1;F".
+    Returns:
+        List of scraped modules.
+    """
+    return _scrapes.do(
+        (semester, course),
+        lambda: scrape_modules(get_course_content(semester, course)),
+    )
+
+
+def extract_lines(mod_listing: "BeautifulSoup") -> list[str]:
+    """Extract lines of text to lex from the given Course Content page.
+
+    Args:
+        mod_listing: Parsed HTML page from NTU course content website.
+    Returns:
+        Text of each non empty table row of the modules in the page.
+    Raises:
+        ValueError: If the page contains no <table> element to scrape course content from.
+    """
+    mod_tables = mod_listing.select("table")
+    if len(mod_tables) == 1:
+        # minor, bde & other non core modules: modules is encoded in a single table
+        table = mod_tables[0]
+        mod_rows: list[list["Tag"]] = [[]]
+        # skip the first <td> as it contains columns headers
+        for tr in table.select("tr")[1:]:
+            # <td> with nbsp (non-breaking space) delimits next module
+            if any([True for td in tr.children if td.text == "\xa0"]):
+                mod_rows.append([])
+            mod_rows[-1].append(tr)
+        # exclude empty last row
+        mod_rows = mod_rows[:-1]
+    elif len(mod_tables) > 1:
+        # core modules: each module is encoded as table
+        mod_rows = [[tr for tr in table.select("tr")] for table in mod_tables]
+    else:
+        raise ValueError("Missing <table> to scrape modules from.")
+    if metrics.enabled:
+        metrics.count("rows", sum([len(rows) for rows in mod_rows]))
+
+    lines = []
+    for rows in mod_rows:
+        individual = []
+        for row in rows:
+            cols = [td.text.strip() for td in cast("Tag", row).children]
+            individual.append(cols)
+        lines.append(individual)
+
+    unnested = concat_nested(lines)
+    nonempty = filter_empty(unnested)
+    return [" ".join(line) for line in nonempty]
+
+
+# Takes a nested list and concatenates inner list
+# e.g. [[[a], [b]]] -> [[a, b]]
+def concat_nested(lines: list[list[list[str]]]) -> list[list[str]]:
+    return [list(chain(*line)) for line in lines]
+
+
+# Takes a nested list and filters out all empty strings
+# e.g. [[a, b, ''], [c, '']] -> [[a, b], [c]]
+def filter_empty(lines: list[list[str]]) -> list[list[str]]:
+    return [list(filter(None, line)) for line in lines]
+
+
+def main(argv: Optional[list[str]] = None):
+    """Scrape modules of a course & semester from NTU, printing the modules."""
+    import argparse
+    from pprint import pprint
+
+    arg_parser = argparse.ArgumentParser(description="Scrape modules from NTU.")
+    arg_parser.add_argument("--semester", default="2023_1")
+    arg_parser.add_argument("--course", default="CSC;;1;F")
+    arg_parser.add_argument(
+        "--out", metavar="PATH", help="Write the modules as catalog JSON to PATH."
+    )
+    arg_parser.add_argument(
+        "--fulltext",
+        action="store_true",
+        help="Also write a full text index of the modules alongside --out.",
+    )
+    add_profile_arguments(arg_parser)
+    arg_parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Trace the run, writing Chrome Trace Event JSON to PATH on exit.",
+    )
+    arg_parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Record metrics of the run, writing them to PATH on exit: in the "
+        "Prometheus text format if PATH ends in .prom, otherwise as JSON.",
+    )
+    args = arg_parser.parse_args(argv)
+    if args.fulltext and args.out is None:
+        arg_parser.error("--fulltext requires --out.")
+
+    # outputs are written even if the scrape fails
+    with metrics.recording(args.metrics), tracer.recording(
+        args.trace
+    ), profiler.running(args.profile, args.profile_mode, args.profile_interval):
+        # scrape semesters & courses from main page
+        semesters, courses = get_options()
+        if args.semester not in semesters:
+            arg_parser.error(f"Unknown semester {args.semester}.")
+        if args.course not in courses:
+            arg_parser.error(f"Unknown course {args.course}.")
+
+        modules = scrape_course(args.semester, args.course)
+    if args.out is None:
+        pprint(modules)
+        return
+    from .module import write_catalog
+
+    write_catalog(modules, args.out)
+    if args.fulltext:
+        from .fulltext import index_catalog
+
+        print(f"Wrote full text index to {index_catalog(modules, args.out)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#
+# Modscrape
+# Server
+# Asyncio HTTP server answering module lookups from an in-memory catalog
+#
+
+import argparse
+import asyncio
+import json
+import logging
+import signal
+from dataclasses import asdict
+from hashlib import blake2b
+from http import HTTPStatus
+from os import PathLike
+from typing import Any, Optional, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from .module import Module, module_from_dict
+from .restriction import RestrictionIndex
+
+# Module fields that can be filtered on & the type to parse filter values as
+FILTER_FIELDS = {
+    "au": float,
+    "needs_year": int,
+    "is_pass_fail": bool,
+    "not_offered_as_bde": bool,
+    "not_offered_as_ue": bool,
+}
+# depth beyond which prerequisite trees are truncated
+MAX_TREE_DEPTH = 8
+# maximum no. of rendered responses cached per catalog
+MAX_CACHED_RESPONSES = 4096
+
+logger = logging.getLogger(__name__)
+
+
+class RequestError(Exception):
+    """Indicates a request that could not be answered, with the HTTP status to reply."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_value(field: str, value: str) -> Any:
+    """Parse the given filter query value as the type of the given Module field."""
+    if field not in FILTER_FIELDS:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Cannot filter on {field}.")
+    if FILTER_FIELDS[field] is bool:
+        if value.lower() not in ["true", "false"]:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Expected boolean {field}.")
+        return value.lower() == "true"
+    try:
+        return FILTER_FIELDS[field](value)
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid {field}: {value}")
+
+
+class CatalogIndex:
+    """Read only lookup indexes over a catalog of modules.
+
+    Indexes, apart from the rendered response cache, are never mutated after
+    they are built: reloading the catalog builds a new CatalogIndex & swaps
+    it in, so in flight requests keep a consistent view of the catalog.
+    """
+
+    def __init__(self, modules: list[Module], version: str):
+        """Build lookup indexes over the given catalog.
+
+        Args:
+            modules: Catalog of modules to index.
+            version: Version of the catalog, used as the ETag of responses.
+        """
+        self.version = version
+        self.modules = {m.code.code: m for m in modules}
+        self.codes = sorted(self.modules)
+        # module codes by (field, value) for each filterable field
+        self.by_field: dict[tuple[str, Any], set[str]] = {}
+        for module in modules:
+            for field in FILTER_FIELDS:
+                key = (field, getattr(module, field))
+                self.by_field.setdefault(key, set()).add(module.code.code)
+        self.restrictions = RestrictionIndex(modules)
+        # rendered response bodies by request target
+        self.responses: dict[str, bytes] = {}
+
+    def prerequisite_tree(
+        self, code: str, depth: int = 0, path: frozenset[str] = frozenset()
+    ) -> dict:
+        """Expand the prerequisites of the given module into a tree.
+
+        Args:
+            code: Module code of the module at the root of the tree.
+            depth: Depth of the module in the tree.
+            path: Module codes of the module's ancestors, used to cut cycles.
+        Returns:
+            Tree node with the module's code & its prerequisite groups, each
+            a list of tree nodes of the modules in the group. Nodes of modules
+            outside the catalog, in a cycle or too deep are left unexpanded.
+        """
+        module = self.modules.get(code)
+        if module is None or code in path or depth >= MAX_TREE_DEPTH:
+            return {"code": code, "needs": []}
+        path = path | {code}
+        return {
+            "code": code,
+            "needs": [
+                [
+                    {
+                        **self.prerequisite_tree(c.code, depth + 1, path),
+                        "is_corequisite": c.is_corequisite,
+                    }
+                    for c in group
+                ]
+                for group in module.needs_modules
+            ],
+        }
+
+    def filter(self, query: list[tuple[str, str]]) -> list[str]:
+        """Filter modules by the given query parameters.
+
+        Supported parameters are the fields in FILTER_FIELDS matched by value,
+        and 'course' with 'admit_year' (and optionally 'alt_course' &
+        'is_direct_entry') matching modules available to the programme.
+
+        Args:
+            query: Query parameters as (name, value) pairs.
+        Returns:
+            Codes of modules matching all parameters, sorted by code.
+        """
+        params = dict(query)
+        matches = set(self.codes)
+        for name, value in params.items():
+            if name in ["course", "admit_year", "alt_course", "is_direct_entry"]:
+                continue
+            matches &= self.by_field.get((name, parse_value(name, value)), set())
+
+        if "course" in params:
+            try:
+                admit_year = int(params["admit_year"])
+            except (KeyError, ValueError):
+                raise RequestError(
+                    HTTPStatus.BAD_REQUEST, "Expected integer admit_year with course."
+                )
+            is_direct_entry = params.get("is_direct_entry")
+            matches -= self.restrictions.closed_modules(
+                params["course"],
+                admit_year,
+                params.get("alt_course"),
+                None if is_direct_entry is None else is_direct_entry == "true",
+            )
+        return sorted(matches)
+
+    def render(self, target: str) -> bytes:
+        """Render the JSON response body for a GET of the given request target.
+
+        Raises:
+            RequestError: If the target does not exist or has invalid parameters.
+        """
+        if target in self.responses:
+            return self.responses[target]
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        body: Any
+        if parts == ["health"]:
+            body = {"version": self.version, "modules": len(self.modules)}
+        elif parts == ["modules"]:
+            body = self.filter(parse_qsl(url.query))
+        elif len(parts) in [2, 3] and parts[0] == "modules":
+            if parts[1] not in self.modules:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"No module {parts[1]}.")
+            if len(parts) == 2:
+                body = asdict(self.modules[parts[1]])
+            elif parts[2] == "prerequisites":
+                body = self.prerequisite_tree(parts[1])
+            else:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"No route {url.path}.")
+        else:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No route {url.path}.")
+
+        rendered = json.dumps(body).encode()
+        if len(self.responses) >= MAX_CACHED_RESPONSES:
+            self.responses.clear()
+        self.responses[target] = rendered
+        return rendered
+
+
+def load_index(path: Union[str, PathLike]) -> CatalogIndex:
+    """Load the catalog JSON written by write_catalog() into a CatalogIndex.
+
+    The catalog's version is derived from a digest of the catalog JSON.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    return CatalogIndex(
+        [module_from_dict(data) for data in json.loads(raw)],
+        version=blake2b(raw, digest_size=8).hexdigest(),
+    )
+
+
+class CatalogServer:
+    """HTTP/1.1 server answering module lookups from an in-memory catalog.
+
+    Routes:
+    - GET /health: catalog version & no. of modules.
+    - GET /modules?<filters>: codes of modules matching filters, see CatalogIndex.filter().
+    - GET /modules/<code>: module with the given code.
+    - GET /modules/<code>/prerequisites: prerequisite tree of the given module.
+    - POST /reload: reload the catalog from disk without dropping requests.
+
+    GET responses carry the catalog version as their ETag & answer requests
+    with a matching If-None-Match with 304 Not Modified. If a reload fails,
+    the server replies 500 & keeps serving the catalog loaded before.
+    """
+
+    def __init__(self, path: Union[str, PathLike]):
+        """Create a server answering lookups from the catalog at the given path.
+
+        Args:
+            path: Path of the catalog JSON written by write_catalog().
+        """
+        self.path = path
+        self.index = load_index(path)
+
+    async def reload(self) -> str:
+        """Reload the catalog from disk, swapping it in once fully indexed.
+
+        Returns:
+            Version of the reloaded catalog.
+        """
+        # index off the event loop so requests are served during the reload
+        self.index = await asyncio.get_running_loop().run_in_executor(
+            None, load_index, self.path
+        )
+        return self.index.version
+
+    async def respond(
+        self, method: str, target: str, headers: dict[str, str]
+    ) -> tuple[HTTPStatus, bytes, Optional[str]]:
+        """Respond to the given request.
+
+        Returns:
+            Tuple of response status, body & ETag if any.
+        """
+        # pin the index for the whole request in case of a concurrent reload
+        index = self.index
+        try:
+            if method == "POST" and urlsplit(target).path == "/reload":
+                try:
+                    version = await self.reload()
+                except Exception as e:
+                    logger.exception("Failed to reload catalog from %s.", self.path)
+                    raise RequestError(
+                        HTTPStatus.INTERNAL_SERVER_ERROR, f"Failed to reload: {e}"
+                    )
+                return HTTPStatus.OK, json.dumps({"version": version}).encode(), None
+            if method not in ["GET", "HEAD"]:
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"No {method}.")
+            # route first so unknown targets are 404 whatever their validators
+            body = index.render(target)
+            etag = f'"{index.version}"'
+            if etag in headers.get("if-none-match", ""):
+                return HTTPStatus.NOT_MODIFIED, b"", etag
+            return HTTPStatus.OK, body, etag
+        except RequestError as e:
+            return e.status, json.dumps({"error": str(e)}).encode(), None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on the given connection until it is closed."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in [b"\r\n", b"\n", b""]:
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    content_length = int(headers.get("content-length", 0))
+                    if content_length < 0:
+                        raise ValueError(content_length)
+                except ValueError:
+                    # the request body cannot be framed: reply & close
+                    content_length = None
+                if content_length is None:
+                    status, body, etag = (
+                        HTTPStatus.BAD_REQUEST,
+                        json.dumps({"error": "Invalid Content-Length."}).encode(),
+                        None,
+                    )
+                    keep_alive = False
+                else:
+                    # request bodies are not used by any route: discard them
+                    await reader.readexactly(content_length)
+                    status, body, etag = await self.respond(method, target, headers)
+                    keep_alive = (
+                        version == "HTTP/1.1"
+                        and headers.get("connection", "").lower() != "close"
+                    )
+                head = [
+                    f"HTTP/1.1 {status.value} {status.phrase}",
+                    "Content-Type: application/json",
+                    f"Content-Length: {len(body)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ] + ([f"ETag: {etag}"] if etag is not None else [])
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        """Start serving on the given host & port.
+
+        Returns:
+            Started asyncio server, listening on the given host & port.
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def reload_logged(server: CatalogServer):
+    """Reload the given server's catalog, logging rather than raising failures."""
+    try:
+        version = await server.reload()
+    except Exception:
+        logger.exception("Failed to reload catalog from %s.", server.path)
+    else:
+        logger.info("Reloaded catalog version %s.", version)
+
+
+async def serve(path: str, host: str, port: int):
+    server = CatalogServer(path)
+    loop = asyncio.get_running_loop()
+    # reload the catalog on SIGHUP
+    loop.add_signal_handler(
+        signal.SIGHUP, lambda: asyncio.ensure_future(reload_logged(server))
+    )
+    async with await server.start(host, port) as http:
+        await http.serve_forever()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve module lookups over HTTP.")
+    arg_parser.add_argument("catalog", help="Path to catalog JSON to serve.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.catalog, args.host, args.port))
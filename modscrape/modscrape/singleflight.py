@@ -0,0 +1,84 @@
+#
+# Modscrape
+# Single Flight
+# Coalesces concurrent calls for the same key into one in-flight call
+#
+
+import threading
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+from .metrics import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesces concurrent calls for the same key into a single call.
+
+    The first caller of a key (the leader) runs the call, while callers of the
+    same key arriving before it finishes wait & share its result or error.
+    Results are not cached: a call for a key made after the in-flight call
+    finishes runs again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: dict[K, _Call] = {}
+
+    def do(self, key: K, func: Callable[[], V]) -> V:
+        """Call the given function, sharing an in-flight call for the same key.
+
+        Args:
+            key: Identifies calls that return the same result.
+            func: Function called by the leader of the key.
+        Returns:
+            Result of the in-flight call for the key, shared by all its callers.
+        Raises:
+            Exception: Raised by the in-flight call for the key.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+            if call is None:
+                call = self.calls[key] = _Call()
+        if not is_leader:
+            metrics.count("coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+
+def coalesced(func: Callable[..., V]) -> Callable[..., V]:
+    """Wrap the given function to coalesce concurrent calls with equal arguments.
+
+    Calls are keyed by their positional arguments, which must be hashable.
+    """
+    flight: SingleFlight[tuple, V] = SingleFlight()
+
+    @wraps(func)
+    def coalesced_func(*args: Hashable) -> V:
+        return flight.do(args, lambda: func(*args))
+
+    return coalesced_func
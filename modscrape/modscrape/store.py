@@ -0,0 +1,383 @@
+#
+# Modscrape
+# Store
+# SQLite storage backend for scraped module catalogs
+#
+
+import sqlite3
+import time
+from os import PathLike
+from typing import Iterable, Optional, Union
+
+from .module import Course, Module, ModuleCode
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    semester TEXT NOT NULL,
+    code TEXT NOT NULL,
+    misc TEXT NOT NULL,
+    title TEXT NOT NULL,
+    au REAL NOT NULL,
+    needs_year INTEGER,
+    needs_exclusives TEXT NOT NULL,
+    not_offered_as_bde INTEGER NOT NULL,
+    not_offered_as_ue INTEGER NOT NULL,
+    is_pass_fail INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    PRIMARY KEY (semester, code)
+) WITHOUT ROWID;
+-- course listings each module was scraped from
+CREATE TABLE IF NOT EXISTS listings (
+    semester TEXT NOT NULL,
+    course TEXT NOT NULL,
+    code TEXT NOT NULL,
+    PRIMARY KEY (semester, course, code)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS listings_code ON listings (semester, code);
+-- module codes related to a module: 'needs' (prerequisite groups),
+-- 'mutually_exclusive' or 'rejects'
+CREATE TABLE IF NOT EXISTS module_codes (
+    semester TEXT NOT NULL,
+    code TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    -- prerequisite group the related module belongs to, 0 for other relations
+    grp INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    other_code TEXT NOT NULL,
+    is_corequisite INTEGER NOT NULL,
+    misc TEXT NOT NULL,
+    PRIMARY KEY (semester, code, relation, grp, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS module_codes_other
+    ON module_codes (semester, other_code, relation);
+-- courses related to a module: 'rejects', 'rejects_with' (Admyr),
+-- 'unavailable_as_pe' or 'allowed'
+CREATE TABLE IF NOT EXISTS courses (
+    semester TEXT NOT NULL,
+    code TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    course TEXT NOT NULL,
+    is_direct_entry INTEGER,
+    from_year INTEGER,
+    to_year INTEGER,
+    alt_course TEXT,
+    PRIMARY KEY (semester, code, relation, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS courses_course ON courses (semester, course, relation);
+-- unix time each course listing was last crawled
+CREATE TABLE IF NOT EXISTS crawls (
+    semester TEXT NOT NULL,
+    course TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    PRIMARY KEY (semester, course)
+) WITHOUT ROWID;
+"""
+
+UPSERT_MODULE = """
+INSERT INTO modules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (semester, code) DO UPDATE SET
+    misc = excluded.misc,
+    title = excluded.title,
+    au = excluded.au,
+    needs_year = excluded.needs_year,
+    needs_exclusives = excluded.needs_exclusives,
+    not_offered_as_bde = excluded.not_offered_as_bde,
+    not_offered_as_ue = excluded.not_offered_as_ue,
+    is_pass_fail = excluded.is_pass_fail,
+    description = excluded.description
+"""
+DELETE_LISTING = "DELETE FROM listings WHERE semester = ? AND course = ?"
+INSERT_LISTING = "INSERT INTO listings VALUES (?, ?, ?)"
+DELETE_MODULE_CODES = "DELETE FROM module_codes WHERE semester = ? AND code = ?"
+INSERT_MODULE_CODE = "INSERT INTO module_codes VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+DELETE_COURSES = "DELETE FROM courses WHERE semester = ? AND code = ?"
+INSERT_COURSE = "INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+UPSERT_CRAWL = "INSERT OR REPLACE INTO crawls VALUES (?, ?, ?)"
+
+SELECT_MODULE = "SELECT * FROM modules WHERE semester = ? AND code = ?"
+SELECT_MODULE_CODES = """
+SELECT relation, grp, other_code, is_corequisite, misc FROM module_codes
+WHERE semester = ? AND code = ? ORDER BY relation, grp, position
+"""
+SELECT_COURSES = """
+SELECT relation, course, is_direct_entry, from_year, to_year, alt_course FROM courses
+WHERE semester = ? AND code = ? ORDER BY relation, position
+"""
+SELECT_LISTED = (
+    "SELECT code FROM listings WHERE semester = ? AND course = ? ORDER BY code"
+)
+SELECT_CRAWLS = "SELECT semester, course, crawled_at FROM crawls"
+SELECT_SEMESTERS = "SELECT DISTINCT semester FROM modules ORDER BY semester"
+SELECT_NEEDED_BY = """
+SELECT DISTINCT code FROM module_codes
+WHERE semester = ? AND other_code = ? AND relation = 'needs' ORDER BY code
+"""
+SELECT_REJECTED = """
+SELECT code FROM courses
+WHERE semester = :semester AND course = :course AND relation = 'rejects'
+    AND (alt_course IS NULL OR alt_course = :alt_course)
+    AND (is_direct_entry IS NULL OR is_direct_entry = :is_direct_entry)
+    AND (from_year IS NULL OR (
+        from_year <= :year AND :year <= COALESCE(to_year, from_year)
+    ))
+UNION
+SELECT code FROM courses
+WHERE semester = :semester AND relation = 'rejects_with'
+    AND from_year <= :year AND :year <= COALESCE(to_year, from_year)
+ORDER BY code
+"""
+
+COURSE_RELATIONS = ["rejects", "rejects_with", "unavailable_as_pe", "allowed"]
+
+
+def _course_rows(semester: str, module: Module) -> Iterable[tuple]:
+    for relation, courses in zip(
+        COURSE_RELATIONS,
+        [
+            module.rejects_courses,
+            module.rejects_courses_with,
+            module.unavailable_as_pe,
+            module.allowed_courses,
+        ],
+    ):
+        for position, c in enumerate(courses):
+            yield (
+                semester,
+                module.code.code,
+                relation,
+                position,
+                c.course,
+                c.is_direct_entry,
+                c.from_year,
+                c.to_year,
+                c.alt_course,
+            )
+
+
+def _module_code_rows(semester: str, module: Module) -> Iterable[tuple]:
+    related = [
+        ("needs", grp, group) for grp, group in enumerate(module.needs_modules)
+    ] + [
+        ("mutually_exclusive", 0, module.mutually_exclusives),
+        ("rejects", 0, module.rejects_modules),
+    ]
+    for relation, grp, codes in related:
+        for position, c in enumerate(codes):
+            yield (
+                semester,
+                module.code.code,
+                relation,
+                grp,
+                position,
+                c.code,
+                c.is_corequisite,
+                c.misc,
+            )
+
+
+class CatalogStore:
+    """SQLite store of scraped module catalogs across semesters & course listings.
+
+    Modules are normalised into tables keyed by (semester, module code), with
+    prerequisite groups, related module codes & courses stored as child rows.
+    Use as a context manager to close the database connection when done.
+    """
+
+    def __init__(self, path: Union[str, PathLike] = ":memory:"):
+        """Open the catalog store at the given SQLite database path.
+
+        Args:
+            path: Path to the SQLite database, created if it does not exist.
+        """
+        self.db = sqlite3.connect(path)
+        # write ahead log allows readers to query while a catalog is loading
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "CatalogStore":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def upsert(
+        self,
+        semester: str,
+        course: str,
+        modules: list[Module],
+        crawled_at: Optional[float] = None,
+    ):
+        """Insert or update the modules scraped from the given course listing.
+
+        All modules are written in a single transaction with batched statements,
+        together with the time the listing was crawled.
+
+        Args:
+            semester: Academic semester the modules were scraped for eg. "2023_1".
+            course: Course listing the modules were scraped from eg. "CSC;;1;F".
+            modules: Modules scraped from the course listing.
+            crawled_at: Unix time the listing was crawled, defaults to now.
+        """
+        # keep the last of any duplicate modules in the listing
+        modules = list({m.code.code: m for m in modules}.values())
+        keys = [(semester, m.code.code) for m in modules]
+        with self.db:
+            self.db.executemany(
+                UPSERT_MODULE,
+                [
+                    (
+                        semester,
+                        m.code.code,
+                        m.code.misc,
+                        m.title,
+                        m.au,
+                        m.needs_year,
+                        m.needs_exclusives,
+                        m.not_offered_as_bde,
+                        m.not_offered_as_ue,
+                        m.is_pass_fail,
+                        m.description,
+                    )
+                    for m in modules
+                ],
+            )
+            # replace the listing as modules may have left it
+            self.db.execute(DELETE_LISTING, (semester, course))
+            self.db.executemany(
+                INSERT_LISTING, [(semester, course, m.code.code) for m in modules]
+            )
+            # replace child rows wholesale as lists may have shrunk
+            self.db.executemany(DELETE_MODULE_CODES, keys)
+            self.db.executemany(
+                INSERT_MODULE_CODE,
+                [row for m in modules for row in _module_code_rows(semester, m)],
+            )
+            self.db.executemany(DELETE_COURSES, keys)
+            self.db.executemany(
+                INSERT_COURSE,
+                [row for m in modules for row in _course_rows(semester, m)],
+            )
+            self.db.execute(
+                UPSERT_CRAWL,
+                (semester, course, time.time() if crawled_at is None else crawled_at),
+            )
+
+    def module(self, semester: str, code: str) -> Optional[Module]:
+        """Get the module with the given code in the given semester.
+
+        Args:
+            semester: Academic semester to get the module for.
+            code: Module code of the module to get.
+        Returns:
+            Module reconstructed from the store, or None if it is not stored.
+        """
+        row = self.db.execute(SELECT_MODULE, (semester, code)).fetchone()
+        if row is None:
+            return None
+        (
+            _,
+            _,
+            misc,
+            title,
+            au,
+            needs_year,
+            needs_exclusives,
+            not_bde,
+            not_ue,
+            pf,
+            desc,
+        ) = row
+
+        needs_modules: list[list[ModuleCode]] = []
+        related: dict[str, list[ModuleCode]] = {"mutually_exclusive": [], "rejects": []}
+        for relation, grp, other_code, is_corequisite, other_misc in self.db.execute(
+            SELECT_MODULE_CODES, (semester, code)
+        ):
+            module_code = ModuleCode(other_code, bool(is_corequisite), other_misc)
+            if relation == "needs":
+                while len(needs_modules) <= grp:
+                    needs_modules.append([])
+                needs_modules[grp].append(module_code)
+            else:
+                related[relation].append(module_code)
+
+        courses: dict[str, list[Course]] = {r: [] for r in COURSE_RELATIONS}
+        for relation, *course in self.db.execute(SELECT_COURSES, (semester, code)):
+            course_code, is_direct_entry, from_year, to_year, alt_course = course
+            courses[relation].append(
+                Course(
+                    course_code,
+                    None if is_direct_entry is None else bool(is_direct_entry),
+                    from_year,
+                    to_year,
+                    alt_course,
+                )
+            )
+
+        return Module(
+            code=ModuleCode(code, misc=misc),
+            title=title,
+            au=au,
+            mutually_exclusives=related["mutually_exclusive"],
+            needs_year=needs_year,
+            needs_modules=needs_modules,
+            needs_exclusives=needs_exclusives,
+            rejects_modules=related["rejects"],
+            rejects_courses=courses["rejects"],
+            rejects_courses_with=courses["rejects_with"],
+            unavailable_as_pe=courses["unavailable_as_pe"],
+            allowed_courses=courses["allowed"],
+            not_offered_as_bde=bool(not_bde),
+            not_offered_as_ue=bool(not_ue),
+            is_pass_fail=bool(pf),
+            description=desc,
+        )
+
+    def semesters(self) -> list[str]:
+        """List the academic semesters with modules in the store."""
+        return [s for s, in self.db.execute(SELECT_SEMESTERS)]
+
+    def listed(self, semester: str, course: str) -> list[str]:
+        """List codes of modules scraped from the given course listing."""
+        return [c for c, in self.db.execute(SELECT_LISTED, (semester, course))]
+
+    def crawled_at(self) -> dict[tuple[str, str], float]:
+        """Unix time each (semester, course) listing in the store was last crawled."""
+        return {(s, c): t for s, c, t in self.db.execute(SELECT_CRAWLS)}
+
+    def needed_by(self, semester: str, code: str) -> list[str]:
+        """List codes of modules with the given module in their prerequisites."""
+        return [c for c, in self.db.execute(SELECT_NEEDED_BY, (semester, code))]
+
+    def closed_modules(
+        self,
+        semester: str,
+        course: str,
+        admit_year: int,
+        alt_course: Optional[str] = None,
+        is_direct_entry: Optional[bool] = None,
+    ) -> list[str]:
+        """List codes of modules not available to the given programme.
+
+        Args:
+            semester: Academic semester to list modules for.
+            course: Course code of the student's programme eg. "EEE".
+            admit_year: Year the student was admitted into the programme.
+            alt_course: Alternate course of the programme eg. "IMS" for "ME(IMS)".
+            is_direct_entry: Whether the student was admitted via direct entry.
+        Returns:
+            Codes of modules closed to the programme, sorted by code.
+        """
+        params = {
+            "semester": semester,
+            "course": course,
+            "year": admit_year,
+            "alt_course": alt_course,
+            "is_direct_entry": is_direct_entry,
+        }
+        return [c for c, in self.db.execute(SELECT_REJECTED, params)]
@@ -0,0 +1,269 @@
+#
+# Modscrape
+# Timetables
+# Offline enumeration of clash free timetables of a cohort's module set
+#
+
+import json
+import random
+from dataclasses import dataclass
+from os import PathLike
+from typing import Iterator, Optional, Union
+
+from .occupancy import OccupancyTable
+
+# timetable allocating each module code an index code, as in modschedule
+Timetable = dict[str, str]
+# edge of a node to a node of the next level by picking a group of indexes
+Edge = tuple[int, int]
+
+
+@dataclass
+class TimetableSet:
+    """Every clash free timetable of a set of modules, as a decision diagram.
+
+    Level i of the diagram picks an index of modules[i]. Indexes of a module
+    with identical occupancy are interchangeable, so they are picked together
+    as a group: groups[i][g] lists the index codes of group g of module i.
+    edges[i][n] lists the (group, node) edges from node n of level i to nodes
+    of level i + 1. Level 0 has the root node 0, while every edge of the last
+    level leads to the terminal node 0. An empty set of modules has a single,
+    empty timetable.
+    """
+
+    modules: list[str]
+    groups: list[list[list[str]]]
+    edges: list[list[list[Edge]]]
+
+    def __post_init__(self):
+        # no. of timetables below each node, counting each index of a group
+        counts: list[list[int]] = [[1]]
+        for level in reversed(range(len(self.modules))):
+            below = counts[0]
+            counts.insert(
+                0,
+                [
+                    sum(len(self.groups[level][g]) * below[n] for g, n in node)
+                    for node in self.edges[level]
+                ],
+            )
+        self.counts = counts
+
+    def __len__(self) -> int:
+        """No. of clash free timetables."""
+        # no root node: the root has no completions
+        return self.counts[0][0] if self.counts[0] else 0
+
+    def __iter__(self) -> Iterator[Timetable]:
+        """Iterate every clash free timetable."""
+
+        def walk(level: int, node: int, picked: Timetable) -> Iterator[Timetable]:
+            if level == len(self.modules):
+                yield dict(picked)
+                return
+            module = self.modules[level]
+            for group, child in self.edges[level][node]:
+                for index in self.groups[level][group]:
+                    picked[module] = index
+                    yield from walk(level + 1, child, picked)
+            picked.pop(module, None)
+
+        if len(self):
+            yield from walk(0, 0, {})
+
+    def __contains__(self, timetable: object) -> bool:
+        """Whether the given timetable is a clash free timetable of the set."""
+        if not isinstance(timetable, dict) or set(timetable) != set(self.modules):
+            return False
+        if not len(self):
+            return False
+        node = 0
+        for level, module in enumerate(self.modules):
+            groups = [
+                g
+                for g, indexes in enumerate(self.groups[level])
+                if timetable[module] in indexes
+            ]
+            children = [n for g, n in self.edges[level][node] if g in groups]
+            if not children:
+                return False
+            node = children[0]
+        return True
+
+    def sample(self, rng: Optional[random.Random] = None) -> Timetable:
+        """Pick a clash free timetable uniformly at random.
+
+        Raises:
+            ValueError: If there are no clash free timetables.
+        """
+        if not len(self):
+            raise ValueError("No clash free timetables to sample from.")
+        rng = rng or random.Random()
+        timetable, node = {}, 0
+        for level, module in enumerate(self.modules):
+            below = self.counts[level + 1]
+            edges = self.edges[level][node]
+            weights = [len(self.groups[level][g]) * below[n] for g, n in edges]
+            group, node = rng.choices(edges, weights)[0]
+            timetable[module] = rng.choice(self.groups[level][group])
+        return timetable
+
+    def to_json(self) -> dict:
+        return {"modules": self.modules, "groups": self.groups, "edges": self.edges}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "TimetableSet":
+        return cls(
+            data["modules"],
+            data["groups"],
+            [[[(g, n) for g, n in node] for node in level] for level in data["edges"]],
+        )
+
+
+def enumerate_timetables(table: OccupancyTable, modules: list[str]) -> TimetableSet:
+    """Enumerate every clash free timetable of the given modules.
+
+    Modules are picked depth first, those with the fewest distinct index
+    occupancies first. Partial timetables leaving later modules the same free
+    slots share a node, as do nodes with the same edges.
+
+    Args:
+        table: Occupancy table holding the indexes of the modules.
+        modules: Codes of the modules to allocate an index each.
+    Returns:
+        Set of every clash free timetable of the modules.
+    Raises:
+        ValueError: If a module has no indexes in the table.
+    """
+    groups: dict[str, dict[int, list[str]]] = {}
+    for module in dict.fromkeys(modules):
+        rows = table.rows(module)
+        if not len(rows):
+            raise ValueError(f"Module {module} has no indexes in the table.")
+        # group indexes with identical occupancy, as big ints for fast ANDs
+        by_bitmap: dict[int, list[str]] = {}
+        for row in rows:
+            bitmap = int.from_bytes(table.bitmaps[row].tobytes(), "little")
+            by_bitmap.setdefault(bitmap, []).append(table.indexes[row])
+        groups[module] = by_bitmap
+    order = sorted(groups, key=lambda m: len(groups[m]))
+    levels = [list(groups[m].items()) for m in order]
+
+    # slots any index of the modules of each level onwards occupies: only these
+    # slots of the occupancy so far affect which picks remain
+    masks = [0] * (len(levels) + 1)
+    for level in reversed(range(len(levels))):
+        masks[level] = masks[level + 1]
+        for bitmap, _ in levels[level]:
+            masks[level] |= bitmap
+
+    # per level: node of each occupancy explored, None if it has no completions
+    nodes: list[dict[int, Optional[int]]] = [{} for _ in levels]
+    edges: list[list[list[Edge]]] = [[] for _ in levels]
+    # per level: node with each list of edges, merging nodes with equal edges
+    unique: list[dict[tuple[Edge, ...], int]] = [{} for _ in levels]
+
+    def explore(level: int, occupancy: int) -> Optional[int]:
+        if level == len(levels):
+            return 0
+        if occupancy in nodes[level]:
+            return nodes[level][occupancy]
+        node_edges = []
+        for group, (bitmap, _) in enumerate(levels[level]):
+            if bitmap & occupancy:
+                continue
+            child = explore(level + 1, (occupancy | bitmap) & masks[level + 1])
+            if child is not None:
+                node_edges.append((group, child))
+        node = None
+        if node_edges:
+            key = tuple(node_edges)
+            node = unique[level].get(key)
+            if node is None:
+                node = unique[level][key] = len(edges[level])
+                edges[level].append(node_edges)
+        nodes[level][occupancy] = node
+        return node
+
+    explore(0, 0)
+    return TimetableSet(
+        order, [[indexes for _, indexes in level] for level in levels], edges
+    )
+
+
+def write_timetables(timetables: dict[str, TimetableSet], path: Union[str, PathLike]):
+    """Write the timetable sets of each named cohort to the given JSON path."""
+    with open(path, "w") as f:
+        json.dump({name: t.to_json() for name, t in timetables.items()}, f)
+
+
+def read_timetables(path: Union[str, PathLike]) -> dict[str, TimetableSet]:
+    """Read timetable sets written by write_timetables()."""
+    with open(path) as f:
+        return {name: TimetableSet.from_json(t) for name, t in json.load(f).items()}
+
+
+def main(argv: Optional[list[str]] = None):
+    """Precompute the clash free timetables of programme cohorts."""
+    import argparse
+
+    from .occupancy import ingest, read_schedules
+
+    arg_parser = argparse.ArgumentParser(
+        description="Enumerate clash free timetables of cohorts' module sets."
+    )
+    arg_parser.add_argument(
+        "resources", help="Directory of modschedule's module class schedule JSON."
+    )
+    arg_parser.add_argument("out", help="Path of the JSON file to write.")
+    arg_parser.add_argument(
+        "--cohort",
+        action="append",
+        default=[],
+        metavar="NAME=CODE,CODE...",
+        help="Cohort & its module codes, repeatable.",
+    )
+    arg_parser.add_argument(
+        "--db",
+        help="CatalogStore to take the module codes of each --course's listing from.",
+    )
+    arg_parser.add_argument("--semester", help="Semester of the --course listings.")
+    arg_parser.add_argument(
+        "--course",
+        action="append",
+        default=[],
+        help="Course listing whose modules form a cohort eg. 'CSC;;2;F', repeatable.",
+    )
+    args = arg_parser.parse_args(argv)
+    if args.course and (args.db is None or args.semester is None):
+        arg_parser.error("--course requires --db & --semester.")
+
+    cohorts: dict[str, list[str]] = {}
+    for cohort in args.cohort:
+        name, sep, codes = cohort.partition("=")
+        if not sep:
+            arg_parser.error(f"Expected NAME=CODE,CODE..., got {cohort}.")
+        cohorts[name] = codes.split(",")
+    if args.course:
+        from .store import CatalogStore
+
+        with CatalogStore(args.db) as store:
+            for course in args.course:
+                cohorts[course] = store.listed(args.semester, course)
+
+    table = ingest(read_schedules(args.resources))
+    scheduled = set(table.modules)
+    timetables = {}
+    for name, codes in cohorts.items():
+        missing = [code for code in codes if code not in scheduled]
+        if missing:
+            print(f"{name}: skipping modules without schedules: {', '.join(missing)}")
+        timetables[name] = enumerate_timetables(
+            table, [code for code in codes if code in scheduled]
+        )
+        print(f"{name}: {len(timetables[name])} clash free timetables.")
+    write_timetables(timetables, args.out)
+
+
+if __name__ == "__main__":
+    main()
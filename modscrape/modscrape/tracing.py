@@ -0,0 +1,143 @@
+#
+# Modscrape
+# Trace
+# Span level tracing of crawl runs exported as Chrome Trace Event JSON
+#
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import PathLike
+from time import perf_counter_ns
+from typing import Any, ContextManager, Iterator, Optional, Union
+
+# tags attached to spans started in the current context eg. acadsem & course
+_tags: ContextVar[dict[str, Any]] = ContextVar("tags", default={})
+
+
+class _NullSpan:
+    """Span that records nothing, returned when tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Records the begin & end time of the enclosed block as a trace event."""
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.begin = perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        end = perf_counter_ns()
+        # list.append() is atomic, so spans can be recorded from any thread
+        self.tracer.events.append(
+            {
+                "name": self.name,
+                "cat": "modscrape",
+                # complete event: span with both begin timestamp & duration
+                "ph": "X",
+                "ts": (self.begin - self.tracer.origin) / 1000,
+                "dur": (end - self.begin) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": self.args,
+            }
+        )
+
+
+class Tracer:
+    """Records spans of crawl stages for viewing as a timeline in a trace viewer.
+
+    Tracing is disabled by default, in which case starting a span returns
+    a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events: list[dict[str, Any]] = []
+        # span timestamps are relative to the tracer's creation
+        self.origin = perf_counter_ns()
+
+    def enable(self, enabled: bool = True):
+        """Enable (or disable) recording of spans."""
+        self.enabled = enabled
+
+    def reset(self):
+        """Discard all recorded spans."""
+        self.events = []
+
+    def span(self, name: str, **args: Any) -> ContextManager:
+        """Record the enclosed block as a span with the given name.
+
+        Spans are tagged with the tags of the enclosing tags() blocks.
+
+        Usage:
+            with tracer.span("fetch", acadsem="2023_1", course="CSC;;1;F"):
+                html = get_course_content("2023_1", "CSC;;1;F")
+
+        Args:
+            name: Name of the span eg. the stage of the crawl.
+            args: Additional tags to attach to the span.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, {**_tags.get(), **args})
+
+    @staticmethod
+    @contextmanager
+    def tags(**tags: Any) -> Iterator[None]:
+        """Tag all spans started within the enclosed block with the given tags.
+
+        Tags propagate through the current context, including to asyncio
+        tasks created within the block.
+        """
+        token = _tags.set({**_tags.get(), **tags})
+        try:
+            yield
+        finally:
+            _tags.reset(token)
+
+    def to_json(self) -> str:
+        """Export recorded spans as Chrome Trace Event JSON."""
+        return json.dumps({"traceEvents": self.events, "displayTimeUnit": "ms"})
+
+    def write(self, path: Union[str, PathLike]):
+        """Write recorded spans to the given path as Chrome Trace Event JSON."""
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    @contextmanager
+    def recording(self, path: Optional[Union[str, PathLike]]) -> Iterator[None]:
+        """Trace the enclosed block, writing its spans to the given path.
+
+        Spans are written even if the block raises. Does nothing if the path
+        is None.
+        """
+        if path is None:
+            yield
+            return
+        self.enable()
+        try:
+            yield
+        finally:
+            self.enable(False)
+            self.write(path)
+
+
+# tracer recording spans of the crawl, disabled by default
+tracer = Tracer()
@@ -0,0 +1,72 @@
+#
+# Modscrape
+# Tests
+# Archive
+#
+
+from importlib.resources import read_text
+
+import pytest
+
+import test_resources
+from modscrape.archive import LZMA, Fetch, HtmlArchive, main, reprocess
+from modscrape.store import CatalogStore
+
+CS_CORE = read_text(test_resources, "cs_core_modules.html")
+HIST_MINOR = read_text(test_resources, "art_hist_minor_modules.html")
+
+
+@pytest.mark.parametrize("codec", ["gzip", LZMA])
+def test_archive_round_trip(tmp_path, codec):
+    with HtmlArchive(tmp_path, codec, segment_size=1) as archive:
+        digest = archive.put("2023_1", "CSC;;1;F", CS_CORE, fetched_at=1)
+        # unchanged page fetched again: stored once
+        assert archive.put("2023_1", "CSC;;1;F", CS_CORE, fetched_at=2) == digest
+        archive.put("2023_1", "HIST;;2;M", HIST_MINOR, fetched_at=3)
+        assert archive.get(digest) == CS_CORE
+        with pytest.raises(KeyError):
+            archive.get("missing")
+
+    # each page in its own segment as the segment size is exceeded
+    segments = sorted(p.name for p in tmp_path.glob("segment_*"))
+    assert len(segments) == 2
+    assert sum(p.stat().st_size for p in tmp_path.glob("segment_*")) < len(CS_CORE)
+
+    with HtmlArchive(tmp_path, codec) as archive:
+        assert [f.fetched_at for f in archive.fetches()] == [1, 2, 3]
+        assert archive.fetches("2023_1", "CSC;;1;F", latest=True) == [
+            Fetch("2023_1", "CSC;;1;F", 2, digest)
+        ]
+        pages = list(archive.pages())
+        assert [(f.fetched_at, html) for f, html in pages] == [
+            (1, CS_CORE),
+            (2, CS_CORE),
+            (3, HIST_MINOR),
+        ]
+
+
+def test_archiver(tmp_path):
+    with HtmlArchive(tmp_path) as archive:
+        fetch = archive.archiver(lambda semester, course: CS_CORE)
+        assert fetch("2023_1", "CSC;;1;F") == CS_CORE
+        assert [(f.semester, f.course) for f in archive.fetches()] == [
+            ("2023_1", "CSC;;1;F")
+        ]
+
+
+def test_reprocess(tmp_path):
+    with HtmlArchive(tmp_path / "archive") as archive:
+        archive.put("2023_1", "CSC;;1;F", CS_CORE, fetched_at=1)
+        archive.put("2023_1", "CSC;;1;F", CS_CORE, fetched_at=2)
+        archive.put("2023_1", "HIST;;2;M", HIST_MINOR, fetched_at=3)
+        archive.put("2023_1", "EEE;;1;F", "<html></html>", fetched_at=4)
+
+        scraped = {}
+        failures = reprocess(archive, lambda f, m: scraped.update({f: len(m)}))
+        assert {f.fetched_at: n for f, n in scraped.items()} == {1: 41, 2: 41, 3: 30}
+        assert [(f.key.course, f.stage) for f in failures] == [("EEE;;1;F", "scrape")]
+
+    main([str(tmp_path / "archive"), "--db", str(tmp_path / "catalog.db")])
+    with CatalogStore(tmp_path / "catalog.db") as store:
+        assert len(store.listed("2023_1", "CSC;;1;F")) == 41
+        assert store.crawled_at()[("2023_1", "CSC;;1;F")] == 2
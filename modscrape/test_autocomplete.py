@@ -0,0 +1,45 @@
+#
+# Modscrape
+# Tests
+# Autocomplete
+#
+
+from dataclasses import replace
+
+from modscrape.autocomplete import PrefixIndex
+from test_resources import make_module
+
+MODULES = [
+    replace(make_module("SC2001"), title="Algorithm Design & Analysis", au=3.0),
+    replace(make_module("SC2005"), title="Operating Systems", au=3.0),
+    replace(make_module("SC1005"), title="Digital Logic", au=4.0),
+    replace(make_module("CZ2001"), title="Algorithms", au=2.0),
+]
+
+
+def test_prefix_index_complete():
+    index = PrefixIndex.build(MODULES)
+
+    assert index.complete("SC20") == [
+        ("SC2001", "Algorithm Design & Analysis"),
+        ("SC2005", "Operating Systems"),
+    ]
+    assert [code for code, _ in index.complete("algo")] == ["CZ2001", "SC2001"]
+    assert [code for code, _ in index.complete("algo des")] == ["SC2001"]
+    assert [code for code, _ in index.complete("sc", k=1)] == ["SC1005"]
+    assert index.complete("") == []
+    assert index.complete("quantum") == []
+
+
+def test_prefix_index_score():
+    index = PrefixIndex.build(MODULES, score=lambda m: m.au)
+
+    assert [code for code, _ in index.complete("s")] == ["SC1005", "SC2001", "SC2005"]
+
+
+def test_prefix_index_save_load(tmp_path):
+    index = PrefixIndex.build(MODULES, score=lambda m: m.au)
+    path = tmp_path / "autocomplete.npz"
+    index.save(path)
+
+    assert PrefixIndex.load(path).complete("a") == index.complete("a")
@@ -0,0 +1,72 @@
+#
+# Modscrape
+# Tests
+# Bench
+#
+
+import json
+
+from bench import (
+    FIXTURES,
+    BenchResult,
+    Regression,
+    compare,
+    load_corpora,
+    main,
+    read_baseline,
+    run_benchmarks,
+    write_baseline,
+)
+from modscrape.corpus import CORE, generate_modules, render_core_page, write_corpus
+
+
+def test_load_corpora(tmp_path):
+    assert set(load_corpora()) == set(FIXTURES)
+    paths = write_corpus(tmp_path, 4, n_pages=2)
+    corpora = load_corpora([tmp_path], fixtures=False)
+    assert list(corpora) == [p.name for p in paths]
+
+
+def test_run_benchmarks():
+    # a small page keeps the benchmarks fast
+    results = run_benchmarks({"core": render_core_page(generate_modules(3))}, repeat=1)
+    assert [r.name for r in results] == [
+        "row_extract:core",
+        "lex:core",
+        "parse:core",
+        "scrape:core",
+    ]
+    assert all(r.modules == 3 and r.tokens > 0 for r in results)
+    assert all(r.seconds > 0 and r.peak_bytes > 0 for r in results)
+
+
+def test_compare(tmp_path):
+    path = tmp_path / "baseline.json"
+    write_baseline([BenchResult("lex:core", 1.0, 1000, 10, 1)], path)
+    baseline = read_baseline(path)
+    assert baseline["lex:core"]["tokens_per_s"] == 10
+
+    within = [BenchResult("lex:core", 1.1, 1000, 10, 1)]
+    assert compare(within, baseline, threshold=0.2) == []
+    slower = [
+        BenchResult("lex:core", 1.5, 2000, 10, 1),
+        BenchResult("parse:core", 9.0, 9000, 10, 1),
+    ]
+    assert compare(slower, baseline, threshold=0.2) == [
+        Regression("lex:core", "seconds", 1.0, 1.5),
+        Regression("lex:core", "peak_bytes", 1000, 2000),
+    ]
+
+
+def test_main_baseline(tmp_path, capsys):
+    (corpus,) = write_corpus(tmp_path / "corpus", 3, layout=CORE)
+    baseline = tmp_path / "baseline.json"
+    args = ["--no-fixtures", str(corpus), "--repeat", "1", "--baseline", str(baseline)]
+    assert main(args) == 0
+    assert f"scrape:{corpus.name}" in read_baseline(baseline)
+
+    regressed = read_baseline(baseline)
+    regressed[f"lex:{corpus.name}"]["seconds"] = 1e-9
+    baseline.write_text(json.dumps(regressed))
+    assert main(args) == 1
+    assert f"REGRESSION lex:{corpus.name} seconds" in capsys.readouterr().err
@@ -0,0 +1,108 @@
+#
+# Modscrape
+# Tests
+# Clashes
+#
+
+import numpy as np
+import pytest
+
+from modscrape.clashes import clash_matrix, main, read_clashes, write_clashes
+from modscrape.occupancy import ingest, read_table
+from test_resources import make_class, make_schedule
+
+WEEKS = list(range(1, 15))
+SCHEDULES = [
+    make_schedule(
+        "SC2001",
+        {
+            # indexes of the same module overlap but never clash
+            "10210": [make_class(9.5, 2, [1], WEEKS)],
+            "10211": [make_class(9.5, 2, [1], WEEKS), make_class(14.5, 1, [3], [2])],
+        },
+    ),
+    make_schedule(
+        "SC2005",
+        {
+            "10300": [make_class(10.5, 1, [1], [5])],
+            "10301": [make_class(14.5, 1, [3], [2, 4])],
+            "10302": [make_class(16.5, 1, [3], WEEKS)],
+        },
+    ),
+    make_schedule("SC2006", {"10400": [make_class(11.5, 1, [1], WEEKS)]}),
+]
+
+
+def test_clash_matrix():
+    table = ingest(SCHEDULES)
+    matrices = [clash_matrix(table, chunk_size) for chunk_size in [1, 4, 256]]
+    # chunks derived from memory budgets of a single row & of the default
+    row_bytes = len(table.indexes) * table.grid.words * 8
+    matrices += [clash_matrix(table, memory_budget=row_bytes), clash_matrix(table)]
+    for matrix in matrices:
+        assert [matrix.clashing(row).tolist() for row in range(6)] == [
+            [2],
+            [2, 3],
+            [0, 1],
+            [1],
+            [],
+            [],
+        ]
+    assert matrix.clashes(1, 3) and matrix.clashes(3, 1)
+    assert not matrix.clashes(0, 1)
+    dense = matrix.dense()
+    assert np.array_equal(dense, dense.T)
+    assert dense.sum() == len(matrix.indices) == 6
+
+    with pytest.raises(ValueError):
+        clash_matrix(table, 0)
+
+
+def test_clash_matrix_matches_table():
+    rng = np.random.default_rng(0)
+    schedules = [
+        make_schedule(
+            f"SC{code}",
+            {
+                f"{code}{i}": [
+                    make_class(
+                        int(rng.integers(8, 20)),
+                        int(rng.integers(1, 3)),
+                        [int(rng.integers(1, 6))],
+                        sorted(rng.choice(WEEKS, 4, replace=False).tolist()),
+                    )
+                ]
+                for i in range(5)
+            },
+        )
+        for code in range(2000, 2010)
+    ]
+    table = ingest(schedules)
+    dense = clash_matrix(table, chunk_size=7).dense()
+    for row in range(len(table.indexes)):
+        for other in range(len(table.indexes)):
+            expected = table.modules[row] != table.modules[other] and table.clashes(
+                row, other
+            )
+            assert dense[row, other] == expected
+
+
+def test_write_read_clashes(tmp_path):
+    matrix = clash_matrix(ingest(SCHEDULES))
+    write_clashes(matrix, tmp_path)
+    read = read_clashes(tmp_path)
+    assert np.array_equal(read.indptr, matrix.indptr)
+    assert np.array_equal(read.indices, matrix.indices)
+
+
+def test_main(tmp_path):
+    import json
+
+    for schedule in SCHEDULES:
+        with open(tmp_path / f"{schedule['code']}.json", "w") as f:
+            json.dump(schedule, f)
+    main([str(tmp_path)])
+    # tables written alongside the schedules are skipped when run again
+    main([str(tmp_path)])
+    assert read_table(tmp_path).indexes[-1] == "10400"
+    assert read_clashes(tmp_path).n_rows == 6
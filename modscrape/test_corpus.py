@@ -0,0 +1,61 @@
+#
+# Modscrape
+# Tests
+# Corpus
+#
+
+from dataclasses import replace
+
+import pytest
+
+from modscrape.corpus import (
+    CORE,
+    generate_modules,
+    render_core_page,
+    render_minor_page,
+    write_corpus,
+)
+from modscrape.scrape import scrape_modules
+
+
+def test_generate_modules():
+    modules = generate_modules(200, seed=1)
+    assert modules == generate_modules(200, seed=1)
+    codes = [m.code.code for m in modules]
+    assert codes == sorted(set(codes))
+    assert any(len(m.needs_modules) > 1 for m in modules)
+    assert any(m.rejects_courses_with for m in modules)
+    assert any(m.mutually_exclusives for m in modules)
+    assert all(m.code not in m.mutually_exclusives for m in modules)
+
+
+@pytest.mark.parametrize("render", [render_core_page, render_minor_page])
+def test_render_page_scrape(render):
+    modules = generate_modules(100, seed=2)
+    scraped = scrape_modules(render(modules))
+    # descriptions are scraped with punctuation spaced out as separate tokens
+    assert [replace(m, description="") for m in scraped] == [
+        replace(m, description="") for m in modules
+    ]
+    assert all(m.description for m in scraped)
+
+
+def test_render_core_page_single():
+    with pytest.raises(ValueError):
+        render_core_page(generate_modules(1))
+
+
+def test_write_corpus(tmp_path):
+    paths = write_corpus(tmp_path, 30, n_pages=3)
+    assert [p.name for p in paths] == [
+        "synthetic_core_0000.html",
+        "synthetic_minor_0001.html",
+        "synthetic_core_0002.html",
+    ]
+    assert sum([len(scrape_modules(p.read_text())) for p in paths]) == 30
+    assert len(write_corpus(tmp_path / "core", 4, n_pages=2, layout=CORE)) == 2
+    with pytest.raises(ValueError):
+        write_corpus(tmp_path, 4, layout="bde")
+    # a core page of a single module
+    with pytest.raises(ValueError, match="at least 2 modules per core page"):
+        write_corpus(tmp_path, 5, n_pages=3)
@@ -0,0 +1,58 @@
+#
+# Modscrape
+# Tests
+# Diff
+#
+
+import json
+from dataclasses import replace
+from io import StringIO
+
+from modscrape.diff import ChangeType, diff_catalogs, fingerprint, write_changes
+from modscrape.module import Course, ModuleCode
+from test_resources import make_module
+
+
+def test_diff_catalogs():
+    before = [
+        make_module("SC1005"),
+        make_module("SC2001", needs_modules=[[ModuleCode("SC1007")]]),
+        make_module("SC2005"),
+    ]
+    after = [
+        make_module("SC1005"),
+        replace(
+            make_module(
+                "SC2001", rejects_courses=[Course("EEE", None, None, None, None)]
+            ),
+            au=4.0,
+        ),
+        make_module("SC2207"),
+    ]
+
+    changes = list(diff_catalogs(before, after, before_prints=fingerprint(before)))
+
+    assert [(c.change, c.code) for c in changes] == [
+        (ChangeType.CHANGED, "SC2001"),
+        (ChangeType.REMOVED, "SC2005"),
+        (ChangeType.ADDED, "SC2207"),
+    ]
+    assert changes[0].fields == ["au", "needs_modules", "rejects_courses"]
+    assert changes[1].before == before[2] and changes[1].after is None
+    assert changes[2].before is None and changes[2].after == after[2]
+    assert list(diff_catalogs(after, after)) == []
+
+
+def test_write_changes():
+    out = StringIO()
+    n_changes = write_changes(
+        diff_catalogs([make_module("SC1005")], [make_module("SC2001")]), out
+    )
+
+    assert n_changes == 2
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(line["change"], line["code"]) for line in lines] == [
+        ("removed", "SC1005"),
+        ("added", "SC2001"),
+    ]
+    assert lines[1]["after"]["code"]["code"] == "SC2001"
@@ -0,0 +1,104 @@
+#
+# Modscrape
+# Tests
+# Discovery
+#
+
+from typing import Optional
+
+from modscrape.discovery import (
+    Changes,
+    MainPage,
+    crawled_manifest,
+    read_manifest,
+    refresh,
+    write_manifest,
+)
+
+
+def main_page(semesters: list[str], courses: list[str]) -> str:
+    def select(name: str, values: list[str]) -> str:
+        options = "".join(f'<option value="{v}">{v} text </option>' for v in values)
+        return f'<select name="{name}">{options}</select>'
+
+    return (
+        f"<html><body><form>{select('acadsem', semesters)}"
+        f"{select('r_course_yr', courses)}</form></body></html>"
+    )
+
+
+class FakeServer:
+    """Serves a main page, honouring If-None-Match with its ETag."""
+
+    def __init__(self, html: str):
+        self.html = html
+        self.requests = 0
+
+    def fetch(self, etag: Optional[str], last_modified: Optional[str]) -> MainPage:
+        self.requests += 1
+        current = str(hash(self.html))
+        return MainPage(None if etag == current else self.html, current)
+
+
+def test_refresh(tmp_path):
+    path = tmp_path / "manifest.json"
+    server = FakeServer(main_page(["2023_1", "2022_2"], ["CSC;;1;F", "EEE;;1;F"]))
+
+    manifest, changes = refresh(path, server.fetch)
+    assert manifest.semesters == {"2023_1": "2023_1 text", "2022_2": "2022_2 text"}
+    assert changes == Changes(["2023_1", "2022_2"], [], ["CSC;;1;F", "EEE;;1;F"], [])
+    assert read_manifest(path) == manifest
+
+    # not modified: no changes without parsing
+    manifest, changes = refresh(path, server.fetch)
+    assert not changes
+    assert manifest.semesters_digest == read_manifest(path).semesters_digest
+
+    server.html = main_page(["2023_2", "2023_1"], ["CSC;;1;F", "HIST;;2;M"])
+    manifest, changes = refresh(path, server.fetch)
+    assert changes == Changes(["2023_2"], ["2022_2"], ["HIST;;2;M"], ["EEE;;1;F"])
+    assert changes.jobs(manifest) == [("2023_2", "CSC;;1;F"), ("2023_2", "HIST;;2;M")]
+    assert server.requests == 3
+
+
+def test_refresh_unsaved(tmp_path):
+    path = tmp_path / "manifest.json"
+    server = FakeServer(main_page(["2023_1"], ["CSC;;1;F"]))
+    manifest, changes = refresh(path, server.fetch, save=False)
+    assert read_manifest(path) is None
+
+    # changes are found again until the manifest is saved
+    assert refresh(path, server.fetch, save=False)[1] == changes
+    write_manifest(path, manifest)
+    assert not refresh(path, server.fetch)[1]
+
+
+def test_crawled_manifest(tmp_path):
+    path = tmp_path / "manifest.json"
+    server = FakeServer(main_page(["2023_1"], ["CSC;;1;F"]))
+    write_manifest(path, refresh(path, server.fetch)[0])
+
+    server.html = main_page(["2023_1"], ["CSC;;1;F", "EEE;;1;F", "HIST;;2;M"])
+    manifest, changes = refresh(path, server.fetch, save=False)
+    assert crawled_manifest(manifest, changes, changes.jobs(manifest)) is manifest
+
+    # only EEE was crawled: HIST stays new until it is crawled
+    write_manifest(path, crawled_manifest(manifest, changes, [("2023_1", "EEE;;1;F")]))
+    manifest, changes = refresh(path, server.fetch, save=False)
+    assert changes == Changes([], [], ["HIST;;2;M"], [])
+    assert list(manifest.courses) == ["CSC;;1;F", "EEE;;1;F", "HIST;;2;M"]
+
+
+def test_refresh_unchanged_content(tmp_path, monkeypatch):
+    path = tmp_path / "manifest.json"
+    html = main_page(["2023_1"], ["CSC;;1;F"])
+    refresh(path, lambda etag, last_modified: MainPage(html))
+
+    # server without validators: same content is detected by its digest
+    def fail(html: str):
+        raise AssertionError("Unchanged main page should not be parsed.")
+
+    monkeypatch.setattr("modscrape.discovery.parse_options", fail)
+    manifest, changes = refresh(path, lambda etag, last_modified: MainPage(html))
+    assert not changes
+    assert manifest.courses == {"CSC;;1;F": "CSC;;1;F text"}
@@ -0,0 +1,125 @@
+#
+# Modscrape
+# Tests
+# Eligibility
+#
+
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from modscrape.eligibility import NO_ALT_COURSE, Cohort, eligibility_matrix
+from modscrape.module import Course, ModuleCode
+from test_resources import make_module
+
+
+def make_cohort(
+    completed: list[list[bool]],
+    study_years: Optional[list[int]] = None,
+    courses: Optional[list[str]] = None,
+    alt_courses: Optional[list[str]] = None,
+    admit_years: Optional[list[int]] = None,
+    is_direct_entry: Optional[list[bool]] = None,
+) -> Cohort:
+    n = len(completed)
+    return Cohort(
+        codes=["SC1003", "SC1005", "MH1810", "SC2001"],
+        completed=np.array(completed, dtype=bool),
+        study_years=np.array(study_years or [1] * n),
+        courses=np.array(courses or ["CSC"] * n),
+        alt_courses=np.array(alt_courses or [NO_ALT_COURSE] * n),
+        admit_years=np.array(admit_years or [2022] * n),
+        is_direct_entry=np.array(is_direct_entry or [False] * n),
+    )
+
+
+def test_eligibility_matrix_prerequisites():
+    # SC2001 needs (SC1003 & MH1810) OR SC1005
+    # SC1005(Corequisite) is skipped, SC9999 is not in the cohort's codes
+    modules = [
+        make_module(
+            "SC2001",
+            needs_modules=[
+                [ModuleCode("SC1003"), ModuleCode("MH1810")],
+                [ModuleCode("SC1005")],
+            ],
+        ),
+        make_module("SC2002", needs_modules=[[ModuleCode("SC1005", True)]]),
+        make_module("SC2005", needs_modules=[[ModuleCode("SC9999")]]),
+        make_module("SC1003"),
+    ]
+    cohort = make_cohort(
+        [
+            [True, False, True, False],
+            [True, False, False, False],
+            [False, True, False, False],
+            [False, False, False, True],
+        ]
+    )
+
+    assert eligibility_matrix(modules, cohort, chunk_size=3).tolist() == [
+        [True, True, False, False],
+        [False, True, False, False],
+        [True, True, False, True],
+        # already completed SC2001
+        [False, True, False, True],
+    ]
+
+
+def test_eligibility_matrix_year_exclusives():
+    modules = [
+        make_module("SC3000", needs_year=3),
+        make_module("SC1004", mutually_exclusives=[ModuleCode("SC1005")]),
+    ]
+    cohort = make_cohort([[False] * 4, [False, True, False, False]], study_years=[3, 2])
+
+    assert eligibility_matrix(modules, cohort).tolist() == [
+        [True, True],
+        [False, False],
+    ]
+
+
+def test_eligibility_matrix_course_restrictions():
+    modules = [
+        make_module(
+            "SC1004",
+            rejects_courses=[
+                Course("ME", None, None, None, "IMS"),
+                Course("EEE", True, None, None, None),
+                Course("CSC", None, 2018, 9999, None),
+            ],
+        ),
+        make_module(
+            "SC1005", rejects_courses_with=[Course("Admyr", None, 2011, 2019, None)]
+        ),
+    ]
+    cohort = make_cohort(
+        [[False] * 4] * 6,
+        courses=["ME", "ME", "EEE", "EEE", "CSC", "CSC"],
+        alt_courses=["IMS", NO_ALT_COURSE] + [NO_ALT_COURSE] * 4,
+        admit_years=[2022, 2022, 2022, 2022, 2017, 2018],
+        is_direct_entry=[False, False, True, False, False, False],
+    )
+
+    assert eligibility_matrix(modules, cohort).tolist() == [
+        [False, True],
+        [True, True],
+        [False, True],
+        [True, True],
+        [True, False],
+        [False, False],
+    ]
+
+
+def test_cohort_shape_mismatch():
+    with pytest.raises(ValueError):
+        Cohort(
+            codes=["SC1003"],
+            completed=np.zeros((2, 2), dtype=bool),
+            study_years=np.array([1, 1]),
+            courses=np.array(["CSC", "CSC"]),
+            alt_courses=np.array(["", ""]),
+            admit_years=np.array([2022, 2022]),
+            is_direct_entry=np.array([False, False]),
+        )
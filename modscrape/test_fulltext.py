@@ -0,0 +1,94 @@
+#
+# Modscrape
+# Tests
+# Full Text
+#
+
+from dataclasses import replace
+from importlib.resources import read_text
+
+import test_resources
+from modscrape.fulltext import FullTextIndex, index_catalog, tokenize
+from modscrape.scrape import scrape_modules
+from test_resources import make_module
+
+
+def test_tokenize():
+    assert tokenize("Data Structures & Algorithms (SC2001)") == [
+        "data",
+        "structures",
+        "algorithms",
+        "sc2001",
+    ]
+
+
+def test_full_text_index_search():
+    modules = [
+        replace(
+            make_module("SC1005"),
+            title="Digital Logic",
+            description="Design of combinational logic circuits.",
+        ),
+        replace(
+            make_module("SC2001"),
+            title="Algorithm Design & Analysis",
+            description="Analysis of sorting algorithms.",
+        ),
+        replace(
+            make_module("SC2207"),
+            title="Introduction to Databases",
+            description="Relational algebra, logic & query processing.",
+        ),
+    ]
+    index = FullTextIndex.build(modules)
+
+    results = index.search("logic")
+    # title matches outrank description matches
+    assert [code for code, _ in results] == ["SC1005", "SC2207"]
+    assert results[0][1] > results[1][1] > 0
+    assert [code for code, _ in index.search("logic design", k=1)] == ["SC1005"]
+    assert index.search("quantum") == []
+
+
+def test_full_text_index_ties():
+    # identical modules score the same & are ranked in document order
+    modules = [
+        replace(make_module(code), title="Digital Logic", description="")
+        for code in ["SC3000", "SC1000", "SC2000", "SC4000"]
+    ]
+    index = FullTextIndex.build(modules)
+    assert [code for code, _ in index.search("logic")] == [
+        "SC3000",
+        "SC1000",
+        "SC2000",
+        "SC4000",
+    ]
+    assert [code for code, _ in index.search("logic", k=2)] == ["SC3000", "SC1000"]
+    assert index.term_id("logic") is not None
+    assert index.term_id("logics") is None
+
+
+def test_full_text_index_save_load(tmp_path):
+    index = FullTextIndex.build(
+        scrape_modules(read_text(test_resources, "cs_core_modules.html"))
+    )
+    path = tmp_path / "fulltext.npz"
+    index.save(path)
+
+    assert FullTextIndex.load(path).search("database systems") == index.search(
+        "database systems"
+    )
+
+
+def test_index_catalog(tmp_path):
+    modules = [
+        replace(
+            make_module("SC1005"), title="Digital Logic", description="logic " * 70000
+        )
+    ]
+    path = index_catalog(modules, tmp_path / "catalog.json")
+    assert path == tmp_path / "catalog.npz"
+    index = FullTextIndex.load(path)
+    # term frequencies beyond 16 bits are not wrapped around
+    assert index.term_freqs.max() == 70002
+    assert [code for code, _ in index.search("logic")] == ["SC1005"]
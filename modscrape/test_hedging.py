@@ -0,0 +1,76 @@
+#
+# Modscrape
+# Tests
+# Hedging
+#
+
+import threading
+import time
+
+import pytest
+
+from modscrape.hedging import Hedger, LatencyWindow
+
+
+def test_latency_window():
+    window = LatencyWindow(size=4)
+    with pytest.raises(ValueError):
+        window.percentile(50)
+    for seconds in [5.0, 1.0, 2.0, 3.0, 4.0]:
+        window.observe(seconds)
+    # oldest latency dropped from the window
+    assert len(window) == 4
+    assert window.percentile(50) == 3.0
+    assert window.percentile(100) == 4.0
+
+
+def slow_once(slow_calls: set[int]):
+    calls = 0
+    lock = threading.Lock()
+
+    def fetch(semester: str, course: str) -> str:
+        nonlocal calls
+        with lock:
+            calls += 1
+            call = calls
+        time.sleep(1.0 if call in slow_calls else 0.001)
+        return f"{semester} {course} {call}"
+
+    return fetch
+
+
+def test_hedger_hedges_slow_fetch():
+    with Hedger(percentile=90, max_extra=0.5, min_samples=10) as hedger:
+        fetch = hedger.hedged(slow_once({11}))
+        for _ in range(10):
+            fetch("2023_1", "CSC;;1;F")
+        assert hedger.threshold() is not None
+        begin = time.perf_counter()
+        # 11th call is slow: answered by the hedge request instead
+        assert fetch("2023_1", "CSC;;1;F") == "2023_1 CSC;;1;F 12"
+        assert time.perf_counter() - begin < 0.5
+        assert (hedger.fetches, hedger.hedges, hedger.wins) == (11, 1, 1)
+
+
+def test_hedger_caps_extra_load():
+    with Hedger(max_extra=0.0, min_samples=1) as hedger:
+        fetch = hedger.hedged(slow_once({2}))
+        fetch("2023_1", "CSC;;1;F")
+        assert fetch("2023_1", "CSC;;1;F") == "2023_1 CSC;;1;F 2"
+        assert hedger.hedges == 0
+
+
+def test_hedger_errors():
+    def fail_slowly(semester: str, course: str) -> str:
+        if course == "CSC;;1;F":
+            return ""
+        time.sleep(0.05)
+        raise ConnectionError(course)
+
+    with Hedger(min_samples=1, max_extra=1.0) as hedger:
+        fetch = hedger.hedged(fail_slowly)
+        fetch("2023_1", "CSC;;1;F")
+        # both original & hedge requests fail
+        with pytest.raises(ConnectionError):
+            fetch("2023_1", "EEE;;1;F")
+        assert hedger.hedges == 1
@@ -0,0 +1,46 @@
+#
+# Modscrape
+# Tests
+# History
+#
+
+from dataclasses import replace
+
+import pytest
+
+from modscrape.history import HistoryStore
+from test_resources import make_module
+
+
+def test_history_store_as_of(tmp_path):
+    sc1005, sc2001 = make_module("SC1005"), make_module("SC2001")
+    sc2001_v2 = replace(sc2001, au=4.0)
+    with HistoryStore(tmp_path / "history.db") as history:
+        assert history.append("2021_1", [sc1005, sc2001]) == 2
+        # unchanged semesters store no versions
+        assert history.append("2021_2", [sc1005, sc2001]) == 0
+        assert history.append("2022_1", [sc1005, sc2001_v2]) == 1
+        assert history.append("2022_2", [sc2001_v2]) == 1
+        assert history.append("2023_1", [sc1005, sc2001_v2]) == 1
+
+    with HistoryStore(tmp_path / "history.db") as history:
+        assert history.semesters() == ["2021_1", "2021_2", "2022_1", "2022_2", "2023_1"]
+        assert history.module("SC2001", as_of="2021_2") == sc2001
+        assert history.module("SC2001", as_of="2022_1") == sc2001_v2
+        # semesters not in the history read the latest earlier semester
+        assert history.module("SC2001", as_of="2099_1") == sc2001_v2
+        assert history.module("SC2001", as_of="2020_1") is None
+        assert history.module("SC1005", as_of="2022_2") is None
+        assert history.module("SC1005", as_of="2023_1") == sc1005
+
+        assert history.catalog("2021_2") == [sc1005, sc2001]
+        assert history.catalog("2022_2") == [sc2001_v2]
+        assert history.catalog("2023_1", codes=["SC2001", "SC9999"]) == [sc2001_v2]
+        assert history.catalog("2020_1") == []
+
+
+def test_history_store_append_order():
+    with HistoryStore() as history:
+        history.append("2022_1", [])
+        with pytest.raises(ValueError):
+            history.append("2021_2", [])
@@ -0,0 +1,70 @@
+#
+# Modscrape
+# Tests
+# Journal
+#
+
+from importlib.resources import read_text
+
+import test_resources
+from modscrape.journal import JOURNAL_FILE, CrawlJournal, JobState
+from modscrape.module import Module
+from modscrape.pipeline import crawl, crawl_pipeline
+
+
+def test_journal_replay(tmp_path):
+    with CrawlJournal(tmp_path) as journal:
+        journal.plan([("2023_1", "CSC;;1;F"), ("2023_1", "EEE;;1;F")])
+        journal.record(("2023_1", "CSC;;1;F"), JobState.PARSED)
+    # crash while appending a record
+    with open(tmp_path / JOURNAL_FILE, "a") as f:
+        f.write('{"acadsem": "2023_1", "cour')
+
+    with CrawlJournal(tmp_path) as journal:
+        assert journal.unfinished() == [("2023_1", "EEE;;1;F")]
+        journal.record(("2023_1", "EEE;;1;F"), JobState.FAILED, "fetch: timeout")
+    with CrawlJournal(tmp_path) as journal:
+        assert journal.states == {
+            ("2023_1", "CSC;;1;F"): JobState.PARSED,
+            ("2023_1", "EEE;;1;F"): JobState.FAILED,
+        }
+
+
+def test_journal_resume(tmp_path):
+    page = read_text(test_resources, "cs_core_modules.html")
+    jobs = [("2023_1", "CSC;;1;F"), ("2023_1", "CSC;;2;F"), ("2023_1", "CSC;;3;F")]
+    fetched: list[tuple[str, str]] = []
+    written: dict[tuple[str, str], list[Module]] = {}
+
+    def fetch(semester: str, course: str) -> str:
+        fetched.append((semester, course))
+        if course == "CSC;;3;F":
+            raise ConnectionError()
+        return page
+
+    # crash after fetching the first 2 jobs but only writing the first
+    journal = CrawlJournal(tmp_path)
+    journal.plan(jobs)
+    journal.fetcher(fetch)(*jobs[0])
+    journal.fetcher(fetch)(*jobs[1])
+    journal.sink(written.__setitem__)(jobs[0], [])
+    journal.file.close()
+
+    fetched.clear()
+    with CrawlJournal(tmp_path) as journal:
+        assert journal.unfinished() == jobs[1:]
+        failures = crawl(
+            journal.unfinished(),
+            journal.sink(written.__setitem__),
+            crawl_pipeline(journal.fetcher(fetch)),
+        )
+        journal.record_failures(failures)
+
+    # saved page of the second job is parsed without fetching it again
+    assert fetched == [jobs[2]]
+    assert len(written[jobs[1]]) == 41
+    with CrawlJournal(tmp_path) as journal:
+        assert journal.states[jobs[1]] == JobState.PARSED
+        assert journal.states[jobs[2]] == JobState.FAILED
+        assert journal.unfinished() == [jobs[2]]
+        assert not journal.page_path(jobs[1]).exists()
@@ -4,8 +4,8 @@
 # Lexer
 #
 
-from lexer import lex
-from tok import Token, TokenType
+from modscrape.lexer import lex
+from modscrape.tok import Token, TokenType
 
 
 def test_lexer():
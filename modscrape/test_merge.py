@@ -0,0 +1,71 @@
+#
+# Modscrape
+# Tests
+# Merge
+#
+
+from dataclasses import replace
+from importlib.resources import read_text
+
+import test_resources
+from modscrape.archive import HtmlArchive
+from modscrape.fulltext import FullTextIndex
+from modscrape.merge import CatalogMerger, main
+from modscrape.module import read_catalog
+from test_resources import make_module
+
+
+def test_catalog_merger():
+    merger = CatalogMerger()
+    merger.add("CSC;;1;F", "2023_1", [make_module("SC1005"), make_module("SC2001")])
+    merger.add("CE;;1;F", "2023_1", [make_module("SC1005"), make_module("SC2001")])
+    merger.add("DSAI;;1;F", "2023_1", [replace(make_module("SC2001"), au=4.0)])
+
+    catalog = merger.catalog()
+    assert [entry.code for entry in catalog] == ["SC1005", "SC2001"]
+    sc1005, sc2001 = catalog
+    # identical modules across listings share a single module object
+    assert len(sc1005.versions) == 1
+    assert sc1005.listed(("CSC;;1;F", "2023_1")) is sc1005.listed(("CE;;1;F", "2023_1"))
+    assert not sc1005.has_conflicts
+    assert len(merger.interned) == 3
+
+    assert list(merger.conflicts()) == [sc2001]
+    assert sc2001.module.au == 3.0
+    assert sc2001.listed(("DSAI;;1;F", "2023_1")).au == 4.0
+    assert set(sc2001.listings) == {
+        ("CSC;;1;F", "2023_1"),
+        ("CE;;1;F", "2023_1"),
+        ("DSAI;;1;F", "2023_1"),
+    }
+
+
+def test_catalog_merger_semesters():
+    merger = CatalogMerger()
+    merger.add("CSC;;1;F", "2022_2", [make_module("SC2001")])
+    merger.add("CSC;;1;F", "2023_1", [replace(make_module("SC2001"), au=4.0)])
+    merger.add("CE;;1;F", "2023_1", [replace(make_module("SC2001"), au=4.0)])
+
+    # modules changing across semesters are not conflicts
+    assert list(merger.conflicts()) == []
+    assert [(e.semester, e.code) for e in merger.catalog()] == [
+        ("2022_2", "SC2001"),
+        ("2023_1", "SC2001"),
+    ]
+    assert [m.au for m in merger.merged()] == [3.0, 4.0]
+    assert [m.au for m in merger.merged("2023_1")] == [4.0]
+
+
+def test_main(tmp_path):
+    with HtmlArchive(tmp_path / "archive") as archive:
+        for course, fixture in [
+            ("CSC;;1;F", "cs_core_modules.html"),
+            ("HIST;;2;M", "art_hist_minor_modules.html"),
+        ]:
+            archive.put("2023_1", course, read_text(test_resources, fixture))
+
+    out = tmp_path / "catalog.json"
+    main([str(tmp_path / "archive"), str(out), "--fulltext"])
+    codes = [m.code.code for m in read_catalog(out)]
+    assert len(codes) == 71 and codes == sorted(set(codes))
+    assert FullTextIndex.load(tmp_path / "catalog.npz").search("history")
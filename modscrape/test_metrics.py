@@ -0,0 +1,99 @@
+#
+# Modscrape
+# Tests
+# Metrics
+#
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from importlib.resources import read_text
+
+import pytest
+
+import test_resources
+from modscrape.metrics import NULL_TIMER, Histogram, Metrics, metrics
+from modscrape.scrape import scrape_modules
+
+
+def test_histogram_observe():
+    histogram = Histogram(buckets=(1.0, 5.0))
+    for value in [0.5, 1.0, 3.0, 10.0]:
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.sum == 14.5
+    assert histogram.count == 4
+
+
+def test_metrics_disabled():
+    disabled = Metrics()
+    disabled.count("pages")
+    disabled.observe("fetch_seconds", 1.0)
+    assert disabled.time("lex") is NULL_TIMER
+    assert disabled.counters == {} and disabled.histograms == {}
+
+
+def test_metrics_concurrent():
+    concurrent = Metrics(enabled=True)
+
+    def record(_):
+        for _ in range(1000):
+            concurrent.count("pages")
+            concurrent.observe("fetch_seconds", 0.2)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(record, range(8)))
+    assert concurrent.counters["pages"] == 8000
+    assert concurrent.histograms["fetch_seconds"].count == 8000
+
+
+def test_metrics_export():
+    enabled = Metrics(enabled=True)
+    enabled.count("pages")
+    enabled.count("bytes_fetched", 1024)
+    enabled.observe("fetch_seconds", 0.2, buckets=(0.1, 1.0))
+    with enabled.time("lex"):
+        pass
+
+    exported = json.loads(enabled.to_json())
+    assert exported["counters"] == {"pages": 1, "bytes_fetched": 1024}
+    assert exported["histograms"]["fetch_seconds"]["counts"] == [0, 1, 0]
+    assert exported["histograms"]["lex_seconds"]["count"] == 1
+
+    prometheus = enabled.to_prometheus()
+    assert "# TYPE modscrape_pages_total counter\nmodscrape_pages_total 1\n" in (
+        prometheus
+    )
+    assert 'modscrape_fetch_seconds_bucket{le="0.1"} 0\n' in prometheus
+    assert 'modscrape_fetch_seconds_bucket{le="1.0"} 1\n' in prometheus
+    assert 'modscrape_fetch_seconds_bucket{le="+Inf"} 1\n' in prometheus
+    assert "modscrape_fetch_seconds_count 1\n" in prometheus
+
+
+def test_scrape_modules_metrics():
+    metrics.enable()
+    try:
+        modules = scrape_modules(read_text(test_resources, "cs_core_modules.html"))
+        assert metrics.counters["modules"] == len(modules)
+        assert metrics.counters["rows"] > 0
+        assert metrics.counters["tokens"] > 0
+        for stage in ["html_parse", "row_extract", "lex", "parse"]:
+            assert metrics.histograms[f"{stage}_seconds"].count == 1
+    finally:
+        metrics.enable(False)
+        metrics.reset()
+
+
+def test_metrics_recording(tmp_path):
+    recorded = Metrics()
+    with recorded.recording(tmp_path / "metrics.prom"):
+        recorded.count("pages")
+    assert not recorded.enabled
+    assert "modscrape_pages_total 1" in (tmp_path / "metrics.prom").read_text()
+
+    # metrics are written even if the recorded block fails
+    with pytest.raises(RuntimeError):
+        with recorded.recording(tmp_path / "metrics.json"):
+            recorded.count("pages")
+            raise RuntimeError()
+    exported = json.loads((tmp_path / "metrics.json").read_text())
+    assert exported["counters"] == {"pages": 2}
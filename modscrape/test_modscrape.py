@@ -8,7 +8,7 @@
 from importlib.resources import read_text
 
 import test_resources
-from modscrape import scrape_modules
+from modscrape.scrape import scrape_modules
 
 
 def test_scrape_modules_core():
@@ -0,0 +1,91 @@
+#
+# Modscrape
+# Tests
+# Occupancy
+#
+
+import json
+
+import numpy as np
+import pytest
+
+from modscrape.occupancy import (
+    Grid,
+    class_occupancy,
+    ingest,
+    pack,
+    read_schedules,
+    read_table,
+    unpack,
+    write_table,
+)
+from test_resources import make_class, make_schedule
+
+
+def test_class_occupancy():
+    grid = Grid()
+    # 13:30-15:20 on Mondays of odd weeks
+    occupancy = class_occupancy(make_class(13.5, 2, [1], [1, 3, 5]), grid)
+    assert occupancy.shape == (14, 7, 28)
+    assert list(zip(*np.nonzero(occupancy))) == [
+        (week, 1, slot) for week in [0, 2, 4] for slot in [11, 12, 13, 14]
+    ]
+    # ISO & JS weekday numbering of Sunday
+    assert class_occupancy(make_class(8, 1, [7], [1])).any(axis=(0, 2))[0]
+    assert class_occupancy(make_class(8, 1, [0], [1])).any(axis=(0, 2))[0]
+
+    with pytest.raises(ValueError):
+        class_occupancy(make_class(13.25, 1, [1], [1]))
+    with pytest.raises(ValueError):
+        class_occupancy(make_class(21.5, 1, [1], [1]))
+    with pytest.raises(ValueError):
+        class_occupancy(make_class(9, 1, [1], [15]))
+
+
+def test_pack_unpack():
+    rng = np.random.default_rng(0)
+    grid = Grid()
+    occupancy = rng.random((3, *grid.shape)) < 0.3
+    bitmaps = pack(occupancy)
+    assert bitmaps.shape == (3, grid.words)
+    assert np.array_equal(unpack(bitmaps, grid), occupancy)
+
+
+def test_ingest_clashes(tmp_path):
+    schedules = [
+        make_schedule(
+            "SC2001",
+            {
+                "10210": [make_class(13.5, 1, [1], list(range(1, 15)))],
+                "10211": [make_class(9.5, 2, [4], [2, 4, 6])],
+            },
+        ),
+        make_schedule(
+            "SC2005",
+            # ends right as SC2001 10210 begins: no clash
+            {"10300": [make_class(12.5, 1, [1], [1])]},
+        ),
+        make_schedule(
+            "SC2006",
+            # overlaps SC2001 10211 in week 4 only
+            {"10400": [make_class(10.5, 1, [4], [4])]},
+        ),
+    ]
+    table = ingest(schedules)
+    assert table.modules == ["SC2001", "SC2001", "SC2005", "SC2006"]
+    assert table.rows("SC2001").tolist() == [0, 1]
+    assert table.row("SC2006", "10400") == 3
+    with pytest.raises(KeyError):
+        table.row("SC2006", "10210")
+    assert not table.clashes(0, 2)
+    assert table.clashes(1, 3)
+    assert not table.clashes(0, 3)
+
+    for schedule in schedules:
+        with open(tmp_path / f"{schedule['code']}.json", "w") as f:
+            json.dump(schedule, f)
+    write_table(table, tmp_path)
+    assert read_schedules(tmp_path) == schedules
+    read = read_table(tmp_path)
+    assert (read.modules, read.indexes) == (table.modules, table.indexes)
+    assert np.array_equal(read.bitmaps, table.bitmaps)
@@ -0,0 +1,38 @@
+#
+# Modscrape
+# Tests
+# Package
+#
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import modscrape
+from modscrape import parser
+
+
+def test_lazy_exports():
+    assert modscrape.parse is parser.parse
+    assert "scrape_modules" in dir(modscrape)
+    with pytest.raises(AttributeError):
+        modscrape.missing
+
+
+def test_parse_only_imports():
+    # check in a fresh interpreter as other tests import the scraper
+    code = (
+        "import sys, modscrape;"
+        "modscrape.parse, modscrape.lex, modscrape.Module;"
+        "print(sorted({'bs4', 'requests', 'numpy'} & sys.modules.keys()))"
+    )
+    imported = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    assert imported.strip() == "[]"
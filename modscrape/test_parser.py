@@ -5,14 +5,14 @@
 #
 
 from dataclasses import dataclass
-from parser import ParseException, Parser, tokens_to_module
 from typing import Any, Callable, Iterable, Optional, Type, cast
 
 import pytest
 
-from lexer import lex
-from module import Course, Module, ModuleCode
-from tok import KeyWords, Token, TokenType
+from modscrape.lexer import lex
+from modscrape.module import Course, Module, ModuleCode
+from modscrape.parser import ParseException, Parser, tokens_to_module
+from modscrape.tok import KeyWords, Token, TokenType
 
 
 # Utility function tests
@@ -0,0 +1,188 @@
+#
+# Modscrape
+# Tests
+# Pipeline
+#
+
+import json
+import threading
+import time
+from importlib.resources import read_text
+
+import pytest
+
+import test_resources
+from modscrape.corpus import generate_modules, render_core_page
+from modscrape.journal import ROTATED_FILE, CrawlJournal
+from modscrape.metrics import metrics
+from modscrape.pipeline import Pipeline, Stage, crawl, crawl_pipeline, main
+from modscrape.tracing import tracer
+
+
+def test_pipeline_overlaps_stages():
+    def slow(value: int) -> int:
+        time.sleep(0.05)
+        return value
+
+    pipeline: Pipeline[int] = Pipeline(
+        [Stage("io", slow, workers=4), Stage("cpu", lambda v: v * 2)]
+    )
+    outputs: dict[int, int] = {}
+    begin = time.perf_counter()
+    assert pipeline.run(((i, i) for i in range(8)), outputs.__setitem__) == []
+    elapsed = time.perf_counter() - begin
+
+    assert outputs == {i: i * 2 for i in range(8)}
+    # 4 concurrent workers: 2 rounds of 0.05s rather than 8 serial sleeps
+    assert elapsed < 0.3
+
+
+def test_pipeline_backpressure():
+    in_flight, peak = 0, 0
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def enter(value: int) -> int:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        return value
+
+    def leave(value: int) -> int:
+        nonlocal in_flight
+        release.wait()
+        with lock:
+            in_flight -= 1
+        return value
+
+    pipeline: Pipeline[int] = Pipeline(
+        [Stage("enter", enter, queue_size=2), Stage("leave", leave, queue_size=2)]
+    )
+    threading.Timer(0.1, release.set).start()
+    pipeline.run(((i, i) for i in range(100)), lambda key, value: None)
+    # blocked 'leave' stage: at most its item, its queue & one blocked put
+    assert peak <= 4
+
+
+def test_pipeline_failures():
+    def fail_odd(value: int) -> int:
+        if value % 2:
+            raise ValueError(value)
+        return value
+
+    def fail_sink(key: int, value: int):
+        if key == 4:
+            raise KeyError(key)
+
+    pipeline: Pipeline[int] = Pipeline([Stage("check", fail_odd, workers=2)])
+    failures = pipeline.run(((i, i) for i in range(6)), fail_sink)
+    assert sorted((f.key, f.stage) for f in failures) == [
+        (1, "check"),
+        (3, "check"),
+        (4, "sink"),
+        (5, "check"),
+    ]
+
+    def broken_items():
+        yield 0, 0
+        raise RuntimeError("broken")
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(broken_items(), lambda key, value: None)
+
+
+def test_crawl():
+    pages = {
+        "CSC;;1;F": read_text(test_resources, "cs_core_modules.html"),
+        "HIST;;2;M": read_text(test_resources, "art_hist_minor_modules.html"),
+    }
+    pipeline = crawl_pipeline(lambda semester, course: pages[course], fetch_workers=2)
+    crawled = {}
+    failures = crawl(
+        [("2023_1", "CSC;;1;F"), ("2023_1", "HIST;;2;M"), ("2023_1", "EEE;;1;F")],
+        crawled.__setitem__,
+        pipeline,
+    )
+
+    assert {job: len(modules) for job, modules in crawled.items()} == {
+        ("2023_1", "CSC;;1;F"): 41,
+        ("2023_1", "HIST;;2;M"): 30,
+    }
+    assert [(f.key, f.stage) for f in failures] == [(("2023_1", "EEE;;1;F"), "fetch")]
+
+
+def test_crawl_metrics():
+    page = read_text(test_resources, "cs_core_modules.html")
+    metrics.enable()
+    try:
+        crawl(
+            [("2023_1", "CSC;;1;F")],
+            lambda job, modules: None,
+            crawl_pipeline(lambda semester, course: page),
+        )
+        assert metrics.counters["modules"] == 41
+        assert metrics.counters["tokens"] > 0
+        assert metrics.counters["rows"] > 0
+    finally:
+        metrics.enable(False)
+        metrics.reset()
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Serve the test_resources fixtures in place of NTU's course content."""
+    pages = {
+        "CSC;;1;F": read_text(test_resources, "cs_core_modules.html"),
+        "HIST;;2;M": read_text(test_resources, "art_hist_minor_modules.html"),
+    }
+    monkeypatch.setattr(
+        "modscrape.scrape.get_options",
+        lambda: ({"2023_1": "2023_1"}, {course: course for course in pages}),
+    )
+    monkeypatch.setattr(
+        "modscrape.pipeline.get_course_content",
+        lambda semester, course: pages[course],
+    )
+    return pages
+
+
+def test_main_metrics(tmp_path, offline):
+    main([str(tmp_path / "catalog.db"), "--metrics", str(tmp_path / "metrics.json")])
+    exported = json.loads((tmp_path / "metrics.json").read_text())
+    assert exported["counters"]["modules"] == 71
+    assert not metrics.enabled
+    metrics.reset()
+
+
+def test_main_trace(tmp_path, offline):
+    main([str(tmp_path / "catalog.db"), "--trace", str(tmp_path / "trace.json")])
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {e["name"] for e in events} >= {"fetch", "extract", "lex", "parse"}
+    assert not tracer.enabled
+    tracer.reset()
+
+
+def test_main_profile(tmp_path, offline, monkeypatch):
+    # profile small pages, as tracing allocations is slow
+    page = render_core_page(generate_modules(3))
+    monkeypatch.setattr(
+        "modscrape.pipeline.get_course_content", lambda semester, course: page
+    )
+    main([str(tmp_path / "catalog.db"), "--profile", str(tmp_path / "profile")])
+    # lexing & parsing on pipeline worker threads is profiled
+    top = (tmp_path / "profile" / "cpu_top.txt").read_text()
+    assert "parse_tokens" in top and "_crawl" in top
+
+
+def test_main_journal(tmp_path, offline):
+    db, journal = str(tmp_path / "catalog.db"), str(tmp_path / "journal")
+    main([db, "--journal", journal])
+    # a finished journal is rotated out rather than requiring --resume
+    main([db, "--journal", journal])
+    assert (tmp_path / "journal" / ROTATED_FILE).exists()
+
+    with CrawlJournal(journal) as unfinished:
+        unfinished.plan([("2023_1", "EEE;;1;F")])
+    with pytest.raises(SystemExit):
+        main([db, "--journal", journal])
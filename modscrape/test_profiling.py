@@ -0,0 +1,50 @@
+#
+# Modscrape
+# Tests
+# Profiling
+#
+
+import time
+from collections import Counter
+
+import pytest
+
+from modscrape.corpus import generate_modules, render_core_page
+from modscrape.profiling import SAMPLE, Profiler, collapse, profiler
+from modscrape.scrape import scrape_modules
+
+
+def test_collapse():
+    stacks = Counter({("main", "lex"): 3, ("main", "parse", "module"): 2})
+    assert collapse(stacks) == "main;lex 3\nmain;parse;module 2\n"
+
+
+def test_profiler_cprofile(tmp_path):
+    # profile a small page, recording a single frame per allocation to keep it fast
+    page = render_core_page(generate_modules(2))
+    profiler.start(tmp_path, frames=1)
+    try:
+        scrape_modules(page)
+    finally:
+        profiler.stop()
+
+    assert not profiler.active
+    assert (tmp_path / "cpu.pstats").exists()
+    assert "scrape_modules" in (tmp_path / "cpu_top.txt").read_text()
+    assert (tmp_path / "alloc.collapsed").read_text() != ""
+    assert (tmp_path / "alloc_top.txt").read_text() != ""
+
+
+def test_profiler_sample(tmp_path):
+    sampling = Profiler()
+    sampling.start(tmp_path, mode=SAMPLE, interval=0.001)
+    with pytest.raises(RuntimeError):
+        sampling.start(tmp_path)
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    sampling.stop()
+
+    collapsed = (tmp_path / "cpu.collapsed").read_text()
+    assert "test_profiler_sample" in collapsed
+    assert not (tmp_path / "cpu.pstats").exists()
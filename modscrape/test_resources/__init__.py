@@ -0,0 +1,57 @@
+#
+# Modscrape
+# Tests
+# Test Resources
+#
+
+from typing import Optional
+
+from modscrape.module import Course, Module, ModuleCode
+
+
+def make_module(
+    code: str,
+    needs_modules: list[list[ModuleCode]] = [],
+    needs_year: Optional[int] = None,
+    mutually_exclusives: list[ModuleCode] = [],
+    rejects_courses: list[Course] = [],
+    rejects_courses_with: list[Course] = [],
+) -> Module:
+    return Module(
+        code=ModuleCode(code),
+        title=code,
+        au=3.0,
+        mutually_exclusives=mutually_exclusives,
+        needs_year=needs_year,
+        needs_modules=needs_modules,
+        needs_exclusives="",
+        rejects_modules=[],
+        rejects_courses=rejects_courses,
+        rejects_courses_with=rejects_courses_with,
+        unavailable_as_pe=[],
+        allowed_courses=[],
+        not_offered_as_bde=False,
+        not_offered_as_ue=False,
+        is_pass_fail=False,
+        description="",
+    )
+
+
+def make_class(
+    begin_hour: float, hours: float, weekdays: list[int], weeks: list[int]
+) -> dict:
+    return {
+        "type": "LEC/STUDIO",
+        "group": "SCL1",
+        "beginSecs": int(begin_hour * 3600),
+        "durationSecs": int(hours * 3600) - 600,
+        "venue": "ONLINE",
+        "repeats": {"weekdays": weekdays, "teachingWeeks": weeks},
+    }
+
+
+def make_schedule(code: str, indexes: dict[str, list[dict]]) -> dict:
+    return {
+        "code": code,
+        "indexes": [{"index": i, "classes": c} for i, c in indexes.items()],
+    }
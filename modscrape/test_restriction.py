@@ -0,0 +1,69 @@
+#
+# Modscrape
+# Tests
+# Restriction
+#
+
+from importlib.resources import read_text
+
+import pytest
+
+import test_resources
+from modscrape.module import Course
+from modscrape.restriction import RestrictionIndex, YearSegments
+from modscrape.scrape import scrape_modules
+from test_resources import make_module
+
+
+def test_year_segments_stab():
+    segments = YearSegments(
+        [(2011, 2019, "SC1004"), (2018, 9999, "SC1005"), (2021, 2021, "SC1006")]
+    )
+    assert segments.stab(2010) == frozenset()
+    assert segments.stab(2011) == {"SC1004"}
+    assert segments.stab(2019) == {"SC1004", "SC1005"}
+    assert segments.stab(2020) == {"SC1005"}
+    assert segments.stab(2021) == {"SC1005", "SC1006"}
+    assert segments.stab(2022) == {"SC1005"}
+    assert YearSegments([]).stab(2022) == frozenset()
+
+
+def test_restriction_index_closed_modules():
+    index = RestrictionIndex(
+        [
+            make_module(
+                "SC1004",
+                rejects_courses=[
+                    Course("ME", None, None, None, "IMS"),
+                    Course("EEE", True, 2019, 9999, None),
+                ],
+            ),
+            make_module(
+                "SC1005",
+                rejects_courses=[Course("EEE", None, 2018, 2018, None)],
+                rejects_courses_with=[Course("Admyr", None, 2011, 2017, None)],
+            ),
+        ]
+    )
+
+    assert index.closed_modules("ME", 2022) == frozenset()
+    assert index.closed_modules("ME", 2022, alt_course="IMS") == {"SC1004"}
+    assert index.closed_modules("EEE", 2019, is_direct_entry=False) == frozenset()
+    assert index.closed_modules("EEE", 2019, is_direct_entry=True) == {"SC1004"}
+    assert index.closed_modules("EEE", 2018) == {"SC1005"}
+    assert index.closed_modules("CSC", 2015) == {"SC1005"}
+    assert index.is_available("SC1004", "CSC", 2022)
+    assert not index.is_available("SC1005", "CSC", 2012)
+    with pytest.raises(KeyError):
+        index.is_available("SC9999", "CSC", 2022)
+
+
+def test_restriction_index_scraped():
+    index = RestrictionIndex(
+        scrape_modules(read_text(test_resources, "cs_core_modules.html"))
+    )
+    # ENE(Direct Entry) is rejected from EE1102
+    assert "EE1102" in index.closed_modules("ENE", 2020, is_direct_entry=True)
+    assert "EE1102" not in index.closed_modules("ENE", 2020, is_direct_entry=False)
+    # CZ3001 is not available as PE to REP(ASEN)
+    assert "CZ3001" in index.closed_as_pe("REP", 2020, alt_course="ASEN")
@@ -0,0 +1,72 @@
+#
+# Modscrape
+# Tests
+# Scheduler
+#
+
+import time
+
+import pytest
+
+from modscrape.pipeline import Failure
+from modscrape.scheduler import (
+    DeadlineExceeded,
+    Priority,
+    Scheduler,
+    deadline_fetcher,
+    parse_priority,
+    split_skipped,
+)
+
+DAY = 24 * 60 * 60
+
+
+def test_scheduler_order():
+    jobs = [
+        ("2022_2", "CSC;;1;F"),
+        ("2023_1", "HIST;;2;M"),
+        ("2023_1", "CSC;;1;F"),
+        ("2023_1", "EEE;;1;F"),
+        ("2023_1", "CSC;;1;F"),
+    ]
+    now = 10 * DAY
+    last_crawled = {
+        # freshly crawled core listing of the current semester
+        ("2023_1", "EEE;;1;F"): now - 60,
+        ("2022_2", "CSC;;1;F"): now - 2 * DAY,
+    }
+    assert Scheduler().order(jobs, last_crawled, now) == [
+        # 4 * 1
+        ("2023_1", "CSC;;1;F"),
+        # 4 * 0.5
+        ("2022_2", "CSC;;1;F"),
+        # 1 * 1
+        ("2023_1", "HIST;;2;M"),
+        # 4 * ~0
+        ("2023_1", "EEE;;1;F"),
+    ]
+
+    minors_first = Scheduler([Priority("*;M", 10)], semester_decay=1)
+    assert minors_first.order(jobs, last_crawled, now)[:2] == [
+        ("2023_1", "HIST;;2;M"),
+        # equally stale: never crawled before crawled 2 days ago
+        ("2023_1", "CSC;;1;F"),
+    ]
+
+
+def test_deadline_fetcher():
+    fetch = deadline_fetcher(lambda s, c: f"{s} {c}", time.monotonic() + 60)
+    assert fetch("2023_1", "CSC;;1;F") == "2023_1 CSC;;1;F"
+    fetch = deadline_fetcher(lambda s, c: "", time.monotonic())
+    with pytest.raises(DeadlineExceeded):
+        fetch("2023_1", "CSC;;1;F")
+
+    failed = Failure(("2023_1", "EEE;;1;F"), "parse", ValueError())
+    skipped = Failure(("2023_1", "CSC;;1;F"), "fetch", DeadlineExceeded())
+    assert split_skipped([failed, skipped]) == ([failed], [("2023_1", "CSC;;1;F")])
+
+
+def test_parse_priority():
+    assert parse_priority("CSC;;*=2.5") == Priority("CSC;;*", 2.5)
+    with pytest.raises(ValueError):
+        parse_priority("CSC;;*")
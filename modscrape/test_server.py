@@ -0,0 +1,140 @@
+#
+# Modscrape
+# Tests
+# Server
+#
+
+import asyncio
+import json
+from dataclasses import replace
+from typing import Optional
+
+from modscrape.module import Course, ModuleCode, module_from_dict, write_catalog
+from modscrape.server import CatalogServer, reload_logged
+from test_resources import make_module
+
+MODULES = [
+    make_module("SC1003"),
+    replace(make_module("SC1007", needs_modules=[[ModuleCode("SC1003")]]), au=4.0),
+    make_module(
+        "SC2001",
+        needs_modules=[[ModuleCode("SC1007"), ModuleCode("MH1810", True)]],
+        rejects_courses=[Course("EEE", None, None, None, None)],
+    ),
+]
+
+
+async def request(
+    port: int, method: str, target: str, headers: dict[str, str] = {}
+) -> tuple[int, dict[str, str], Optional[object]]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"{method} {target} HTTP/1.1", "Connection: close"] + [
+        f"{name}: {value}" for name, value in headers.items()
+    ]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode().split("\r\n")
+    response_headers = {
+        name.lower(): value.strip()
+        for name, _, value in [line.partition(":") for line in header_lines]
+    }
+    return (
+        int(status_line.split()[1]),
+        response_headers,
+        json.loads(body) if body else None,
+    )
+
+
+def test_catalog_server(tmp_path):
+    path = tmp_path / "catalog.json"
+    write_catalog(MODULES, path)
+
+    async def run():
+        server = CatalogServer(path)
+        http = await server.start(port=0)
+        port = http.sockets[0].getsockname()[1]
+
+        status, headers, body = await request(port, "GET", "/modules/SC2001")
+        assert status == 200
+        assert module_from_dict(body) == MODULES[2]
+        etag = headers["etag"]
+        status, _, _ = await request(
+            port, "GET", "/modules/SC2001", {"If-None-Match": etag}
+        )
+        assert status == 304
+        assert (await request(port, "GET", "/modules/SC9999"))[0] == 404
+
+        _, _, tree = await request(port, "GET", "/modules/SC2001/prerequisites")
+        assert tree == {
+            "code": "SC2001",
+            "needs": [
+                [
+                    {
+                        "code": "SC1007",
+                        "needs": [
+                            [{"code": "SC1003", "needs": [], "is_corequisite": False}]
+                        ],
+                        "is_corequisite": False,
+                    },
+                    {"code": "MH1810", "needs": [], "is_corequisite": True},
+                ]
+            ],
+        }
+
+        assert (await request(port, "GET", "/modules?au=3.0"))[2] == [
+            "SC1003",
+            "SC2001",
+        ]
+        assert (await request(port, "GET", "/modules?course=EEE&admit_year=2022"))[
+            2
+        ] == ["SC1003", "SC1007"]
+        assert (await request(port, "GET", "/modules?au=three"))[0] == 400
+
+        # hot reload a new catalog
+        write_catalog(MODULES[:1], path)
+        status, _, body = await request(port, "POST", "/reload")
+        assert status == 200
+        assert (await request(port, "GET", "/health"))[2] == {
+            "version": body["version"],
+            "modules": 1,
+        }
+        status, _, _ = await request(
+            port, "GET", "/modules/SC1003", {"If-None-Match": etag}
+        )
+        assert status == 200
+
+        http.close()
+        await http.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_catalog_server_errors(tmp_path, caplog):
+    path = tmp_path / "catalog.json"
+    write_catalog(MODULES, path)
+
+    async def run():
+        server = CatalogServer(path)
+        http = await server.start(port=0)
+        port = http.sockets[0].getsockname()[1]
+
+        etag = (await request(port, "GET", "/health"))[1]["etag"]
+        # unknown routes are not found, even with a matching validator
+        status, _, _ = await request(port, "GET", "/nowhere", {"If-None-Match": etag})
+        assert status == 404
+        status, _, _ = await request(port, "GET", "/health", {"Content-Length": "many"})
+        assert status == 400
+
+        # failed reloads keep serving the catalog loaded before
+        path.write_text("not json")
+        assert (await request(port, "POST", "/reload"))[0] == 500
+        assert (await request(port, "GET", "/health"))[2]["modules"] == len(MODULES)
+        await reload_logged(server)
+        assert "Failed to reload catalog" in caplog.text
+
+        http.close()
+        await http.wait_closed()
+
+    asyncio.run(run())
@@ -0,0 +1,88 @@
+#
+# Modscrape
+# Tests
+# Single Flight
+#
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.resources import read_text
+
+import pytest
+
+import test_resources
+from modscrape import scrape
+from modscrape.singleflight import SingleFlight, coalesced
+
+
+def test_single_flight_coalesces():
+    calls = 0
+
+    def slow() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.1)
+        return calls
+
+    flight: SingleFlight[str, int] = SingleFlight()
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: flight.do("key", slow), range(8)))
+    assert results == [1] * 8
+    # finished calls are not cached
+    assert flight.do("key", slow) == 2
+    assert flight.calls == {}
+
+
+def test_single_flight_shares_errors():
+    started = threading.Event()
+
+    def fail() -> int:
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("failed")
+
+    flight: SingleFlight[str, int] = SingleFlight()
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flight.do, "key", fail)
+        started.wait()
+        follower = executor.submit(flight.do, "key", lambda: 0)
+        for future in [leader, follower]:
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_coalesced():
+    calls: list[tuple[str, str]] = []
+
+    @coalesced
+    def fetch(semester: str, course: str) -> str:
+        calls.append((semester, course))
+        time.sleep(0.1)
+        return course
+
+    jobs = [("2023_1", "CSC;;1;F")] * 4 + [("2023_1", "EEE;;1;F")] * 4
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(lambda job: fetch(*job), jobs)) == [
+            job[1] for job in jobs
+        ]
+    assert sorted(calls) == [("2023_1", "CSC;;1;F"), ("2023_1", "EEE;;1;F")]
+
+
+def test_scrape_course(monkeypatch):
+    fetches = 0
+
+    def get_course_content(semester: str, course: str) -> str:
+        nonlocal fetches
+        fetches += 1
+        time.sleep(0.1)
+        return read_text(test_resources, "cs_core_modules.html")
+
+    monkeypatch.setattr(scrape, "get_course_content", get_course_content)
+    with ThreadPoolExecutor(4) as executor:
+        scraped = list(
+            executor.map(lambda _: scrape.scrape_course("2023_1", "CSC;;1;F"), range(4))
+        )
+    assert fetches == 1
+    assert len(scraped[0]) == 41
+    assert all(modules is scraped[0] for modules in scraped)
@@ -0,0 +1,107 @@
+#
+# Modscrape
+# Tests
+# Store
+#
+
+from dataclasses import replace
+from importlib.resources import read_text
+from time import time
+
+import pytest
+
+import test_resources
+from modscrape.module import Course, ModuleCode
+from modscrape.scrape import scrape_modules
+from modscrape.store import CatalogStore
+from test_resources import make_module
+
+
+def test_catalog_store_round_trip(tmp_path):
+    modules = scrape_modules(read_text(test_resources, "cs_core_modules.html"))
+    with CatalogStore(tmp_path / "catalog.db") as store:
+        store.upsert("2023_1", "CSC;;1;F", modules)
+        # upserting again should not duplicate rows
+        store.upsert("2023_1", "CSC;;1;F", modules)
+
+    with CatalogStore(tmp_path / "catalog.db") as store:
+        assert store.semesters() == ["2023_1"]
+        assert store.listed("2023_1", "CSC;;1;F") == sorted(
+            {m.code.code for m in modules}
+        )
+        for module in modules:
+            assert store.module("2023_1", module.code.code) == module
+        assert store.module("2023_1", "SC9999") is None
+        assert store.module("2022_2", modules[0].code.code) is None
+
+
+def test_catalog_store_upsert_updates():
+    with CatalogStore() as store:
+        store.upsert(
+            "2023_1",
+            "CSC;;1;F",
+            [make_module("SC2001", needs_modules=[[ModuleCode("SC1007")]])],
+        )
+        store.upsert(
+            "2023_1",
+            "CE;;1;F",
+            [replace(make_module("SC2001"), title="Algorithms")],
+        )
+
+        module = store.module("2023_1", "SC2001")
+        assert module is not None
+        assert module.title == "Algorithms"
+        assert module.needs_modules == []
+        assert store.listed("2023_1", "CE;;1;F") == ["SC2001"]
+        assert store.listed("2023_1", "CSC;;1;F") == ["SC2001"]
+
+
+def test_catalog_store_upsert_drops_delisted():
+    with CatalogStore() as store:
+        store.upsert("2023_1", "CSC;;1;F", [make_module("SC1"), make_module("SC2")])
+        # module SC2 has left the listing when it is scraped again
+        store.upsert("2023_1", "CSC;;1;F", [make_module("SC1")])
+
+        assert store.listed("2023_1", "CSC;;1;F") == ["SC1"]
+        # the delisted module is still kept for other listings
+        assert store.module("2023_1", "SC2") is not None
+
+
+def test_catalog_store_queries():
+    with CatalogStore() as store:
+        store.upsert(
+            "2023_1",
+            "CSC;;1;F",
+            [
+                make_module(
+                    "SC2001",
+                    needs_modules=[[ModuleCode("SC1007")], [ModuleCode("CZ1007")]],
+                    rejects_courses=[
+                        Course("EEE", True, None, None, None),
+                        Course("ME", None, 2018, 9999, "IMS"),
+                    ],
+                ),
+                make_module(
+                    "SC2005",
+                    needs_modules=[[ModuleCode("SC1007"), ModuleCode("SC1005")]],
+                    rejects_courses_with=[Course("Admyr", None, 2011, 2019, None)],
+                ),
+            ],
+        )
+
+        assert store.crawled_at() == {("2023_1", "CSC;;1;F"): pytest.approx(time())}
+        store.upsert("2022_2", "CSC;;1;F", [], crawled_at=0)
+        assert store.crawled_at()[("2022_2", "CSC;;1;F")] == 0
+        assert store.needed_by("2023_1", "SC1007") == ["SC2001", "SC2005"]
+        assert store.needed_by("2023_1", "SC1005") == ["SC2005"]
+        assert store.closed_modules("2023_1", "EEE", 2022) == []
+        assert store.closed_modules("2023_1", "EEE", 2022, is_direct_entry=True) == [
+            "SC2001"
+        ]
+        assert store.closed_modules("2023_1", "ME", 2017, alt_course="IMS") == [
+            "SC2005"
+        ]
+        assert store.closed_modules("2023_1", "ME", 2019, alt_course="IMS") == [
+            "SC2001",
+            "SC2005",
+        ]
@@ -0,0 +1,116 @@
+#
+# Modscrape
+# Tests
+# Timetables
+#
+
+import itertools
+import json
+import random
+
+import pytest
+
+from modscrape.occupancy import ingest
+from modscrape.timetables import (
+    enumerate_timetables,
+    main,
+    read_timetables,
+    write_timetables,
+)
+from test_resources import make_class, make_schedule
+
+WEEKS = list(range(1, 15))
+
+
+def make_schedules(n_modules: int, n_indexes: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        make_schedule(
+            f"SC{2000 + m}",
+            {
+                f"{m}{i}": [
+                    make_class(rng.randrange(8, 12), 2, [rng.randrange(1, 3)], WEEKS),
+                    make_class(rng.randrange(13, 16), 1, [3], [rng.randrange(1, 4)]),
+                ]
+                for i in range(n_indexes)
+            },
+        )
+        for m in range(n_modules)
+    ]
+
+
+def brute_force(schedules: list[dict]) -> list[dict[str, str]]:
+    table = ingest(schedules)
+    codes = list(dict.fromkeys(table.modules))
+    timetables = []
+    for rows in itertools.product(*[table.rows(code) for code in codes]):
+        if not any(table.clashes(a, b) for a, b in itertools.combinations(rows, 2)):
+            timetables.append({table.modules[row]: table.indexes[row] for row in rows})
+    return timetables
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_enumerate_timetables(seed):
+    schedules = make_schedules(4, 6, seed)
+    table = ingest(schedules)
+    timetables = enumerate_timetables(table, list(dict.fromkeys(table.modules)))
+
+    expected = brute_force(schedules)
+    assert len(timetables) == len(expected)
+    assert sorted(map(sorted, map(dict.items, timetables))) == sorted(
+        map(sorted, map(dict.items, expected))
+    )
+    assert all(timetable in timetables for timetable in expected)
+    rng = random.Random(seed)
+    assert all(timetables.sample(rng) in timetables for _ in range(20))
+
+
+def test_enumerate_timetables_infeasible():
+    schedules = [
+        make_schedule("SC2001", {"10210": [make_class(9, 1, [1], WEEKS)]}),
+        make_schedule("SC2005", {"10300": [make_class(9, 1, [1], [2])]}),
+    ]
+    timetables = enumerate_timetables(ingest(schedules), ["SC2001", "SC2005"])
+    assert len(timetables) == 0
+    assert list(timetables) == []
+    assert {"SC2001": "10210", "SC2005": "10300"} not in timetables
+    with pytest.raises(ValueError):
+        timetables.sample()
+    with pytest.raises(ValueError):
+        enumerate_timetables(ingest(schedules), ["SC2006"])
+
+
+def test_enumerate_timetables_empty():
+    # no modules to allocate: the empty timetable is the only timetable
+    timetables = enumerate_timetables(ingest(make_schedules(2, 2, 0)), [])
+    assert len(timetables) == 1
+    assert list(timetables) == [{}]
+    assert {} in timetables
+    assert timetables.sample() == {}
+
+
+def test_enumerate_timetables_groups():
+    # indexes differing only in their codes are grouped into a single edge
+    schedules = [
+        make_schedule(
+            "SC2001", {str(i): [make_class(9, 1, [1], WEEKS)] for i in range(5)}
+        ),
+        make_schedule("SC2005", {"10300": [make_class(10, 1, [1], WEEKS)]}),
+    ]
+    timetables = enumerate_timetables(ingest(schedules), ["SC2001", "SC2005"])
+    assert len(timetables) == 5
+    assert sum(len(node) for level in timetables.edges for node in level) == 2
+
+
+def test_write_read_timetables(tmp_path):
+    schedules = make_schedules(3, 4, 0)
+    for schedule in schedules:
+        with open(tmp_path / f"{schedule['code']}.json", "w") as f:
+            json.dump(schedule, f)
+    main([str(tmp_path), str(tmp_path / "out.json"), "--cohort=Y2=SC2000,SC2001"])
+    read = read_timetables(tmp_path / "out.json")["Y2"]
+    expected = enumerate_timetables(ingest(schedules), ["SC2000", "SC2001"])
+    assert list(read) == list(expected)
+
+    write_timetables({"Y2": expected}, tmp_path / "written.json")
+    assert read_timetables(tmp_path / "written.json")["Y2"] == read
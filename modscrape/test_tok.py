@@ -4,7 +4,7 @@
 # Token
 #
 
-from tok import Token, TokenType
+from modscrape.tok import Token, TokenType
 
 
 def test_token_equal_value():
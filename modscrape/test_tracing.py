@@ -0,0 +1,54 @@
+#
+# Modscrape
+# Tests
+# Tracing
+#
+
+import json
+from importlib.resources import read_text
+
+import test_resources
+from modscrape.scrape import scrape_modules
+from modscrape.tracing import NULL_SPAN, Tracer, tracer
+
+
+def test_tracer_disabled():
+    disabled = Tracer()
+    assert disabled.span("fetch") is NULL_SPAN
+    assert disabled.events == []
+
+
+def test_tracer_spans(tmp_path):
+    enabled = Tracer(enabled=True)
+    with enabled.tags(acadsem="2023_1"):
+        with enabled.tags(course="CSC;;1;F"), enabled.span("lex", lines=2):
+            pass
+        with enabled.span("parse"):
+            pass
+    path = tmp_path / "trace.json"
+    enabled.write(path)
+
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    assert [(e["name"], e["ph"], e["args"]) for e in events] == [
+        ("lex", "X", {"acadsem": "2023_1", "course": "CSC;;1;F", "lines": 2}),
+        ("parse", "X", {"acadsem": "2023_1"}),
+    ]
+    assert events[0]["ts"] + events[0]["dur"] <= events[1]["ts"]
+
+
+def test_scrape_modules_spans():
+    tracer.enable()
+    try:
+        with tracer.tags(acadsem="2023_1", course="CSC;;1;F"):
+            scrape_modules(read_text(test_resources, "cs_core_modules.html"))
+        assert [e["name"] for e in tracer.events] == [
+            "html_parse",
+            "row_extract",
+            "lex",
+            "parse",
+        ]
+        assert all(e["args"]["course"] == "CSC;;1;F" for e in tracer.events)
+    finally:
+        tracer.enable(False)
+        tracer.reset()